@@ -33,4 +33,82 @@ CC Payments
 Internal Transfers
 """
 categories = [c.strip() for c in categories.splitlines()]
-categories = [c for c in categories if c]
\ No newline at end of file
+categories = [c for c in categories if c]
+
+
+"""Registry"""
+# A category's id is its index in categories, which is also the order of the Excel sheets' category rows and columns
+ids: dict[str, int] = {cat: i for i, cat in enumerate(categories)}
+_casefolded: dict[str, int] = {cat.casefold(): i for i, cat in enumerate(categories)}
+assert len(_casefolded) == len(categories), "Categories must differ by more than capitalization"
+
+def find(name: str) -> int | None:
+    """Id of the category, ignoring capitalization, or None if it isn't one"""
+    i = ids.get(name)
+    return _casefolded.get(name.casefold()) if i is None else i
+
+def normalize(name: str) -> str:
+    """The category with its proper capitalization, or name unchanged if it isn't a category"""
+    i = find(name)
+    return name if i is None else categories[i]
+
+
+"""Hierarchy"""
+levels = ('Dir', 'Broad', 'Specific')
+Level = str
+"One of levels"
+Group = tuple[str, ...]
+"Path from the top of the hierarchy, ex. ('Expenses', 'Car') at the Broad level"
+
+
+class Hierarchy:
+    """
+    Dir / Broad / Specific grouping of the categories, from the Buckets sheet (see Loading/ExcelToJSON/buckets.py)
+    Each level's group index is precomputed, so rolling up a per-category vector is one pass over it
+    """
+    paths: list[tuple[str, str, str]]
+    "(Dir, Broad, Specific) for each category, by id"
+    groups: dict[Level, list[Group]]
+    "Level -> groups in the order first seen"
+    index: dict[Level, list[int]]
+    "Level -> group index (into groups[level]) for each category, by id"
+
+    def __init__(self, paths: list[tuple[str, str, str]]) -> None:
+        assert len(paths) == len(categories)
+        self.paths = paths
+        self.groups = {}
+        self.index = {}
+        for depth, level in enumerate(levels, start=1):
+            position: dict[Group, int] = {}
+            self.index[level] = [position.setdefault(path[:depth], len(position)) for path in paths]
+            self.groups[level] = list(position)
+
+    @classmethod
+    def from_rows(cls, rows: list[dict[str, str]]) -> 'Hierarchy':
+        """From rows with the Buckets sheet's Dir, Broad, Specific, and Key columns, in category order"""
+        keys = [row['Key'] for row in rows]
+        if keys != categories:
+            raise ValueError(f"Hierarchy rows don't match the category list: {keys}")
+        return cls([(row['Dir'], row['Broad'], row['Specific']) for row in rows])
+
+    @classmethod
+    def load(cls, path: str) -> 'Hierarchy':
+        """From the categories JSON written by the Buckets conversion"""
+        from .utils import json_load
+        return cls.from_rows(json_load(path))
+
+    def rollup(self, level: Level, values: list[int]) -> list[int]:
+        """Sums a per-category vector (by id) into one value per group of the level"""
+        ret = [0] * len(self.groups[level])
+        for group, value in zip(self.index[level], values):
+            ret[group] += value
+        return ret
+
+    def rollup_rows(self, level: Level, rows: list[list[int]]) -> list[list[int]]:
+        """rollup for each row of a matrix, ex. the date range x category totals from aggregation"""
+        return [self.rollup(level, row) for row in rows]
+
+    def members(self, level: Level, group: Group) -> list[str]:
+        """Categories in the group"""
+        g = self.groups[level].index(group)
+        return [cat for cat, i in zip(categories, self.index[level]) if i == g]
@@ -0,0 +1,154 @@
+"""
+On-disk cache for derived data that's expensive to rebuild
+Entries are keyed by content hashes, so they're never trusted just because they exist
+"""
+
+# General imports
+from functools import cache as _memoize, partial as _partial
+from typing import Callable as _Callable, Iterable as _Iterable, Iterator as _Iterator
+import ast as _ast
+import hashlib as _hashlib
+import inspect as _inspect
+import os as _os
+import pickle as _pickle
+import sys as _sys
+import textwrap as _textwrap
+
+_root = _os.path.dirname(_os.path.dirname(_os.path.abspath(__file__)))
+cache_dir = _os.path.join(_root, ".cache")
+
+
+def cache_path(name: str) -> str:
+    """Path for a cache entry (name can include subdirectories), creating directories if needed"""
+    path = _os.path.join(cache_dir, name)
+    _os.makedirs(_os.path.dirname(path), exist_ok=True)
+    return path
+
+
+def hash_bytes(*chunks: bytes) -> str:
+    h = _hashlib.sha256()
+    for chunk in chunks:
+        # Length-prefix so that ("ab", "c") and ("a", "bc") don't collide
+        h.update(len(chunk).to_bytes(8, 'little'))
+        h.update(chunk)
+    return h.hexdigest()
+
+
+def hash_files(*paths: str) -> str:
+    """Hash of the contents of all the files (a missing file hashes differently from an empty one)"""
+    chunks = []
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                chunks.append(b'1' + f.read())
+        except FileNotFoundError:
+            chunks.append(b'0')
+    return hash_bytes(*chunks)
+
+
+"""Code versions"""
+# Rather than listing by hand which source files some cached result depends on (and missing some),
+# follow the imports: everything a module imports from this project, anywhere in the file, transitively
+
+def _module_path(name: str) -> str | None:
+    """Source file of a project module, or None if it isn't one (standard library, installed package, or a name in a module)"""
+    base = _os.path.join(_root, *name.split('.'))
+    for path in (f"{base}.py", _os.path.join(base, '__init__.py')):
+        if _os.path.isfile(path):
+            return path
+    return None
+
+
+def _imported_names(tree: _ast.AST, package: str) -> _Iterator[str]:
+    """
+    Every module name the code imports, including inside functions, plus their parent packages (which run first)
+    package is what relative imports are relative to
+    For "from P import N" both P and P.N are given, since N could be a submodule or just a name in P
+    """
+    for node in _ast.walk(tree):
+        if isinstance(node, _ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, _ast.ImportFrom):
+            base = node.module or ''
+            if node.level:
+                parent = package.split('.') if package else []
+                parent = parent[:len(parent) - (node.level - 1)]
+                base = '.'.join([*parent, *([base] if base else [])])
+            names = [base, *(f"{base}.{alias.name}" for alias in node.names)]
+        else:
+            continue
+        for name in names:
+            parts = name.split('.')
+            for i in range(1, len(parts) + 1):
+                yield '.'.join(parts[:i])
+
+
+@_memoize
+def _file_imports(path: str, name: str) -> frozenset[str]:
+    with open(path, 'rb') as f:
+        tree = _ast.parse(f.read(), path)
+    package = name if _os.path.basename(path) == '__init__.py' else name.rpartition('.')[0]
+    return frozenset(_imported_names(tree, package))
+
+
+def module_files(modules: _Iterable[str], exclude: _Iterable[str] = ()) -> list[str]:
+    """
+    Sorted source files of the project modules and every project module they import, transitively
+    Modules in exclude are left out, along with anything only they import
+    """
+    seen = set(exclude)
+    pending = list(modules)
+    files = []
+    while pending:
+        name = pending.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        path = _module_path(name)
+        if path is None:
+            continue
+        files.append(path)
+        pending.extend(_file_imports(path, name))
+    return sorted(files)
+
+
+def function_imports(func: _Callable) -> tuple[str, list[str]]:
+    """
+    Source of a function and the modules it imports, for functions that import what they need when called
+    For anything else (ex. a callable object, or a lambda in the middle of an expression), just the name of the module it's from
+    """
+    while isinstance(func, _partial):
+        func = func.func
+    module = getattr(func, '__module__', None) or type(func).__module__
+    if _inspect.isfunction(func) and func.__name__ != '<lambda>':
+        try:
+            source = _textwrap.dedent(_inspect.getsource(func))
+        except OSError:
+            pass
+        else:
+            package = module if hasattr(_sys.modules.get(module), '__path__') else module.rpartition('.')[0]
+            return source, sorted(set(_imported_names(_ast.parse(source), package)))
+    return module, [module]
+
+
+def load_pickle(name: str, key: str):
+    """Returns the cached object if it was stored with the same key, otherwise None"""
+    path = _os.path.join(cache_dir, name)
+    try:
+        with open(path, 'rb') as f:
+            stored_key, obj = _pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # Corrupt or from an incompatible version, just rebuild
+        return None
+    return obj if stored_key == key else None
+
+
+def dump_pickle(name: str, key: str, obj) -> None:
+    """Stores the object with its key. Writes to a temp file first so a crash can't leave a partial entry"""
+    path = cache_path(name)
+    tmp = f"{path}.{_os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        _pickle.dump((key, obj), f, protocol=_pickle.HIGHEST_PROTOCOL)
+    _os.replace(tmp, path)
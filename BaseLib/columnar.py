@@ -0,0 +1,248 @@
+"""
+Binary columnar storage for lists of records (e.g. the Log)
+
+Layout:
+    magic (8 bytes) | header length (uint64) | header (JSON) | padding to 8 bytes | column data
+Int-like columns (money as cents, dates as ordinals) are little-endian int64 arrays.
+String columns are int64 indexes into a string table shared by the whole file
+(int64 offsets followed by one UTF-8 blob), so repeated descriptions/categories are stored once.
+The file is memory-mapped and each column is only decoded when asked for.
+"""
+
+# General imports
+from array import array as _array
+import json as _json
+import mmap as _mmap
+import os as _os
+import sys as _sys
+
+# Project imports
+from .money import Money
+from .utils import parse_ordinal, unparse_ordinal
+
+# Typing
+Record = dict[str, dict[str, str | Money | None]]
+Kind = str
+"'str', 'money' (cents, None allowed), or 'date' (ordinal, '' allowed)"
+
+_magic = b'BBCOL\x00\x00\x01'
+_none = -(2**63)
+"Stands in for None in money columns"
+_blank_date = 0
+"Stands in for '' in date columns (no real date has ordinal 0)"
+_native_little = _sys.byteorder == 'little'
+
+
+def _int_bytes(values) -> bytes:
+    arr = _array('q', values)
+    if not _native_little:
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def _pad(length: int) -> int:
+    return (-length) % 8
+
+
+def write_columns(path: str, columns: dict[str, tuple[Kind, list]], meta: dict | None = None) -> None:
+    """
+    columns: name -> (kind, values). Money values must already be cents and dates ordinals
+    meta: anything JSON-serializable, returned as-is by ColumnReader.meta
+    """
+    rows = {len(values) for _, values in columns.values()}
+    assert len(rows) <= 1, "All columns must be the same length"
+
+    # Shared string table
+    string_ids: dict[str, int] = {}
+    blobs: list[bytes] = []
+    chunks: list[bytes] = []
+    directory = {}
+    offset = 0
+    for name, (kind, values) in columns.items():
+        if kind == 'str':
+            ids = []
+            for value in values:
+                sid = string_ids.get(value)
+                if sid is None:
+                    sid = string_ids[value] = len(blobs)
+                    blobs.append(value.encode('utf8'))
+                ids.append(sid)
+            data = _int_bytes(ids)
+        else:
+            data = _int_bytes(values)
+        directory[name] = {'kind': kind, 'offset': offset}
+        chunks.append(data)
+        offset += len(data)
+
+    string_offsets = [0]
+    for blob in blobs:
+        string_offsets.append(string_offsets[-1] + len(blob))
+    table_offsets = _int_bytes(string_offsets)
+    strings = {'offset': offset, 'count': len(blobs)}
+    chunks.append(table_offsets)
+    chunks.extend(blobs)
+
+    header = _json.dumps({
+        'rows': rows.pop() if rows else 0,
+        'columns': directory,
+        'strings': strings,
+        'meta': meta or {},
+    }).encode('utf8')
+    prefix = _magic + len(header).to_bytes(8, 'little') + header
+    prefix += b'\x00' * _pad(len(prefix))
+
+    # Write to a temp file first so a crash can't leave a partial file
+    tmp = f"{path}.{_os.getpid()}.tmp"
+    with open(tmp, 'wb') as f:
+        f.write(prefix)
+        for chunk in chunks:
+            f.write(chunk)
+    _os.replace(tmp, path)
+
+
+class ColumnReader:
+    """Memory-mapped view of a file written by write_columns. Use as a context manager"""
+    rows: int
+    meta: dict
+    kinds: dict[str, Kind]
+
+    def __init__(self, path: str) -> None:
+        self._file = open(path, 'rb')
+        try:
+            self._map = _mmap.mmap(self._file.fileno(), 0, access=_mmap.ACCESS_READ)
+        except Exception:
+            # Ex. an empty file, which can't be mapped
+            self._file.close()
+            raise
+        try:
+            if self._map[:8] != _magic:
+                raise ValueError(f"Not a column file: {path}")
+            header_length = int.from_bytes(self._map[8:16], 'little')
+            # A truncated header doesn't parse (JSONDecodeError is a ValueError)
+            header = _json.loads(self._map[16:16 + header_length])
+        except Exception:
+            self.close()
+            raise
+        self._base = 16 + header_length + _pad(16 + header_length)
+        self.rows = header['rows']
+        self.meta = header['meta']
+        self._directory = header['columns']
+        self.kinds = {name: info['kind'] for name, info in self._directory.items()}
+        self._strings_info = header['strings']
+        self._strings: list[str] | None = None
+
+    def __enter__(self) -> 'ColumnReader':
+        return self
+    def __exit__(self, *args) -> None:
+        self.close()
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+    def _ints(self, offset: int, count: int):
+        start = self._base + offset
+        view = memoryview(self._map)[start:start + 8 * count]
+        if _native_little:
+            return view.cast('q').tolist()
+        arr = _array('q', view)
+        arr.byteswap()
+        return arr.tolist()
+
+    def _string_table(self) -> list[str]:
+        if self._strings is None:
+            count = self._strings_info['count']
+            offsets = self._ints(self._strings_info['offset'], count + 1)
+            blob_start = self._base + self._strings_info['offset'] + 8 * (count + 1)
+            blob = self._map[blob_start:blob_start + offsets[-1]]
+            self._strings = [blob[offsets[i]:offsets[i + 1]].decode('utf8') for i in range(count)]
+        return self._strings
+
+    def raw(self, name: str) -> list:
+        """Ints for money (cents, with a sentinel for None) and date (ordinal, 0 for blank) columns, str for str columns"""
+        info = self._directory[name]
+        values = self._ints(info['offset'], self.rows)
+        if info['kind'] == 'str':
+            table = self._string_table()
+            return [table[i] for i in values]
+        return values
+
+    def cents(self, name: str) -> list[int | None]:
+        """A money column as cents, with None for blanks (without making Money objects)"""
+        if self.kinds[name] != 'money':
+            raise ValueError(f"Column {name} holds {self.kinds[name]}, not money")
+        return [None if v == _none else v for v in self.raw(name)]
+
+    def column(self, name: str) -> list:
+        """Values in the same form they had in the records"""
+        kind = self.kinds[name]
+        values = self.raw(name)
+        if kind == 'money':
+            return [None if v == _none else Money.from_cents(v) for v in values]
+        if kind == 'date':
+            return [_decode_date(v) for v in values]
+        return values
+
+
+"""Records <-> columns"""
+def _decode_date(ordinal: int) -> str:
+    return '' if ordinal == _blank_date else unparse_ordinal(ordinal)
+
+
+def _encode_dates(values: list) -> list[int] | None:
+    """Ordinals, or None if any value wouldn't survive the round trip (then it's stored as str)"""
+    ret = []
+    for value in values:
+        if value == '':
+            ret.append(_blank_date)
+            continue
+        try:
+            ordinal = parse_ordinal(value)
+        except (TypeError, ValueError):
+            return None
+        if unparse_ordinal(ordinal) != value:
+            return None
+        ret.append(ordinal)
+    return ret
+
+
+def records_to_columns(records: list[Record]) -> tuple[dict[str, tuple[Kind, list]], list]:
+    """
+    Flattens records into "Section.Key" columns, picking the most compact lossless kind for each
+    Also returns the layout (section and key order) needed to rebuild the records
+    """
+    layout = [[section, list(fields.keys())] for section, fields in records[0].items()] if records else []
+    columns: dict[str, tuple[Kind, list]] = {}
+    for section, keys in layout:
+        for key in keys:
+            values = [record[section][key] for record in records]
+            name = f"{section}.{key}"
+            if all(v is None or isinstance(v, Money) for v in values):
+                columns[name] = ('money', [_none if v is None else v.value for v in values]) # type: ignore
+            elif all(isinstance(v, str) for v in values):
+                ordinals = _encode_dates(values) if key == 'Date' else None
+                columns[name] = ('str', values) if ordinals is None else ('date', ordinals)
+            else:
+                raise TypeError(f"Can't store mixed types in column {name}")
+    return columns, layout
+
+
+def columns_to_records(reader: ColumnReader, layout: list) -> list[Record]:
+    decoded = {
+        (section, key): reader.column(f"{section}.{key}")
+        for section, keys in layout for key in keys
+    }
+    return [
+        {section: {key: decoded[section, key][i] for key in keys} for section, keys in layout}
+        for i in range(reader.rows)
+    ]
+
+
+def source_stamp(path: str) -> dict[str, int]:
+    """Identifies the version of a source file, to tell if a binary copy of it is stale"""
+    stat = _os.stat(path)
+    return {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size}
+
+
+def write_records(path: str, records: list[Record], meta: dict | None = None) -> None:
+    columns, layout = records_to_columns(records)
+    write_columns(path, columns, {**(meta or {}), 'layout': layout})
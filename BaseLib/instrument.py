@@ -0,0 +1,166 @@
+"""
+Optional timing, memory, and counter instrumentation for the pipeline stages
+
+Off unless the BUDGET_PROFILE environment variable is set (or enable() is called, ex. by a --profile flag).
+When off, a stage wrapper costs one flag check per call and counters are a no-op.
+When on, each stage records calls, wall time, and peak memory above its starting point (via tracemalloc),
+and at exit a JSON report is written (to BUDGET_PROFILE if that's a .json path, else .cache/profile.json)
+along with a short summary.
+"""
+
+# General imports
+from contextlib import contextmanager
+from typing import Callable, Iterator, TypeVar
+import atexit as _atexit
+import functools as _functools
+import json as _json
+import os as _os
+import sys as _sys
+import time as _time
+import tracemalloc as _tracemalloc
+
+# Project imports
+from . import cache
+
+
+# Logging
+from .logger import delegate_print as print, flush as flush_log
+
+enabled = False
+_report_path: str | None = None
+_stages: dict[str, dict[str, float]] = {}
+"Name -> {'calls', 'seconds', 'peak_bytes'}"
+_counters: dict[str, int] = {}
+_open_peaks: list[int] = []
+"Highest traced memory seen so far by each open stage (outermost first)"
+
+
+def enable(report_path: str | None = None) -> None:
+    """Turns instrumentation on for the rest of the process"""
+    global enabled, _report_path
+    if enabled:
+        return
+    enabled = True
+    _report_path = report_path
+    _tracemalloc.start()
+    _count_money()
+    _atexit.register(_emit)
+
+
+def count(name: str, amount: int = 1) -> None:
+    if enabled:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Records one call of a stage. Nested stages are fine (the outer one's peak includes the inner one's)"""
+    if not enabled:
+        yield
+        return
+    current, peak = _tracemalloc.get_traced_memory()
+    if _open_peaks:
+        _open_peaks[-1] = max(_open_peaks[-1], peak)
+    _tracemalloc.reset_peak()
+    _open_peaks.append(current)
+    start = _time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = _time.perf_counter() - start
+        peak = max(_open_peaks.pop(), _tracemalloc.get_traced_memory()[1])
+        if _open_peaks:
+            _open_peaks[-1] = max(_open_peaks[-1], peak)
+        stats = _stages.setdefault(name, {'calls': 0, 'seconds': 0.0, 'peak_bytes': 0})
+        stats['calls'] += 1
+        stats['seconds'] += seconds
+        stats['peak_bytes'] = max(stats['peak_bytes'], peak - current)
+
+
+F = TypeVar('F', bound=Callable)
+def stage(name: str) -> Callable[[F], F]:
+    """Decorator that times every call of the function as the named stage, and writes out buffered log output after it"""
+    def decorator(func: F) -> F:
+        @_functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                if not enabled:
+                    return func(*args, **kwargs)
+                with timed(name):
+                    return func(*args, **kwargs)
+            finally:
+                # A stage is a natural point to catch up on output (and it shouldn't wait behind an exception)
+                flush_log()
+        return wrapper # type: ignore
+    return decorator
+
+
+def _count_money() -> None:
+    """Counts Money objects created, by wrapping the constructors (only counts modules imported so far and later)"""
+    from . import money
+    original_from_cents = money._from_cents
+    def _from_cents(cents: int):
+        ret = original_from_cents(cents)
+        if ret is not money._zero:
+            _counters['Money allocated'] = _counters.get('Money allocated', 0) + 1
+        return ret
+    # Keep the name so pickled Money (see Money.__reduce__) still points at money._from_cents
+    _from_cents.__module__ = original_from_cents.__module__
+    _from_cents.__qualname__ = original_from_cents.__qualname__
+    # Modules that imported it by name (ex. transaction) have their own reference, so replace those too
+    for module in list(_sys.modules.values()):
+        if getattr(module, '__dict__', {}).get('_from_cents') is original_from_cents:
+            module._from_cents = _from_cents
+
+    original_init = money.Money.__init__
+    @_functools.wraps(original_init)
+    def __init__(self, *args, **kwargs):
+        _counters['Money allocated'] = _counters.get('Money allocated', 0) + 1
+        original_init(self, *args, **kwargs)
+    money.Money.__init__ = __init__
+
+
+def report() -> dict:
+    return {
+        'stages': {name: dict(stats) for name, stats in _stages.items()},
+        'counters': dict(_counters),
+        'traced_peak_bytes': _tracemalloc.get_traced_memory()[1] if _tracemalloc.is_tracing() else None,
+    }
+
+
+def reset() -> None:
+    """Forgets everything recorded so far (ex. in a worker process, which starts with a copy of its parent's)"""
+    _stages.clear()
+    _counters.clear()
+
+
+def merge(recorded: dict) -> None:
+    """Adds the stages and counters of a report() from elsewhere (ex. a worker process) to this process's"""
+    for name, other in recorded['stages'].items():
+        stats = _stages.setdefault(name, {'calls': 0, 'seconds': 0.0, 'peak_bytes': 0})
+        stats['calls'] += other['calls']
+        stats['seconds'] += other['seconds']
+        stats['peak_bytes'] = max(stats['peak_bytes'], other['peak_bytes'])
+    for name, value in recorded['counters'].items():
+        _counters[name] = _counters.get(name, 0) + value
+
+
+def summary() -> str:
+    lines = [f"{'Stage':<24} {'Calls':>6} {'Time (ms)':>10} {'Peak (KiB)':>11}"]
+    for name, stats in sorted(_stages.items(), key=lambda kv: -kv[1]['seconds']):
+        lines.append(f"{name:<24} {stats['calls']:>6} {stats['seconds'] * 1e3:>10.1f} {stats['peak_bytes'] / 1024:>11.1f}")
+    for name, value in _counters.items():
+        lines.append(f"{name}: {value:,}")
+    return '\n'.join(lines)
+
+
+def _emit() -> None:
+    path = _report_path or cache.cache_path('profile.json')
+    with open(path, 'w') as f:
+        _json.dump(report(), f, indent=2)
+    print(f"Profile written to {path}\n{summary()}")
+
+
+_env = _os.environ.get('BUDGET_PROFILE', '')
+if _env and _env != '0':
+    enable(_env if _env.endswith('.json') else None)
@@ -1,34 +1,197 @@
+import atexit
 import builtins
+from contextlib import contextmanager
 import datetime
-import inspect
+import os
+import sys
+from types import CodeType
+from typing import Iterator
 
 
 original_print = builtins.print
 
 
+"""Levels"""
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+_levels = {'DEBUG': DEBUG, 'INFO': INFO, 'WARNING': WARNING, 'ERROR': ERROR}
+
+def parse_level(name: str) -> int:
+    """Level for a name like 'debug' (case-insensitive)"""
+    try:
+        return _levels[name.strip().upper()]
+    except KeyError:
+        raise ValueError(f"Unknown log level {name!r}, expected one of {', '.join(_levels)}") from None
+
+level = parse_level(os.environ.get('BUDGET_LOG_LEVEL', 'INFO'))
+"Messages below this level are dropped before anything gets formatted. Set with BUDGET_LOG_LEVEL or set_level"
+
+def set_level(new_level: int) -> None:
+    global level
+    level = new_level
+
+
+"""Output"""
+class _Buffer:
+    """Collects output and writes it in one go once there's enough of it
+    (or at the end of each pipeline stage, with any warning or error, before an uncaught exception's traceback, and at exit)"""
+    limit: int = 1 << 14
+    "Characters to collect before writing"
+
+    def __init__(self) -> None:
+        self.chunks: list[str] = []
+        self.size = 0
+        self.stream = None
+        "Where the collected output is going. If sys.stdout changes (ex. redirect_stdout), flush to the old one first"
+
+    def write(self, text: str) -> None:
+        stream = sys.stdout
+        if stream is not self.stream:
+            self.flush()
+            self.stream = stream
+        self.chunks.append(text)
+        self.size += len(text)
+        if self.size >= self.limit:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.chunks:
+            return
+        text = ''.join(self.chunks)
+        self.chunks.clear()
+        self.size = 0
+        try:
+            self.stream.write(text) # type: ignore
+            self.stream.flush() # type: ignore
+        except (AttributeError, ValueError):
+            # Stream was closed (ex. a capture that's already finished), nowhere left to send it
+            pass
+
+_buffer = _Buffer()
+atexit.register(_buffer.flush)
+
+_original_excepthook = sys.excepthook
+def _excepthook(*args) -> None:
+    """Writes out anything buffered before the traceback, so it comes out in the order it happened"""
+    _buffer.flush()
+    _original_excepthook(*args)
+sys.excepthook = _excepthook
+
+def flush() -> None:
+    """Writes out anything buffered"""
+    _buffer.flush()
+
+_sinks: list[list[str] | None] = []
+"Stack of capture lists (None means silenced). Output goes to the top one, or the buffer if empty"
+
+
+@contextmanager
+def capture() -> Iterator[list[str]]:
+    """Collects logged lines (with their prefixes) into a list instead of printing them"""
+    lines: list[str] = []
+    _sinks.append(lines)
+    try:
+        yield lines
+    finally:
+        _sinks.pop()
+
+def forward(lines: list[str]) -> None:
+    """Sends lines logged elsewhere (ex. captured in a worker process) to wherever output is going now"""
+    sink = _sinks[-1] if _sinks else _buffer
+    if sink is None:
+        return
+    if isinstance(sink, list):
+        sink.extend(lines)
+    else:
+        for line in lines:
+            sink.write(line + '\n')
+
+@contextmanager
+def silence() -> Iterator[None]:
+    """Drops everything logged inside, without even formatting it"""
+    _sinks.append(None)
+    try:
+        yield
+    finally:
+        _sinks.pop()
+
+
+"""Loggers"""
 _split_str = "Budget_Buckets/"
 class Logger:
     caller: str
     "Where the logging is happening, prefixed to each line"
-    
+
     def __init__(self, caller: str) -> None:
         self.caller = caller
-    
+
     def prefix(self):
         """Assembles the line prefix"""
         now = datetime.datetime.now().strftime("%H:%M:%S.%f")
         return f"{now} - {self.caller}:"
 
+    def log(self, msg_level: int, *values, sep: str | None = ' ', end: str | None = '\n', file=None, flush: bool = False):
+        """Same arguments as print. Values are only converted to strings if the message will actually be shown"""
+        if msg_level < level:
+            return
+        sink = _sinks[-1] if _sinks else _buffer
+        if sink is None:
+            return
+        sep = ' ' if sep is None else sep
+        end = '\n' if end is None else end
+        text = sep.join([self.prefix(), *map(str, values)])
+        if isinstance(sink, list):
+            sink.append(text)
+        elif file is not None:
+            # Somewhere specific, so don't hold it up
+            _buffer.flush()
+            original_print(text, end=end, file=file, flush=flush)
+        else:
+            sink.write(text + end)
+            if flush or msg_level >= WARNING:
+                sink.flush()
+
     def print(self, *values, **kwargs):
-        original_print(self.prefix(), *values, **kwargs)
+        self.log(INFO, *values, **kwargs)
+    def debug(self, *values, **kwargs):
+        self.log(DEBUG, *values, **kwargs)
+    def warning(self, *values, **kwargs):
+        self.log(WARNING, *values, **kwargs)
+    def error(self, *values, **kwargs):
+        self.log(ERROR, *values, **kwargs)
 
 
 _delegate_dict: dict[str, Logger] = {}
+_code_dict: dict[CodeType, Logger] = {}
+def _caller(depth: int) -> Logger:
+    """Logger for the file of the function `depth` frames up, cached by code object so the filename is only looked up once"""
+    code = sys._getframe(depth + 1).f_code
+    logger = _code_dict.get(code)
+    if logger is None:
+        caller = code.co_filename.split(_split_str)[-1]
+        if caller not in _delegate_dict:
+            _delegate_dict[caller] = Logger(caller=caller)
+        logger = _code_dict[code] = _delegate_dict[caller]
+    return logger
+
+def _enabled(msg_level: int) -> bool:
+    return msg_level >= level and not (_sinks and _sinks[-1] is None)
+
 def delegate_print(*values, **kwargs):
     """Delegates `print` to the Logger class"""
-    caller = inspect.stack()[1].filename
-    caller = caller.split(_split_str)[-1]
-    if caller not in _delegate_dict:
-        _delegate_dict[caller] = Logger(caller=caller)
-    logger = _delegate_dict[caller]
-    logger.print(*values, **kwargs)
+    if _enabled(INFO):
+        _caller(1).log(INFO, *values, **kwargs)
+
+def delegate_debug(*values, **kwargs):
+    if _enabled(DEBUG):
+        _caller(1).log(DEBUG, *values, **kwargs)
+
+def delegate_warning(*values, **kwargs):
+    if _enabled(WARNING):
+        _caller(1).log(WARNING, *values, **kwargs)
+
+def delegate_error(*values, **kwargs):
+    if _enabled(ERROR):
+        _caller(1).log(ERROR, *values, **kwargs)
@@ -1,9 +1,12 @@
+from collections.abc import Mapping
 import json
 
 
 symbol = '$' # Prefix indicating a Money type
 class Money:
-    """Avoid floating point problems when doing math with money"""
+    """Avoid floating point problems when doing math with money
+    Immutable (and hashable), so instances can be shared freely"""
+    __slots__ = ('value',)
     value: int
     "Total number of cents"
 
@@ -22,7 +25,7 @@ class Money:
 
         assert isinstance(dollars, int)
         assert isinstance(cents, int)
-        self.value = dollars * 100 + cents
+        _set_value(self, dollars * 100 + cents)
     
     @classmethod
     def from_dollars(cls, dollars: str|int|float):
@@ -30,20 +33,47 @@ class Money:
             dollars = float(dollars)
         if isinstance(dollars, int):
             # Integer dollars, no cents
-            return cls(dollars=dollars, cents=0)
+            return _from_cents(dollars * 100)
         
         assert isinstance(dollars, float)
-        value = round(dollars * 100, 0)
-        dollars, cents = divmod(value, 100)
-        return cls(dollars=dollars, cents=cents)
+        return _from_cents(int(round(dollars * 100, 0)))
     
+    @classmethod
+    def from_str(cls, text: str):
+        """Parses Excel-formatted money (e.g. "-$1,234.56" or "$-1,234.56") straight to cents, without going through float"""
+        digits = text.replace(symbol, '').replace(',', '')
+        negative = digits.startswith('-')
+        if negative:
+            digits = digits[1:]
+        dollars, _, cents = digits.partition('.')
+        if len(cents) > 2 or not (dollars or cents):
+            # Not the usual format, so let float handle it
+            return cls.from_dollars(text.replace(symbol, '').replace(',', ''))
+        value = int(dollars or '0') * 100 + int(cents.ljust(2, '0'))
+        return _from_cents(-value if negative else value)
+
     @classmethod
     def from_cents(cls, cents: str|int):
         if isinstance(cents, str):
             cents = int(cents)
         
         assert isinstance(cents, int)
-        return cls(dollars=0, cents=cents)
+        return _from_cents(cents)
+
+    # --- Immutability ---
+    def __setattr__(self, name, value):
+        raise AttributeError("Money is immutable")
+    def __delattr__(self, name):
+        raise AttributeError("Money is immutable")
+    def __reduce__(self):
+        return (_from_cents, (self.value,))
+    def __copy__(self):
+        return self
+    def __deepcopy__(self, memo):
+        return self
+    def __hash__(self) -> int:
+        # Same as the int, so that Money(0, 0) == 0 is consistent with hashing
+        return hash(self.value)
     
     # --- Operators ---
     # Operator helpers
@@ -52,18 +82,19 @@ class Money:
         if isinstance(value, Money):
             return value
         elif value == 0:
-            return Money(0, 0)
+            return _zero
         else:
             raise TypeError("Can only operate on another Money object")
     
     # Math operators (binary)
+    # The `type(...) is Money` checks skip _prep in the common case
     def __add__(self, value):
-        value = self._prep(value)
-        return Money.from_cents(self.value + value.value)
+        if type(value) is not Money: value = self._prep(value)
+        return _from_cents(self.value + value.value)
     __radd__ = __add__
     def __sub__(self, value):
-        value = self._prep(value)
-        return Money.from_cents(self.value - value.value)
+        if type(value) is not Money: value = self._prep(value)
+        return _from_cents(self.value - value.value)
     def __truediv__(self, value) -> float:
         value = self._prep(value)
         return self.value / value.value
@@ -72,19 +103,32 @@ class Money:
         return self.value * value.value
     # Math operators (unary)
     def __neg__(self):
-        return Money.from_cents(-self.value)
+        return _from_cents(-self.value)
     
     # Comparison operators
     def __lt__(self, value) -> bool:
-        value = self._prep(value)
-        return self.value.__lt__(value.value)
-    def __eq__(self, value: object) -> bool:
-        value = self._prep(value)
-        return self.value.__eq__(value.value)
+        if type(value) is not Money: value = self._prep(value)
+        return self.value < value.value
     def __le__(self, value) -> bool:
-        return self < value or self == value
+        if type(value) is not Money: value = self._prep(value)
+        return self.value <= value.value
+    def __gt__(self, value) -> bool:
+        if type(value) is not Money: value = self._prep(value)
+        return self.value > value.value
     def __ge__(self, value) -> bool:
-        return self == value or self > value
+        if type(value) is not Money: value = self._prep(value)
+        return self.value >= value.value
+    def __eq__(self, value: object) -> bool:
+        if type(value) is Money:
+            return self.value == value.value
+        if isinstance(value, (int, float)) and value == 0:
+            return self.value == 0
+        # Anything else (including non-zero numbers, which _prep would refuse) lets the other object decide,
+        #   so sets and dicts with mixed keys never raise
+        return NotImplemented
+    def __ne__(self, value: object) -> bool:
+        eq = self.__eq__(value)
+        return eq if eq is NotImplemented else not eq
 
     # --- Output formatting ---
     # JSON
@@ -105,10 +149,26 @@ class Money:
         return round(self.value / 100, 2)
 
 
+# Direct cents constructor for the arithmetic path: skips __init__ and its checks
+_set_value = Money.value.__set__ # type: ignore
+_new = object.__new__
+def _from_cents(cents: int) -> Money:
+    if not cents:
+        return _zero
+    ret = _new(Money)
+    _set_value(ret, cents)
+    return ret
+_zero = _new(Money)
+_set_value(_zero, 0)
+
+
 class MoneyEncoder(json.JSONEncoder):
     def default(self, o):
         if isinstance(o, Money):
             return o.to_json()
+        if isinstance(o, Mapping):
+            # Read-only dict views (e.g. column vectors)
+            return dict(o)
         return super().default(o)
 
 
@@ -0,0 +1,177 @@
+"""
+Runs a DAG of stages, storing each stage's output on disk (see BaseLib.cache)
+
+A stage's cache key is the hash of its code, its input files, and the outputs of the stages it depends on,
+so an unchanged stage is loaded instead of recomputed, in this process or any later one.
+Outputs are keyed by content rather than by upstream keys: if an upstream stage reruns but produces the same
+output (ex. a comment-only code change), everything downstream is still a cache hit.
+"""
+
+# General imports
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable
+import os as _os
+import pickle as _pickle
+import time as _time
+
+# Project imports
+from . import cache
+
+
+# Logging
+from .logger import delegate_print as print, flush as flush_log
+
+_stage_dir = 'stages'
+
+
+@dataclass
+class Stage:
+    name: str
+    compute: Callable[..., Any]
+    "Called with the outputs of deps, in order"
+    deps: list[str] = field(default_factory=list)
+    "Names of the stages this one needs the output of"
+    files: list[str] = field(default_factory=list)
+    "Input data files"
+    code: list[str] | None = None
+    """Source files that define how the output is computed (the stage's version)
+    By default, compute's own source plus every project module it imports (see cache.module_files)"""
+
+
+@dataclass
+class StageRun:
+    """What happened to a stage in this process"""
+    status: str
+    "'hit' (loaded from disk), 'miss' (computed), or 'forced' (computed because it was asked to be)"
+    seconds: float
+    "For stages computed in parallel (see Pipeline.prefetch), the time until its result came back"
+
+
+class Pipeline:
+    def __init__(self, stages: list[Stage], exclude_modules: tuple[str, ...] = ()) -> None:
+        """exclude_modules are left out of the code versions found from imports
+        (ex. the module defining the stages, so that editing one stage doesn't invalidate the rest)"""
+        self.stages = {stage.name: stage for stage in stages}
+        self.exclude_modules = exclude_modules
+        self.force: set[str] = set()
+        "Stages to recompute even if they're cached"
+        self.runs: dict[str, StageRun] = {}
+        self._results: dict[str, tuple[str, Any]] = {}
+        "Name -> (output digest, output), for stages already run in this process"
+        self._code_keys: dict[str, str] = {}
+
+    def code_files(self, name: str) -> list[str]:
+        """The source files the stage's version comes from"""
+        stage = self.stages[name]
+        if stage.code is not None:
+            return stage.code
+        return cache.module_files(cache.function_imports(stage.compute)[1], self.exclude_modules)
+
+    def _code_key(self, name: str) -> str:
+        if name not in self._code_keys:
+            stage = self.stages[name]
+            source = b'' if stage.code is not None else cache.function_imports(stage.compute)[0].encode('utf8')
+            self._code_keys[name] = cache.hash_bytes(source, cache.hash_files(*self.code_files(name)).encode())
+        return self._code_keys[name]
+
+    def _entry(self, name: str) -> str:
+        return _os.path.join(_stage_dir, f"{name}.pickle")
+
+    def _lookup(self, name: str, stack: tuple[str, ...] = ()) -> tuple[str, list[tuple[str, Any]], tuple[str, bytes] | None]:
+        """Resolves the stage's deps, and returns its key, their (digest, output)s, and its stored (digest, payload) if any"""
+        if name in stack:
+            raise ValueError(f"Stage dependency cycle: {' -> '.join((*stack, name))}")
+        stage = self.stages[name]
+        upstream = [self._resolve(dep, (*stack, name)) for dep in stage.deps]
+
+        key = cache.hash_bytes(
+            name.encode('utf8'),
+            self._code_key(name).encode(),
+            cache.hash_files(*stage.files).encode(),
+            *(digest.encode() for digest, _ in upstream),
+        )
+        cached = None if name in self.force else cache.load_pickle(self._entry(name), key)
+        return key, upstream, cached
+
+    def _store(self, name: str, key: str, output: Any) -> str:
+        payload = _pickle.dumps(output, protocol=_pickle.HIGHEST_PROTOCOL)
+        digest = cache.hash_bytes(payload)
+        cache.dump_pickle(self._entry(name), key, (digest, payload))
+        return digest
+
+    def _resolve(self, name: str, stack: tuple[str, ...] = ()) -> tuple[str, Any]:
+        if name in self._results:
+            return self._results[name]
+        start = _time.perf_counter()
+        key, upstream, cached = self._lookup(name, stack)
+        if cached is not None:
+            digest, payload = cached
+            output = _pickle.loads(payload)
+            status = 'hit'
+        else:
+            try:
+                output = self.stages[name].compute(*(output for _, output in upstream))
+            finally:
+                flush_log()
+            digest = self._store(name, key, output)
+            status = 'forced' if name in self.force else 'miss'
+        self.runs[name] = StageRun(status, _time.perf_counter() - start)
+        self._results[name] = (digest, output)
+        return self._results[name]
+
+    def prefetch(self, names: list[str], workers: int = 1) -> None:
+        """
+        Makes sure the stages are ready, computing the ones that aren't cached up to `workers` at a time in separate processes
+        Their deps are resolved first, in this process. Stages computed in a worker need a picklable compute
+        """
+        pending: dict[str, tuple[str, list[Any]]] = {}
+        "Name -> (key, upstream outputs), for the stages that need computing"
+        for name in names:
+            if name in self._results or name in pending:
+                continue
+            if workers <= 1:
+                self._resolve(name)
+                continue
+            start = _time.perf_counter()
+            key, upstream, cached = self._lookup(name)
+            if cached is None:
+                pending[name] = (key, [output for _, output in upstream])
+            else:
+                digest, payload = cached
+                output = _pickle.loads(payload)
+                self.runs[name] = StageRun('hit', _time.perf_counter() - start)
+                self._results[name] = (digest, output)
+        if not pending:
+            return
+
+        start = _time.perf_counter()
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as pool:
+            futures = {name: pool.submit(self.stages[name].compute, *upstream) for name, (_, upstream) in pending.items()}
+            for name, future in futures.items():
+                output = future.result()
+                flush_log()
+                digest = self._store(name, pending[name][0], output)
+                self.runs[name] = StageRun('forced' if name in self.force else 'miss', _time.perf_counter() - start)
+                self._results[name] = (digest, output)
+
+    def output(self, name: str) -> Any:
+        """Output of the stage, from memory, disk, or by computing it (and any stages it needs)"""
+        return self._resolve(name)[1]
+
+    def invalidate(self, *names: str) -> None:
+        """Deletes the stages' stored outputs (all stages if no names are given)"""
+        for name in names or self.stages:
+            self._results.pop(name, None)
+            try:
+                _os.remove(_os.path.join(cache.cache_dir, self._entry(name)))
+            except FileNotFoundError:
+                pass
+
+    def summary(self) -> str:
+        lines = [f"{'Stage':<22} {'Result':<7} {'Time (ms)':>10}"]
+        for name, run in self.runs.items():
+            lines.append(f"{name:<22} {run.status:<7} {run.seconds * 1e3:>10.1f}")
+        counts = {status: sum(run.status == status for run in self.runs.values()) for status in ('hit', 'miss', 'forced')}
+        lines.append(', '.join(f"{count} {status}" for status, count in counts.items()))
+        return '\n'.join(lines)
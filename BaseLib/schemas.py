@@ -0,0 +1,93 @@
+"""
+Declares which fields of each JSON file type hold Money
+Lets json_load convert just those fields instead of inspecting every string in the file
+"""
+
+# General imports
+import fnmatch as _fnmatch
+import os as _os
+
+# Project imports
+from .money import Money
+
+# Typing
+Path = tuple[str, ...]
+"Keys from the root to a money field. '*' matches any list element or dict key"
+
+
+_money = object()
+"Leaf marker in a compiled schema"
+class Schema:
+    paths: list[Path]
+    _trie: dict
+
+    def __init__(self, *paths: Path) -> None:
+        self.paths = list(paths)
+        self._trie = {}
+        for path in paths:
+            node = self._trie
+            for key in path[:-1]:
+                node = node.setdefault(key, {})
+                assert node is not _money, f"{path} goes through a money field"
+            node[path[-1]] = _money
+
+    def apply(self, data):
+        """Converts the money fields in place and returns data"""
+        _apply(data, self._trie)
+        return data
+
+
+def _apply(obj, trie: dict):
+    for key, sub in trie.items():
+        if key == '*':
+            targets = range(len(obj)) if isinstance(obj, list) else list(obj.keys())
+        elif key in obj:
+            targets = (key,)
+        else:
+            continue
+
+        if sub is _money:
+            for k in targets:
+                value = obj[k]
+                # Other types (e.g. None for a blank Override, bools in the Is Crit column) stay as-is
+                if isinstance(value, str):
+                    obj[k] = Money.from_str(value)
+        else:
+            for k in targets:
+                _apply(obj[k], sub)
+
+
+_vcc = [('value', '*'), ('capacity', '*')]
+_changes = [('changes', k, '*') for k in ('value_delta', 'value_set', 'capacity_delta', 'capacity_set')]
+
+log = Schema(
+    ('*', 'Imported', 'Amount'),
+    ('*', 'Override', 'Amount'),
+    ('*', 'Final', 'Amount'),
+)
+aggregate = Schema(
+    ('*', 'data', '*'),
+)
+buckets = Schema(
+    *[('initial', *p) for p in _vcc],
+    ('months', '*', 'columns', '*', '*'),
+    ('months', '*', 'intermediate', '*'),
+    *[('transitions', '*', section, *p) for section in ('end_previous', 'start_next') for p in _vcc],
+    *[('transitions', '*', *p) for p in _changes],
+)
+"Covers both the input (buckets.json) and the validation version"
+
+by_filename: dict[str, Schema] = {
+    'log_*.json': log,
+    'aggregate_*.json': aggregate,
+    'buckets*.json': buckets,
+}
+
+
+def for_path(path: str) -> Schema | None:
+    """Picks the schema based on the file name, or None if it's not a known file type"""
+    name = _os.path.basename(path)
+    for pattern, schema in by_filename.items():
+        if _fnmatch.fnmatch(name, pattern):
+            return schema
+    return None
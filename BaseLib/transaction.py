@@ -0,0 +1,307 @@
+"""
+Compact in-memory form of a Log item
+
+In the Log JSON each transaction is a dict of sections (Imported, Account, Override, ...), each a dict of fields
+(see Loading/ExcelToJSON/log.py). Transaction holds the same information in slotted, immutable objects:
+money as cents, dates as ordinals, and My Category as a small int code.
+from_item and to_item convert losslessly between the two, so the JSON files and validation keep the dict shape.
+from_columns builds them straight from the binary column file of a Log (see BaseLib.columnar), without the dicts.
+"""
+
+# General imports
+from typing import Iterable
+
+# Project imports
+from .CategoryList import categories, ids
+from .columnar import ColumnReader
+from .money import Money, _from_cents
+from .utils import parse_ordinal, unparse_ordinal
+
+# Typing
+Item = dict[str, dict[str, str | Money | None]]
+
+
+field_names = ["Date", "Description", "Original Description", "Category", "Amount", "Status"]
+"Keys of the Imported, Override, and Final sections, in order"
+_blank_date = 0
+"Stands in for '' (no real date has ordinal 0)"
+
+
+"""Category codes"""
+category_names: list[str] = list(categories)
+"Code -> My Category. The real categories come first with their CategoryList ids, so a code < len(categories) is a real one"
+_other_codes: dict[str, int] = {}
+"Codes past the real categories, for anything else seen as a My Category"
+
+def category_code(name: str) -> int:
+    """Code for a My Category, adding it if it's not a real category (ex. '' or a typo)"""
+    code = ids.get(name)
+    if code is None:
+        code = _other_codes.get(name)
+        if code is None:
+            code = _other_codes[name] = len(category_names)
+            category_names.append(name)
+    return code
+
+uncategorized = category_code('')
+
+
+"""Dates"""
+def date_to_ordinal(text: str) -> int | str:
+    """
+    Ordinal, or the text itself if it's a date that wouldn't convert back to the same text (ex. '01/02/2024'),
+    the same as columnar keeps such a Date column as text
+    Raises ValueError for anything that isn't a date at all
+    """
+    if text == '':
+        return _blank_date
+    ordinal = parse_ordinal(text)
+    if unparse_ordinal(ordinal) != text:
+        return text
+    return ordinal
+
+def ordinal_to_date(ordinal: int | str) -> str:
+    if ordinal == _blank_date:
+        return ''
+    if isinstance(ordinal, str):
+        return ordinal
+    return unparse_ordinal(ordinal)
+
+
+"""Records"""
+class Fields:
+    """One of the Imported, Override, or Final sections. Blank fields are '' (strings), 0 (date), or None (amount)"""
+    __slots__ = ('date', 'description', 'original_description', 'category', 'amount', 'status')
+    date: int | str
+    "Ordinal, or the original text if it wasn't in the standard M/D/YYYY format"
+    description: str
+    original_description: str
+    category: str
+    "The bank's category, not My Category"
+    amount: int | None
+    "Cents"
+    status: str
+
+    def __init__(self, date: int | str, description: str, original_description: str, category: str, amount: int | None, status: str):
+        _set_fields(self, date, description, original_description, category, amount, status)
+
+    @classmethod
+    def from_dict(cls, fields: dict[str, str | Money | None]) -> 'Fields':
+        if list(fields.keys()) != field_names:
+            raise ValueError(f"Expected the fields {field_names}, got {list(fields.keys())}")
+        amount = fields['Amount']
+        return cls(
+            date_to_ordinal(fields['Date']), # type: ignore
+            fields['Description'], fields['Original Description'], fields['Category'], # type: ignore
+            None if amount is None else amount.value, # type: ignore
+            fields['Status'], # type: ignore
+        )
+
+    def to_dict(self) -> dict[str, str | Money | None]:
+        return {
+            'Date': ordinal_to_date(self.date),
+            'Description': self.description,
+            'Original Description': self.original_description,
+            'Category': self.category,
+            'Amount': None if self.amount is None else _from_cents(self.amount),
+            'Status': self.status,
+        }
+
+    def astuple(self) -> tuple:
+        return (self.date, self.description, self.original_description, self.category, self.amount, self.status)
+
+    def is_blank(self) -> bool:
+        return not (self.date or self.description or self.original_description or self.category or self.status) and self.amount is None
+
+    def overridden_by(self, override: 'Fields') -> 'Fields':
+        """These fields with any non-blank ones from override taking their place. Returns self if override is blank"""
+        if override.is_blank():
+            return self
+        return Fields(
+            override.date or self.date,
+            override.description or self.description,
+            override.original_description or self.original_description,
+            override.category or self.category,
+            self.amount if override.amount is None else override.amount,
+            override.status or self.status,
+        )
+
+    # --- Immutability ---
+    def __setattr__(self, name, value):
+        raise AttributeError("Fields is immutable")
+    def __delattr__(self, name):
+        raise AttributeError("Fields is immutable")
+    def __reduce__(self):
+        return (Fields, self.astuple())
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Fields):
+            return NotImplemented
+        return self.astuple() == other.astuple()
+    def __hash__(self) -> int:
+        return hash(self.astuple())
+    def __repr__(self) -> str:
+        return f"Fields({self.to_dict()})"
+
+_field_setters = [Fields.__dict__[name].__set__ for name in Fields.__slots__]
+def _set_fields(obj, *values) -> None:
+    for setter, value in zip(_field_setters, values):
+        setter(obj, value)
+
+def _make_fields(*values) -> Fields:
+    ret = _new(Fields)
+    _set_fields(ret, *values)
+    return ret
+
+
+class Transaction:
+    """One Log item. final, my_category, and e are None until pre-processing and categorization fill them in"""
+    __slots__ = ('imported', 'account', 'override', 'final', 'my_category', 'e', 'comment')
+    imported: Fields
+    account: str
+    override: Fields
+    final: Fields | None
+    "Same object as imported if nothing is overridden"
+    my_category: int | None
+    "Code (see category_code and category_names)"
+    e: str | None
+    "'.' if My Category is a real category, 'E' if not"
+    comment: str
+
+    def __init__(self, imported: Fields, account: str, override: Fields, final: Fields | None = None,
+                 my_category: int | None = None, e: str | None = None, comment: str = ''):
+        _set_transaction(self, imported, account, override, final, my_category, e, comment)
+
+    @property
+    def my_category_name(self) -> str | None:
+        return None if self.my_category is None else category_names[self.my_category]
+
+    def replace(self, **changes) -> 'Transaction':
+        """A new Transaction sharing every section that isn't being changed"""
+        ret = _new(Transaction)
+        _set_transaction(ret, *(changes.pop(name) if name in changes else getattr(self, name) for name in Transaction.__slots__))
+        if changes:
+            raise TypeError(f"Unknown fields: {list(changes)}")
+        return ret
+
+    @classmethod
+    def from_item(cls, item: Item) -> 'Transaction':
+        """Raises ValueError for any item that couldn't be converted back exactly (unexpected sections or fields, a Date that isn't a date)"""
+        unexpected = set(item.keys()) - _sections
+        if unexpected:
+            raise ValueError(f"Unexpected sections: {sorted(unexpected)}")
+        imported = Fields.from_dict(item['Imported'])
+        final = None
+        if 'Final' in item:
+            final = Fields.from_dict(item['Final'])
+            if final == imported:
+                final = imported
+        my_category = item['My Category']['My Category'] if 'My Category' in item else None
+        return cls(
+            imported=imported,
+            account=item['Account']['Account'], # type: ignore
+            override=Fields.from_dict(item['Override']),
+            final=final,
+            my_category=None if my_category is None else category_code(my_category), # type: ignore
+            e=item['E']['E'] if 'E' in item else None, # type: ignore
+            comment=item['Comment']['Comment'], # type: ignore
+        )
+
+    def to_item(self) -> Item:
+        """The dict form, with the sections in the same order as the Log sheet"""
+        item: Item = {
+            'Imported': self.imported.to_dict(),
+            'Account': {'Account': self.account},
+            'Override': self.override.to_dict(),
+        }
+        if self.final is not None:
+            item['Final'] = self.final.to_dict()
+        if self.my_category is not None:
+            item['My Category'] = {'My Category': category_names[self.my_category]}
+        if self.e is not None:
+            item['E'] = {'E': self.e}
+        item['Comment'] = {'Comment': self.comment}
+        return item
+
+    def astuple(self) -> tuple:
+        return (self.imported, self.account, self.override, self.final, self.my_category_name, self.e, self.comment)
+
+    # --- Immutability ---
+    def __setattr__(self, name, value):
+        raise AttributeError("Transaction is immutable")
+    def __delattr__(self, name):
+        raise AttributeError("Transaction is immutable")
+    def __reduce__(self):
+        # By name, since codes past the real categories depend on the order they were first seen
+        return (_from_state, self.astuple())
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Transaction):
+            return NotImplemented
+        return self.astuple() == other.astuple()
+    def __hash__(self) -> int:
+        return hash(self.astuple())
+    def __repr__(self) -> str:
+        return f"Transaction({self.to_item()})"
+
+_sections = {'Imported', 'Account', 'Override', 'Final', 'My Category', 'E', 'Comment'}
+_new = object.__new__
+_transaction_setters = [Transaction.__dict__[name].__set__ for name in Transaction.__slots__]
+def _set_transaction(obj, *values) -> None:
+    for setter, value in zip(_transaction_setters, values):
+        setter(obj, value)
+
+def _from_state(imported, account, override, final, my_category, e, comment) -> Transaction:
+    return Transaction(imported, account, override, final, None if my_category is None else category_code(my_category), e, comment)
+
+
+def from_items(items: Iterable[Item]) -> list[Transaction]:
+    return [Transaction.from_item(item) for item in items]
+
+def to_items(transactions: Iterable[Transaction]) -> list[Item]:
+    return [transaction.to_item() for transaction in transactions]
+
+
+def from_columns(reader: ColumnReader) -> list[Transaction]:
+    """
+    Same as from_items on the records in a column file written by columnar.write_records,
+    but built from the raw columns: dates stay ordinals and amounts stay cents, with no dicts or Money in between
+    """
+    layout: dict[str, list[str]] = dict(reader.meta['layout'])
+    if reader.rows == 0:
+        return []
+    unexpected = set(layout) - _sections
+    if unexpected:
+        raise ValueError(f"Unexpected sections: {sorted(unexpected)}")
+
+    def column(section: str, key: str) -> list:
+        return reader.raw(f"{section}.{key}")
+    def fields(section: str) -> list[Fields]:
+        if layout[section] != field_names:
+            raise ValueError(f"Expected the fields {field_names}, got {layout[section]}")
+        name = f"{section}.Date"
+        dates = reader.raw(name) if reader.kinds[name] == 'date' else [date_to_ordinal(text) for text in reader.raw(name)]
+        return [_make_fields(*values) for values in zip(
+            dates,
+            column(section, 'Description'), column(section, 'Original Description'), column(section, 'Category'),
+            reader.cents(f"{section}.Amount"),
+            column(section, 'Status'),
+        )]
+
+    none = [None] * reader.rows
+    ret = []
+    for imported, account, override, final, my_category, e, comment in zip(
+        fields('Imported'),
+        column('Account', 'Account'),
+        fields('Override'),
+        fields('Final') if 'Final' in layout else none,
+        [category_code(name) for name in column('My Category', 'My Category')] if 'My Category' in layout else none,
+        column('E', 'E') if 'E' in layout else none,
+        column('Comment', 'Comment'),
+    ):
+        if final is not None and final == imported:
+            final = imported
+        transaction = _new(Transaction)
+        _set_transaction(transaction, imported, account, override, final, my_category, e, comment)
+        ret.append(transaction)
+    return ret
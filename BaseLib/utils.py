@@ -1,9 +1,15 @@
 # General imports
+from array import array as _array
+from typing import Iterable as _Iterable
 import datetime as _datetime
+import functools as _functools
 import json as _json
+import re as _re
 
 # Project imports
 from .money import MoneyEncoder, MoneyDecoder
+from . import instrument as _instrument
+from . import schemas as _schemas
 
 
 def safe_open(*args, **kwargs):
@@ -19,15 +25,55 @@ def json_dump(outfile: str, contents, indent: int|None = None):
         _json.dump(contents, f, indent=indent, cls=MoneyEncoder)
 
 
-def json_load(infile: str):
-    """Sugar syntax for JSON load using safe_open and MoneyDecoder"""
+@_instrument.stage('json decode')
+def json_load(infile: str, schema: '_schemas.Schema | None' = None):
+    """Sugar syntax for JSON load using safe_open
+    Money fields are decoded using the schema for the file type (picked by path if not given),
+    or by MoneyDecoder for unknown file types"""
+    if schema is None:
+        schema = _schemas.for_path(infile)
     with safe_open(infile, 'r') as f:
-        ret = _json.load(f, cls=MoneyDecoder)
-    return ret
+        if schema is None:
+            return _json.load(f, cls=MoneyDecoder)
+        ret = _json.load(f)
+    return schema.apply(ret)
+
 
+_date_pattern = _re.compile(r'(\d{1,2})/(\d{1,2})/(\d{4})', _re.ASCII)
+_date_memo_size = 1 << 12
+"Distinct dates to remember (a decade of days is under 4000)"
 
+@_functools.lru_cache(maxsize=_date_memo_size)
 def parse_date(date_str) -> _datetime.date:
-    return _datetime.datetime.strptime(date_str, '%m/%d/%Y').date()
+    """M/D/YYYY, same as strptime(date_str, '%m/%d/%Y') but without strptime's overhead
+    Memoized, since the same few hundred dates come up over and over"""
+    match = _date_pattern.fullmatch(date_str)
+    if match is None:
+        # Not the usual format, so let strptime decide (ex. it takes ' 1' as a day), and raise its usual error if not
+        return _datetime.datetime.strptime(date_str, '%m/%d/%Y').date()
+    month, day, year = match.groups()
+    return _datetime.date(int(year), int(month), int(day))
+
+@_functools.lru_cache(maxsize=_date_memo_size)
+def parse_ordinal(date_str: str) -> int:
+    """Same as parse_date(date_str).toordinal(). Ordinals are plain ints, so they can go in arrays and be compared/subtracted directly"""
+    return parse_date(date_str).toordinal()
+
+def parse_ordinals(date_strs: _Iterable[str]) -> _array:
+    """Ordinals for a whole column of dates at once, as an int64 array. Each distinct date is only parsed once"""
+    seen: dict[str, int] = {}
+    ret = _array('q')
+    append = ret.append
+    for date_str in date_strs:
+        ordinal = seen.get(date_str)
+        if ordinal is None:
+            ordinal = seen[date_str] = parse_ordinal(date_str)
+        append(ordinal)
+    return ret
+
+@_functools.lru_cache(maxsize=_date_memo_size)
+def unparse_ordinal(ordinal: int) -> str:
+    return unparse_date(_datetime.date.fromordinal(ordinal))
 
 def unparse_date(date: _datetime.date) -> str:
     # Can't just use strftime because it includes leading zeroes
@@ -0,0 +1,5 @@
+"""
+Benchmarks for the pipeline stages
+
+Run as modules from the repo root, e.g. `python -m Benchmarks.categorize`
+"""
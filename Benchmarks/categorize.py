@@ -0,0 +1,65 @@
+"""
+Per-transaction cost of Categorize.categorize as the rule table grows
+"""
+
+# General imports
+import random
+import time
+
+# Project imports
+from BaseLib.CategoryList import categories
+from BaseLib.money import Money
+from BaseLib.transaction import Fields, Transaction
+from Categorize import categorize
+from Categorize.main import RuleIndex
+
+
+def make_rules(count: int, rng: random.Random) -> list[dict]:
+    """Synthetic rules in the same shape as the parsed Rules.csv"""
+    rules = []
+    for i in range(count):
+        rules.append({
+            'Date': f"{rng.randint(1, 12)}/{rng.randint(1, 28)}/{rng.randint(2000, 2030)}",
+            'Description': f"Vendor {i}",
+            'Original Description': f"VENDOR {i} #{rng.randint(0, 9999):04} SOMEWHERE CO",
+            'Category': rng.choice(categories),
+            'Amount': Money.from_cents(rng.randint(-100000, 100000)),
+            'Status': 'Posted',
+            'My Category': rng.choice(categories),
+            'E': '.',
+            'Comment': '',
+        })
+    return rules
+
+
+def make_transactions(rules: list[dict], count: int, rng: random.Random) -> list[Transaction]:
+    """Transactions that each match one of the rules"""
+    input_keys = ["Date", "Description", "Original Description", "Category", "Amount", "Status"]
+    blank = Fields(0, '', '', '', None, '')
+    ret = []
+    for rule in rng.choices(rules, k=count):
+        final = Fields.from_dict({k: rule[k] for k in input_keys})
+        ret.append(Transaction(imported=final, account='', override=blank, final=final))
+    return ret
+
+
+def run(sizes=(100, 1_000, 10_000, 100_000), transactions: int = 5_000):
+    rng = random.Random(0)
+    print(f"{'Rules':>8} {'Build (ms)':>11} {'Per transaction (us)':>21}")
+    for size in sizes:
+        rules = make_rules(size, rng)
+        data = make_transactions(rules, transactions, rng)
+
+        start = time.perf_counter()
+        index = RuleIndex(rules)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        categorize(data, index)
+        elapsed = time.perf_counter() - start
+
+        print(f"{size:>8} {build * 1e3:>11.1f} {elapsed / transactions * 1e6:>21.2f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,52 @@
+"""
+BaseLib.utils date parsing against plain strptime, on a column of dates like the Log's
+(many transactions, a few thousand distinct days)
+"""
+
+# General imports
+import datetime
+import random
+import time
+
+# Project imports
+from BaseLib import utils
+
+
+def make_column(count: int, years: int, rng: random.Random) -> list[str]:
+    start = datetime.date(2020, 1, 1).toordinal()
+    days = years * 365
+    return [utils.unparse_date(datetime.date.fromordinal(start + rng.randrange(days))) for _ in range(count)]
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    ret = func(*args)
+    return ret, time.perf_counter() - start
+
+
+def run(count: int = 100_000, years: int = 10):
+    column = make_column(count, years, random.Random(0))
+
+    expected, strptime = _timed(lambda: [datetime.datetime.strptime(d, '%m/%d/%Y').date().toordinal() for d in column])
+    utils.parse_date.cache_clear()
+    utils.parse_ordinal.cache_clear()
+    cold, first = _timed(lambda: [utils.parse_date(d).toordinal() for d in column])
+    warm, again = _timed(lambda: [utils.parse_date(d).toordinal() for d in column])
+    utils.parse_date.cache_clear()
+    utils.parse_ordinal.cache_clear()
+    bulk, bulk_time = _timed(utils.parse_ordinals, column)
+    assert expected == cold == warm == list(bulk)
+
+    print(f"{count:,} dates, {len(set(column)):,} distinct")
+    print(f"{'Method':<26} {'Total (ms)':>10} {'Per date (ns)':>14}")
+    for name, seconds in [
+        ('strptime', strptime),
+        ('parse_date (empty memo)', first),
+        ('parse_date (memoized)', again),
+        ('parse_ordinals (bulk)', bulk_time),
+    ]:
+        print(f"{name:<26} {seconds * 1e3:>10.1f} {seconds / count * 1e9:>14.0f}")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,41 @@
+"""
+JSON load time with the schema (only money fields converted) vs MoneyDecoder (every string inspected)
+"""
+
+# General imports
+import json
+import time
+
+# Project imports
+from BaseLib.money import MoneyDecoder
+from BaseLib.utils import json_load, safe_open
+from Loading import log_validation_paths, aggregate_validation_paths, buckets_validation_path
+
+
+def time_load(loader, path: str, repeat: int = 20) -> float:
+    """Best time in milliseconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        loader(path)
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+def load_with_decoder(path: str):
+    with safe_open(path, 'r') as f:
+        return json.load(f, cls=MoneyDecoder)
+
+
+def run():
+    paths = [*log_validation_paths.values(), *aggregate_validation_paths.values(), buckets_validation_path]
+    print(f"{'File':<32} {'MoneyDecoder (ms)':>18} {'Schema (ms)':>12} {'Speedup':>8}")
+    for path in paths:
+        decoder = time_load(load_with_decoder, path)
+        schema = time_load(json_load, path)
+        name = path.replace('\\', '/').split('/')[-1]
+        print(f"{name:<32} {decoder:>18.2f} {schema:>12.2f} {decoder / schema:>7.1f}x")
+
+
+if __name__ == "__main__":
+    run()
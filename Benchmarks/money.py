@@ -0,0 +1,96 @@
+"""
+Money arithmetic speed and memory, compared to the original (pre-__slots__) implementation
+"""
+
+# General imports
+import timeit
+import tracemalloc
+
+# Project imports
+from BaseLib.money import Money
+
+
+class LegacyMoney:
+    """The original Money, trimmed to what the benchmark uses"""
+    def __init__(self, dollars, cents):
+        if isinstance(dollars, str):
+            dollars = float(dollars)
+        if isinstance(dollars, float):
+            assert dollars % 1 == 0
+            dollars = int(dollars)
+        if isinstance(cents, str):
+            cents = float(cents)
+        if isinstance(cents, float):
+            assert cents % 1 == 0
+            cents = int(cents)
+        assert isinstance(dollars, int)
+        assert isinstance(cents, int)
+        self.value = dollars * 100 + cents
+
+    @classmethod
+    def from_cents(cls, cents):
+        if isinstance(cents, str):
+            cents = int(cents)
+        assert isinstance(cents, int)
+        return cls(dollars=0, cents=cents)
+
+    def _prep(self, value):
+        if isinstance(value, LegacyMoney):
+            return value
+        elif value == 0:
+            return LegacyMoney(0, 0)
+        else:
+            raise TypeError("Can only operate on another Money object")
+
+    def __add__(self, value):
+        value = self._prep(value)
+        return LegacyMoney.from_cents(self.value + value.value)
+    __radd__ = __add__
+    def __sub__(self, value):
+        value = self._prep(value)
+        return LegacyMoney.from_cents(self.value - value.value)
+    def __lt__(self, value):
+        value = self._prep(value)
+        return self.value.__lt__(value.value)
+
+
+def time_ops(cls, number: int = 200_000) -> dict[str, float]:
+    """Nanoseconds per operation"""
+    a = cls.from_cents(12345)
+    b = cls.from_cents(-678)
+    values = [cls.from_cents(i) for i in range(32)]
+    ret = {
+        'add': timeit.timeit(lambda: a + b, number=number),
+        'sub': timeit.timeit(lambda: a - b, number=number),
+        'compare': timeit.timeit(lambda: a < b, number=number),
+        'sum/item': timeit.timeit(lambda: sum(values), number=number // 32),
+    }
+    return {k: v / number * 1e9 for k, v in ret.items()}
+
+
+def bytes_per_instance(cls, count: int = 100_000) -> float:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects = [cls.from_cents(i + 1) for i in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    del objects
+    # Don't charge for the list itself
+    return total / count - 8
+
+
+def run():
+    legacy = time_ops(LegacyMoney)
+    current = time_ops(Money)
+    print(f"{'Operation':<10} {'Legacy (ns)':>12} {'Current (ns)':>13} {'Speedup':>8}")
+    for op in legacy:
+        print(f"{op:<10} {legacy[op]:>12.0f} {current[op]:>13.0f} {legacy[op] / current[op]:>7.1f}x")
+
+    legacy_bytes = bytes_per_instance(LegacyMoney)
+    current_bytes = bytes_per_instance(Money)
+    print(f"{'Memory':<10} {legacy_bytes:>11.0f}B {current_bytes:>12.0f}B {legacy_bytes / current_bytes:>7.1f}x")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,82 @@
+"""
+How each pipeline stage scales with the number of transactions (and years of Buckets months)
+
+Prints a table of milliseconds per stage at each size, plus the growth exponent between the two largest sizes
+(~1 is linear, ~2 is quadratic), so hot spots show up as numbers.
+Run as `python -m Benchmarks.scaling [--sizes 1000:1 10000:3 100000:10]` (transactions:years)
+"""
+
+# General imports
+import argparse
+import math
+import os
+import tempfile
+import time
+
+# Project imports
+from BaseLib import utils
+from BaseLib.transaction import from_items
+from Benchmarks.synthetic import make_dataset, write_rules_csv
+from Categorize import categorize
+from Categorize.main import RuleIndex, parse_rules
+from Categorize.patterns import PatternMatcher
+from PreProcessLogs import pre_process
+from Validation.Aggregate.Handling import handle as aggregate
+from Validation.Buckets.Handling import handle as buckets
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    ret = func(*args, **kwargs)
+    return ret, time.perf_counter() - start
+
+
+def run_size(transactions: int, years: int) -> dict[str, float]:
+    """Seconds per stage for one synthetic dataset"""
+    dataset = make_dataset(transactions, years)
+    times: dict[str, float] = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Named like a Log JSON so the Log schema gets used, same as the real thing
+        path = os.path.join(tmp, 'log_synthetic.json')
+        _, times['json dump'] = _timed(utils.json_dump, path, dataset.log)
+        log, times['json load'] = _timed(utils.json_load, path)
+        rules_path = os.path.join(tmp, 'Rules.csv')
+        write_rules_csv(rules_path, dataset.rules)
+        rules, times['rules csv'] = _timed(parse_rules, rules_path)
+
+    transactions, times['from_items'] = _timed(from_items, log)
+    processed, times['pre_process'] = _timed(pre_process, transactions)
+    index, times['rule index'] = _timed(RuleIndex, rules)
+    categorized, times['categorize'] = _timed(categorize, processed, index, PatternMatcher([]))
+    aggregate_data, times['aggregate'] = _timed(aggregate, categorized, dataset.date_ranges)
+    _, times['buckets'] = _timed(buckets, aggregate_data, dataset.buckets_input, use_checkpoints=False)
+    return times
+
+
+def run(sizes: list[tuple[int, int]]):
+    results = [run_size(transactions, years) for transactions, years in sizes]
+    stages = list(results[0].keys())
+
+    headers = [f"{t:,} tx/{y} yr" for t, y in sizes]
+    width = max(14, *(len(h) for h in headers))
+    print(f"{'Stage (ms)':<12}" + ''.join(f"{h:>{width + 1}}" for h in headers) + f"{'Exponent':>10}")
+    for stage in stages:
+        row = [result[stage] for result in results]
+        exponent = ''
+        if len(sizes) > 1 and row[-2] > 0:
+            exponent = f"{math.log(row[-1] / row[-2]) / math.log(sizes[-1][0] / sizes[-2][0]):.2f}"
+        print(f"{stage:<12}" + ''.join(f"{t * 1e3:>{width + 1}.1f}" for t in row) + f"{exponent:>10}")
+
+
+def _size(text: str) -> tuple[int, int]:
+    transactions, _, years = text.partition(':')
+    return int(transactions), int(years or 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time each pipeline stage on synthetic data of increasing size")
+    parser.add_argument('--sizes', nargs='+', type=_size, default=[(1_000, 1), (10_000, 3), (100_000, 10)],
+                        help="transactions:years pairs (default: 1000:1 10000:3 100000:10)")
+    args = parser.parse_args()
+    run(args.sizes)
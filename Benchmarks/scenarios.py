@@ -0,0 +1,70 @@
+"""
+Time to simulate many what-if scenarios with Validation.Buckets.Scenarios
+"""
+
+# General imports
+import datetime
+import random
+import time
+
+# Project imports
+from BaseLib import utils
+from BaseLib.CategoryList import categories
+from BaseLib.money import Money
+from Validation.Buckets.Scenarios import Scenario, run_scenarios
+
+
+_no_change = {'value_delta': {}, 'value_set': {}, 'capacity_delta': {}, 'capacity_set': {}, 'crit_set': {}}
+
+
+def make_input(months: int, rng: random.Random) -> tuple[list[dict], dict]:
+    """Synthetic aggregate data and Buckets input: buckets start full, and income into Unexpected Fund covers each month's spending"""
+    spending = [cat for cat in categories if cat not in ('CC Payments', 'Internal Transfers', 'Unexpected Fund')]
+    capacity = {cat: Money.from_cents(rng.randint(100, 2000) * 100) for cat in categories}
+    initial = {
+        'value': dict(capacity),
+        'capacity': capacity,
+        'is_critical': {cat: rng.random() < 0.2 for cat in categories},
+    }
+
+    aggregate_data = []
+    transitions = {}
+    date = datetime.date(2020, 1, 1)
+    for _ in range(months):
+        data = {cat: Money(0, 0) for cat in categories}
+        for cat in spending:
+            data[cat] = Money.from_cents(-rng.randint(0, capacity[cat].value // 2))
+        data['Unexpected Fund'] = -sum(data.values(), Money(0, 0))
+        month = utils.unparse_date(date)
+        aggregate_data.append({'start': month, 'data': data})
+        transitions[month] = {'changes': {k: dict(v) for k, v in _no_change.items()}}
+        date = datetime.date(date.year + date.month // 12, date.month % 12 + 1, 1)
+    return aggregate_data, {'initial': initial, 'transitions': transitions}
+
+
+def make_scenarios(data: dict, count: int, rng: random.Random) -> list[Scenario]:
+    """Each scenario changes one capacity up front and makes one bucket critical partway through"""
+    months = list(data['transitions'].keys())
+    return [
+        Scenario(
+            initial={'capacity': {rng.choice(categories): Money.from_cents(rng.randint(0, 5000) * 100)}},
+            changes={rng.choice(months): {'crit_set': {rng.choice(categories): True}}},
+        )
+        for _ in range(count)
+    ]
+
+
+def run(counts=(100, 1_000, 10_000), months: int = 24):
+    rng = random.Random(0)
+    aggregate_data, data = make_input(months, rng)
+    print(f"{'Scenarios':>10} {'Total (ms)':>11} {'Per scenario (us)':>18} {'Failed':>7}")
+    for count in counts:
+        scenarios = make_scenarios(data, count, rng)
+        start = time.perf_counter()
+        results = run_scenarios(aggregate_data, data, scenarios)
+        elapsed = time.perf_counter() - start
+        print(f"{count:>10} {elapsed * 1e3:>11.1f} {elapsed / count * 1e6:>18.2f} {sum(results.failed()):>7}")
+
+
+if __name__ == "__main__":
+    run()
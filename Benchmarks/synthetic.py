@@ -0,0 +1,151 @@
+"""
+Synthetic, internally consistent pipeline inputs at any scale
+
+make_dataset builds a Log (as decoded from the Log JSON), one Rules.csv row per transaction,
+monthly aggregate date ranges, and a Buckets input whose simulation passes every error check:
+each month's paychecks exactly cover its spending and transitions only move money between buckets.
+"""
+
+# General imports
+import csv
+import datetime
+import random
+from dataclasses import dataclass
+
+# Project imports
+from BaseLib import utils
+from BaseLib.CategoryList import categories
+from BaseLib.money import Money
+
+
+spending_categories = [
+    cat for cat in categories
+    if cat not in ('Salary', 'Income - Other', 'Parental Funds', 'CC Payments', 'Internal Transfers')
+]
+_accounts = ['CC 8366', 'Chk 1121', 'CC 1234']
+_places = ['DENVER       CO', 'BOULDER      CO', 'WESTMINSTER  CO', 'SEATTLE      WA', 'AUSTIN       TX']
+_blank_override = {'Date': '', 'Description': '', 'Original Description': '', 'Category': '', 'Amount': None, 'Status': ''}
+
+
+@dataclass
+class Dataset:
+    log: list[dict]
+    "Log items as loaded from the Log JSON (before pre-processing)"
+    rules: list[dict]
+    "Rules as parsed from Rules.csv, one matching each Log item"
+    date_ranges: list[dict[str, datetime.date]]
+    "Monthly ranges covering every Log item"
+    buckets_input: dict
+    "Buckets input JSON contents (initial and transitions), one transition per month"
+
+
+def _vendors(count: int, rng: random.Random) -> list[tuple[str, str, str]]:
+    """(description, original description, My Category) for each vendor"""
+    ret = []
+    for i in range(count):
+        name = f"Vendor {i}"
+        original = f"{name.upper()} #{rng.randint(0, 9999):04}".ljust(25) + rng.choice(_places)
+        ret.append((name, original, rng.choice(spending_categories)))
+    return ret
+
+
+def _months(years: int, start_year: int) -> list[dict[str, datetime.date]]:
+    ret = []
+    for m in range(years * 12):
+        start = datetime.date(start_year + m // 12, m % 12 + 1, 1)
+        next_start = datetime.date(start.year + start.month // 12, start.month % 12 + 1, 1)
+        ret.append({'start': start, 'end': next_start - datetime.timedelta(days=1)})
+    return ret
+
+
+def _item(date: datetime.date, description: str, original: str, category: str, amount: Money, account: str, override: dict | None = None) -> dict:
+    return {
+        'Imported': {
+            'Date': utils.unparse_date(date), 'Description': description, 'Original Description': original,
+            'Category': category, 'Amount': amount, 'Status': 'Posted',
+        },
+        'Account': {'Account': account},
+        'Override': dict(override or _blank_override),
+        'Comment': {'Comment': ''},
+    }
+
+
+def make_dataset(transactions: int, years: int = 1, seed: int = 0, start_year: int = 2020, override_rate: float = 0.05) -> Dataset:
+    rng = random.Random(seed)
+    date_ranges = _months(years, start_year)
+    vendors = _vendors(max(10, transactions // 20), rng)
+    per_month = max(1, transactions // len(date_ranges))
+
+    log: list[dict] = []
+    my_categories: list[str] = []
+    for date_range in date_ranges:
+        days = (date_range['end'] - date_range['start']).days
+        spent = 0
+        for _ in range(per_month):
+            description, original, my_category = rng.choice(vendors)
+            date = date_range['start'] + datetime.timedelta(days=rng.randint(0, days))
+            amount = Money.from_cents(-rng.randint(100, 20000))
+            override = None
+            if rng.random() < override_rate:
+                # Fixed-up amount, like a corrected or split charge
+                amount_override = Money.from_cents(-rng.randint(100, 20000))
+                override = {**_blank_override, 'Amount': amount_override}
+                spent += amount_override.value
+            else:
+                spent += amount.value
+            log.append(_item(date, description, original, 'Shopping', amount, rng.choice(_accounts), override))
+            my_categories.append(my_category)
+        # Paychecks exactly cover the month's spending, so the Buckets always balance
+        paychecks = 2
+        for p in range(paychecks):
+            cents = -spent // paychecks + (-spent % paychecks if p == 0 else 0)
+            date = date_range['start'] + datetime.timedelta(days=min(days, 14 * p + 1))
+            log.append(_item(date, 'Employer', 'EMPLOYER PAYROLL    ***********1234', 'Paycheck', Money.from_cents(cents), 'Chk 1121'))
+            my_categories.append('Salary')
+
+    # Newest first, like the Excel sheet
+    order = sorted(range(len(log)), key=lambda i: utils.parse_date(log[i]['Imported']['Date']), reverse=True)
+    log = [log[i] for i in order]
+    my_categories = [my_categories[i] for i in order]
+
+    rules = []
+    for item, my_category in zip(log, my_categories):
+        final = {k: (v if v else item['Imported'][k]) for k, v in item['Override'].items()}
+        rules.append({**final, 'My Category': my_category, 'E': '.', 'Comment': ''})
+
+    # Roomy enough that a bucket rarely empties in one month
+    typical_spend = per_month * 10_000 // len(spending_categories)
+    return Dataset(log, rules, date_ranges, _buckets_input(date_ranges, typical_spend, rng))
+
+
+def _buckets_input(date_ranges: list[dict[str, datetime.date]], typical_spend: int, rng: random.Random) -> dict:
+    """
+    Buckets start full. Each transition moves some money from one spending bucket to another
+    typical_spend: cents spent from a bucket in an average month
+    """
+    capacity = {cat: Money.from_cents(rng.randint(4, 10) * typical_spend if cat in spending_categories else 0) for cat in categories}
+    initial = {
+        'value': {**capacity, 'total': sum(capacity.values(), Money(0, 0))},
+        'capacity': {**capacity, 'total': sum(capacity.values(), Money(0, 0))},
+        'is_critical': {cat: rng.random() < 0.2 for cat in categories},
+    }
+    transitions = {}
+    for date_range in date_ranges:
+        changes: dict[str, dict] = {k: {cat: None for cat in categories} for k in ('value_delta', 'value_set', 'capacity_delta', 'capacity_set', 'crit_set')}
+        source, dest = rng.sample(spending_categories, 2)
+        moved = Money.from_cents(rng.randint(1, 100) * 100)
+        changes['value_delta'][source] = -moved
+        changes['value_delta'][dest] = moved
+        transitions[utils.unparse_date(date_range['start'])] = {'changes': changes}
+    return {'initial': initial, 'transitions': transitions}
+
+
+def write_rules_csv(path: str, rules: list[dict]) -> None:
+    """Writes rules in the same format as Rules.csv"""
+    fields = ["Date", "Description", "Original Description", "Category", "Amount", "Status", "My Category", "E", "Comment"]
+    with utils.safe_open(path, 'w') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for rule in rules:
+            writer.writerow({**rule, 'Amount': rule['Amount'].to_dollars()})
+
@@ -0,0 +1,78 @@
+"""
+Loading/OpenExcel/xlsx.XlsxReader against openpyxl's load_workbook(read_only=True, data_only=True),
+on a synthetic workbook shaped like the Log sheets (dates, text, amounts, a few blanks) but much bigger
+
+Run as `python -m Benchmarks.xlsx [--rows 200000]`
+"""
+
+# General imports
+import argparse
+import datetime
+import os
+import random
+import tempfile
+import time
+
+# Project imports
+from Loading.OpenExcel.xlsx import XlsxReader
+
+
+def write_workbook(path: str, rows: int, rng: random.Random) -> None:
+    import openpyxl
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("Log 2020")
+    sheet.append(['Imported', None, None, None, None, None, 'Account', 'Override'])
+    sheet.append(['Date', 'Description', 'Original Description', 'Category', 'Amount', 'Status', 'Account', 'Date', 'Amount', 'Comment'])
+    start = datetime.datetime(2020, 1, 1)
+    vendors = [f"Vendor {i}" for i in range(max(10, rows // 20))]
+    for _ in range(rows):
+        vendor = rng.choice(vendors)
+        sheet.append([
+            start + datetime.timedelta(days=rng.randrange(3650)), vendor, f"{vendor.upper()} #{rng.randrange(10_000):04}",
+            'Shopping', -rng.randint(100, 20000) / 100, 'Posted', rng.choice(['CC 8366', 'Chk 1121']),
+            None, -rng.randint(100, 20000) / 100 if rng.random() < 0.05 else None, '',
+        ])
+    workbook.save(path)
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    ret = func(*args)
+    return ret, time.perf_counter() - start
+
+
+def _openpyxl_rows(path: str, name: str) -> list[tuple]:
+    import openpyxl
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        return list(workbook[name].values)
+    finally:
+        workbook.close()
+
+
+def _reader_rows(path: str, name: str) -> list[tuple]:
+    return list(XlsxReader(path).values(name))
+
+
+def run(rows: int = 200_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'synthetic.xlsx')
+        _, write_time = _timed(write_workbook, path, rows, random.Random(0))
+        print(f"{rows:,} rows, {os.path.getsize(path) / 2**20:.1f} MiB (written in {write_time:.1f} s)")
+
+        expected, openpyxl_time = _timed(_openpyxl_rows, path, "Log 2020")
+        actual, reader_time = _timed(_reader_rows, path, "Log 2020")
+        assert actual == expected
+        assert all(type(a) is type(e) for row_a, row_e in zip(actual, expected) for a, e in zip(row_a, row_e))
+
+    print(f"{'Reader':<10} {'Total (s)':>10} {'Per row (µs)':>13}")
+    for name, seconds in [('openpyxl', openpyxl_time), ('XlsxReader', reader_time)]:
+        print(f"{name:<10} {seconds:>10.2f} {seconds / rows * 1e6:>13.1f}")
+    print(f"Speedup: {openpyxl_time / reader_time:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time streaming a large sheet with XlsxReader vs openpyxl")
+    parser.add_argument('--rows', type=int, default=200_000)
+    args = parser.parse_args()
+    run(args.rows)
@@ -1,57 +1,176 @@
 # General imports
-from copy import deepcopy
 import csv
 
 # Project imports
-from BaseLib.CategoryList import categories
+from BaseLib.CategoryList import categories, normalize
 from BaseLib.utils import safe_open
 from BaseLib.money import Money
+from BaseLib import cache, instrument
+from BaseLib.transaction import Fields, Transaction, category_code, date_to_ordinal
+from .patterns import PatternMatcher, load_pattern_rules
 
 # Logging
 from BaseLib.logger import delegate_print as print
 
 # Typing
-Item = dict[str, dict[str, str]]
-
-
-with safe_open('Rules.csv', 'r', errors='ignore') as f:
-    # FIXME some lines apparently have non-utf-8 bytes, but I can't find which characters. So just ignore and hope it works
-    rules = list(csv.DictReader(f))
-for rule in rules:
-    # Use Money objects
-    rule['Amount'] = Money.from_dollars(rule['Amount'])
-    # Enforce consistent category capitalization
-    rule_cat: str = rule['My Category']
-    for real_cat in categories:
-        if rule_cat.lower() == real_cat.lower() and rule_cat != real_cat:
-            # Same category, just wrong capitalization
-            rule['My Category'] = real_cat
-            break
+Rule = dict[str, str | Money]
+
 
 input_keys = ["Date", "Description", "Original Description", "Category", "Amount", "Status"]
 output_keys = ["My Category", "Comment"]
 
-def categorize(data: list[Item]):
-    """Handle categorization logic"""
-    # FIXME this is ridiculously inefficient
-    ret: list[Item] = deepcopy(data)
-    for item in ret:
-        final = item['Final']
+
+class RuleIndex:
+    """Rules compiled into a hash table keyed on the input fields, so matching doesn't scan every rule"""
+    exact: dict[tuple, Rule]
+    "Normalized input fields -> rule"
+
+    def __init__(self, rules: list[Rule]) -> None:
+        self.exact = {}
         for rule in rules:
-            if all(final[key] == rule[key] for key in input_keys):
-                for key in output_keys:
-                    assert key not in final
-
-                    item[key] = {key: rule[key]} # type: ignore
-                
-                
-                # FIXME this block is kind of hacky
-                key = 'E'
-                e = '.' if (item['My Category']['My Category'] in categories) else 'E'
-                if e == 'E': print("FOUND ERROR ITEM:\n" + str(item))
-                assert e == rule[key]
-                item[key] = {key: e} # type: ignore
-                break
-        else:
-            raise ValueError(f"No rule matched for:\n{final}")
+            # setdefault so that the first matching rule wins, same as a linear scan would
+            self.exact.setdefault(self.key(rule), rule)
+
+    @staticmethod
+    def key(fields: dict) -> tuple:
+        """Normalize the input fields into the same form as Fields.astuple (dates as ordinals, money as cents)"""
+        return tuple(
+            value.value if isinstance(value, Money) else _date_key(value) if key == 'Date' else value
+            for key, value in ((key, fields[key]) for key in input_keys)
+        )
+
+    def match(self, final: Fields) -> Rule | None:
+        """Returns the rule matching the Final fields, or None if no rule matches"""
+        return self.exact.get(final.astuple())
+
+    def __len__(self) -> int:
+        return len(self.exact)
+
+
+def _date_key(text: str) -> int | str:
+    """Same key as a transaction's date, or the text itself if it isn't a date at all (so it can't match any transaction, same as before)"""
+    try:
+        return date_to_ordinal(text)
+    except ValueError:
+        return text
+
+
+rules_path = 'Rules.csv'
+pattern_rules_path = 'Pattern_Rules.csv'
+# Anything that changes how the CSVs turn into the compiled ruleset
+_code_paths = cache.module_files(['Categorize.main'])
+
+
+class Ruleset:
+    """Everything categorize needs, compiled from Rules.csv and Pattern_Rules.csv"""
+    index: RuleIndex
+    patterns: PatternMatcher
+
+    def __init__(self, index: RuleIndex, patterns: PatternMatcher) -> None:
+        self.index = index
+        self.patterns = patterns
+
+
+def parse_rules(path: str) -> list[Rule]:
+    with safe_open(path, 'r', errors='ignore') as f:
+        # Some lines have non-utf-8 bytes, which get dropped. Use find_non_utf8_lines to locate them
+        rules: list[Rule] = list(csv.DictReader(f)) # type: ignore
+    for rule in rules:
+        # Use Money objects
+        rule['Amount'] = Money.from_dollars(rule['Amount']) # type: ignore
+        # Enforce consistent category capitalization
+        rule['My Category'] = normalize(rule['My Category']) # type: ignore
+    return rules
+
+
+def find_non_utf8_lines(path: str) -> list[tuple[int, int]]:
+    """Returns (line number, byte offset of the line) for every line that isn't valid UTF-8"""
+    ret = []
+    offset = 0
+    with open(path, 'rb') as f:
+        for line_number, line in enumerate(f, start=1):
+            try:
+                line.decode('utf8')
+            except UnicodeDecodeError:
+                ret.append((line_number, offset))
+            offset += len(line)
+    return ret
+
+
+def build_ruleset() -> Ruleset:
+    for line_number, offset in find_non_utf8_lines(rules_path):
+        print(f"{rules_path} line {line_number} (byte offset {offset}) is not valid UTF-8, bad bytes are ignored")
+    return Ruleset(
+        index=RuleIndex(parse_rules(rules_path)),
+        patterns=PatternMatcher(load_pattern_rules(pattern_rules_path)),
+    )
+
+
+_ruleset: Ruleset | None = None
+def load_ruleset() -> Ruleset:
+    """Compiled ruleset, from memory, then the disk cache, then rebuilt from the CSVs"""
+    global _ruleset
+    if _ruleset is None:
+        key = cache.hash_files(rules_path, pattern_rules_path, *_code_paths)
+        _ruleset = cache.load_pickle('ruleset.pickle', key)
+        if _ruleset is None:
+            _ruleset = build_ruleset()
+            cache.dump_pickle('ruleset.pickle', key, _ruleset)
+    return _ruleset
+
+
+@instrument.stage('categorize')
+def categorize(data: list[Transaction], index: RuleIndex | None = None, patterns: PatternMatcher | None = None) -> list[Transaction]:
+    """Handle categorization logic
+    Exact rules win. Anything they don't match is tried against the pattern rules as one batch
+    Transactions are immutable, so each returned one shares the input's sections"""
+    if index is None:
+        index = load_ruleset().index
+    if patterns is None:
+        patterns = load_ruleset().patterns
+    instrument.count('exact rule lookups', len(data))
+
+    ret: list[Transaction] = []
+    unmatched: list[int] = []
+    "Positions in ret of the items no exact rule matched"
+    for item in data:
+        rule = index.match(item.final) # type: ignore
+        if rule is None:
+            unmatched.append(len(ret))
+            ret.append(item)
+            continue
+
+        item = item.replace(my_category=category_code(rule['My Category']), comment=rule['Comment']) # type: ignore
+
+        # FIXME this block is kind of hacky
+        e = _error_flag(item)
+        assert e == rule['E']
+        ret.append(item.replace(e=e))
+
+    if unmatched:
+        pattern_rules = patterns.match_all([ret[i].final.to_dict() for i in unmatched]) # type: ignore
+        for i, pattern_rule in zip(unmatched, pattern_rules):
+            item = ret[i]
+            if pattern_rule is None:
+                raise ValueError(f"No rule matched for:\n{item.final.to_dict()}") # type: ignore
+            # Pattern rules are generic, so only replace the comment if the rule has one
+            item = item.replace(
+                my_category=category_code(pattern_rule.my_category),
+                comment=pattern_rule.comment or item.comment,
+            )
+            ret[i] = item.replace(e=_error_flag(item))
     return ret
+
+
+def _error_flag(item: Transaction) -> str:
+    """'.' if the item has a real category, 'E' if not"""
+    e = '.' if item.my_category < len(categories) else 'E' # type: ignore
+    if e == 'E': print("FOUND ERROR ITEM:", item.to_item(), sep='\n')
+    return e
+
+
+if __name__ == "__main__":
+    bad_lines = find_non_utf8_lines(rules_path)
+    for line_number, offset in bad_lines:
+        print(f"Line {line_number} at byte offset {offset} is not valid UTF-8")
+    print(f"{len(bad_lines)} non-UTF-8 line(s) in {rules_path}")
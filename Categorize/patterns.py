@@ -0,0 +1,203 @@
+"""
+Generalized (pattern-based) categorization rules
+
+Exact rules in Rules.csv need one row per transaction. Pattern rules match on the
+Original Description instead (substring, prefix, or regex), optionally limited to an
+amount range and/or a date window. The literal patterns are compiled into one automaton so that
+a batch of transactions is categorized in a single pass over the text.
+"""
+
+# General imports
+from bisect import bisect_right
+from collections import deque
+from dataclasses import dataclass
+import csv
+import datetime
+import os
+import re
+from typing import Iterator, Literal
+
+# Project imports
+from BaseLib import instrument
+from BaseLib.CategoryList import normalize
+from BaseLib.money import Money
+from BaseLib.utils import safe_open, parse_date
+
+# Typing
+Kind = Literal['substring', 'prefix', 'regex']
+kinds: tuple[Kind, ...] = ('substring', 'prefix', 'regex')
+
+# Separates texts when a batch is searched in one pass. Patterns can't contain it
+_separator = '\n'
+
+
+@dataclass
+class PatternRule:
+    kind: Kind
+    pattern: str
+    "Matched against Original Description, case-insensitive"
+    my_category: str
+    comment: str = ''
+    min_amount: Money | None = None
+    max_amount: Money | None = None
+    start: datetime.date | None = None
+    end: datetime.date | None = None
+
+    def accepts(self, final: dict) -> bool:
+        """Checks the amount range and date window (the pattern itself is checked by the matcher)"""
+        amount = final['Amount']
+        if self.min_amount is not None and amount < self.min_amount: return False
+        if self.max_amount is not None and amount > self.max_amount: return False
+        if self.start is not None or self.end is not None:
+            date = parse_date(final['Date'])
+            if self.start is not None and date < self.start: return False
+            if self.end is not None and date > self.end: return False
+        return True
+
+
+class AhoCorasick:
+    """Finds every occurrence of every pattern in a text in one pass over the text"""
+    goto: list[dict[str, int]]
+    "Trie transitions for each node"
+    fail: list[int]
+    "Longest proper suffix of each node that is also a trie node"
+    out: list[list[int]]
+    "Pattern ids that end at each node (including via fail links)"
+    lengths: list[int]
+    "Length of each pattern"
+
+    def __init__(self, patterns: list[str]) -> None:
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        self.lengths = [len(p) for p in patterns]
+
+        # Build the trie
+        for pid, pattern in enumerate(patterns):
+            node = 0
+            for char in pattern:
+                nxt = self.goto[node].get(char)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][char] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                node = nxt
+            self.out[node].append(pid)
+
+        # Breadth-first to set fail links (parents are always done before children)
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                f = self.fail[node]
+                while f and char not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[child] = self.goto[f].get(char, 0)
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    def search(self, text: str) -> Iterator[tuple[int, int]]:
+        """Yields (pattern id, start index) for every match"""
+        goto, fail, out, lengths = self.goto, self.fail, self.out, self.lengths
+        node = 0
+        for i, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for pid in out[node]:
+                yield pid, i - lengths[pid] + 1
+
+
+class PatternMatcher:
+    """All literal pattern rules compiled into one automaton, plus each regex rule compiled on its own"""
+    rules: list[PatternRule]
+    "In priority order (earlier rules win)"
+
+    def __init__(self, rules: list[PatternRule]) -> None:
+        self.rules = rules
+
+        # Substring and prefix rules go in the automaton
+        self._literal_ids = [i for i, r in enumerate(rules) if r.kind != 'regex']
+        for i in self._literal_ids:
+            assert _separator not in rules[i].pattern, f"Pattern can't contain a newline: {rules[i]}"
+        self._automaton = AhoCorasick([rules[i].pattern.casefold() for i in self._literal_ids])
+
+        # Regex rules stay separate, since combining them would break their own named groups and backreferences
+        self._regexes = [(i, re.compile(r.pattern, re.IGNORECASE)) for i, r in enumerate(rules) if r.kind == 'regex']
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def _regex_candidates(self, text: str) -> set[int]:
+        return {i for i, regex in self._regexes if regex.search(text)}
+
+    def candidates_all(self, texts: list[str]) -> list[set[int]]:
+        """Rule ids whose pattern matches each text. Literal patterns are found in one pass over all texts"""
+        ret: list[set[int]] = [set() for _ in texts]
+        if not texts: return ret
+
+        # Concatenate so the automaton only walks the input once
+        # Casefold each text first, since casefolding can change the length (ex. 'ẞ' -> 'ss') and so the offsets
+        folded = [text.casefold() for text in texts]
+        offsets = []
+        position = 0
+        for text in folded:
+            offsets.append(position)
+            position += len(text) + len(_separator)
+        joined = _separator.join(folded)
+        for pid, start in self._automaton.search(joined):
+            t = bisect_right(offsets, start) - 1
+            rule_id = self._literal_ids[pid]
+            if self.rules[rule_id].kind == 'prefix' and start != offsets[t]: continue
+            ret[t].add(rule_id)
+
+        for t, text in enumerate(texts):
+            ret[t] |= self._regex_candidates(text)
+        return ret
+
+    def match_all(self, finals: list[dict]) -> list[PatternRule | None]:
+        """Highest-priority matching rule for each set of Final fields, or None"""
+        ret: list[PatternRule | None] = []
+        candidates = self.candidates_all([final['Original Description'] for final in finals])
+        tried = 0
+        for final, rule_ids in zip(finals, candidates):
+            for rule_id in sorted(rule_ids):
+                tried += 1
+                if self.rules[rule_id].accepts(final):
+                    ret.append(self.rules[rule_id])
+                    break
+            else:
+                ret.append(None)
+        instrument.count('pattern rules tried', tried)
+        return ret
+
+    def match(self, final: dict) -> PatternRule | None:
+        return self.match_all([final])[0]
+
+
+def load_pattern_rules(path: str) -> list[PatternRule]:
+    """Reads pattern rules from a CSV (missing file means no pattern rules)"""
+    if not os.path.exists(path):
+        return []
+    with safe_open(path, 'r') as f:
+        rows = list(csv.DictReader(f))
+
+    rules = []
+    for row in rows:
+        kind = row['Kind'].lower()
+        if kind not in kinds:
+            raise ValueError(f"Unknown pattern rule kind: {row['Kind']}")
+        rules.append(PatternRule(
+            kind=kind, # type: ignore
+            pattern=row['Pattern'],
+            # Enforce consistent category capitalization
+            my_category=normalize(row['My Category']),
+            comment=row['Comment'],
+            min_amount=Money.from_dollars(row['Min Amount']) if row['Min Amount'] else None,
+            max_amount=Money.from_dollars(row['Max Amount']) if row['Max Amount'] else None,
+            start=parse_date(row['Start Date']) if row['Start Date'] else None,
+            end=parse_date(row['End Date']) if row['End Date'] else None,
+        ))
+    return rules
@@ -1,3 +1,7 @@
+_fingerprint_dir = 'excel_fingerprints'
+"Cache directory recording what each JSON was converted from (one file per JSON, so converters can run in parallel)"
+
+
 def is_json_stale(script_path: str, json_path: str, tag: str = ''):
     """Returns True if the JSON is older than the Excel file or conversion script, False if it's newer"""
     import datetime
@@ -20,3 +24,105 @@ def is_json_stale(script_path: str, json_path: str, tag: str = ''):
     else:
         print(f"{tag.capitalize()} JSON from {datetime.datetime.fromtimestamp(json_mtime).strftime("%D %H:%M:%S")} is up to date.")
         return False
+
+
+_workbook_fingerprints: dict[tuple, dict[str, str]] = {}
+"(path, mtime, size) -> fingerprint of every sheet, so checking several JSONs only reads the workbook once"
+
+
+def sheet_fingerprint(sheet_name: str) -> str:
+    """Content hash of one sheet (see OpenExcel.xlsx.sheet_fingerprints), computed for the whole workbook at once"""
+    import os
+    from Loading.OpenExcel import excel_path
+    from Loading.OpenExcel.xlsx import sheet_fingerprints
+    stat = os.stat(excel_path)
+    key = (os.path.abspath(excel_path), stat.st_mtime_ns, stat.st_size)
+    if key not in _workbook_fingerprints:
+        # Only the current version of the workbook is worth keeping
+        _workbook_fingerprints.clear()
+        _workbook_fingerprints[key] = sheet_fingerprints(excel_path)
+    return _workbook_fingerprints[key][sheet_name]
+
+
+def current_fingerprint(sheet_name: str, script_path: str) -> dict[str, str]:
+    """Content hashes of the sheet and the conversion script"""
+    from BaseLib.cache import hash_files
+    return {
+        'sheet': sheet_fingerprint(sheet_name),
+        'script': hash_files(script_path),
+    }
+
+
+def _modification_times(script_path: str) -> dict[str, float]:
+    """Of the Excel file and the conversion script, for telling whether they were touched since they were last checked"""
+    import os
+    from Loading.OpenExcel import excel_path
+    return {'excel': os.path.getmtime(excel_path), 'script': os.path.getmtime(script_path)}
+
+
+def _fingerprint_path(json_path: str) -> str:
+    import os
+    from BaseLib.cache import cache_path
+    return cache_path(os.path.join(_fingerprint_dir, os.path.basename(json_path)))
+
+
+def previous_conversion(json_path: str) -> dict | None:
+    """What was recorded when the JSON was last converted, or None if nothing was"""
+    import json
+    try:
+        with open(_fingerprint_path(json_path), 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_conversion(json_path: str, record: dict):
+    import json
+    import os
+    path = _fingerprint_path(json_path)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(record, f, indent=2)
+    os.replace(tmp, path)
+
+
+def record_conversion(sheet_name: str, script_path: str, json_path: str, **extra):
+    """Records the fingerprints the JSON was converted from (plus any extra converter-specific info)"""
+    _write_conversion(json_path, {
+        **current_fingerprint(sheet_name, script_path),
+        'checked': _modification_times(script_path),
+        **extra,
+    })
+
+
+def is_sheet_stale(sheet_name: str, script_path: str, json_path: str, tag: str = ''):
+    """
+    Returns True if the sheet or conversion script changed since the JSON was converted
+    Modification times are checked first, and content fingerprints only if those say the JSON is behind,
+    so that editing one tab doesn't reconvert every other tab
+    """
+    import os
+    from BaseLib.logger import delegate_print as print
+
+    if not os.path.exists(json_path):
+        print(f"{tag.capitalize()} JSON doesn't exist.")
+        return True
+    previous = previous_conversion(json_path)
+    checked = _modification_times(script_path)
+    if previous is not None and previous.get('checked') == checked:
+        print(f"{tag.capitalize()} JSON was already checked against this version of the workbook and script, so is still up to date.")
+        return False
+    if not is_json_stale(script_path=script_path, json_path=json_path, tag=tag):
+        return False
+
+    if previous is None:
+        return True
+    current = current_fingerprint(sheet_name, script_path)
+    if previous['sheet'] != current['sheet'] or previous['script'] != current['script']:
+        return True
+
+    print(f"{tag.capitalize()} JSON matches sheet \"{sheet_name}\" and script contents, so is still up to date.")
+    # Remember which modification times were checked so the cheap check passes next time,
+    # rather than touching the JSON (which is tracked)
+    _write_conversion(json_path, {**previous, 'checked': checked})
+    return False
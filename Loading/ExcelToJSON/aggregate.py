@@ -1,12 +1,14 @@
 # General imports
 
 # Project imports
+from BaseLib import instrument
 from BaseLib.CategoryList import categories
 from BaseLib.money import Money
-from BaseLib.utils import format_cell_value, json_dump
+from BaseLib.utils import format_cell_value, json_dump, parse_date
 from Loading.OpenExcel import aggregate_sheets as sheets
 # from Loading import aggregate_data_paths as data_paths # Note: no user input for aggregate
 from Loading import aggregate_validation_paths as validation_paths
+from Loading.ExcelToJSON import is_sheet_stale, record_conversion
 
 # Logging
 from BaseLib.logger import delegate_print as print
@@ -15,18 +17,17 @@ from BaseLib.logger import delegate_print as print
 Item = dict[str, dict[str, str | Money]]
 Category = str
 
-# Necessary information
-log_starts = {'2023': '9/1/2023', '2024': '1/1/2024'}
-
 
+@instrument.stage('excel aggregate')
 def process_year(year: str):
     sheet = sheets[year]
-    # Cell C1, the first month of the logged period
-    log_start = log_starts[year]
     # Do some manipulating so it looks like the CSV version
     raw_lines = [[format_cell_value(value) for value in row] for row in sheet.values]
     
     # First line is meta-header
+    # Cell C1, the first month of the logged period
+    log_start = raw_lines[0][2]
+    parse_date(log_start)
     meta_header = ['Log Start', '', log_start]
     meta_header += [''] * (len(raw_lines[0]) - len(meta_header))
     assert raw_lines[0] == meta_header
@@ -56,6 +57,7 @@ def process_year(year: str):
     # Save to file
     print("<No user input for Aggregate>")
     save_to_file("validation", validation, validation_paths[year])
+    record_conversion(sheet.name, __file__, validation_paths[year])
 
 
 def handle_data(tag: str, raw_lines: list, validation: bool):
@@ -83,19 +85,22 @@ def save_to_file(tag: str, contents, outfile):
     print(f"{tag.capitalize()} export complete")
     
 
+def is_stale(year: str) -> bool:
+    # data_stale = is_sheet_stale(...) # Note: no user input for aggregate
+    val_stale = is_sheet_stale(
+        tag=f"{year} Aggregate validation",
+        sheet_name=sheets[year].name,
+        script_path=__file__,
+        json_path=validation_paths[year]
+    )
+    return val_stale
+
+
 # Call it this instead of "main" to make imports easier
-def xls_to_json():
-    from Loading import years
-    from Loading.ExcelToJSON import is_json_stale
-    for year in years:
-        # data_stale = is_json_stale(...) # Note: no user input for aggregate
-        val_stale = is_json_stale(
-            tag=f"{year} Aggregate validation",
-            script_path=__file__,
-            json_path=validation_paths[year]
-        )
-        if val_stale:
-            process_year(year)
+def xls_to_json(workers: int | None = None):
+    """Converts every stale year, in parallel if there's more than one (see parallel.run_jobs, which also does every sheet type at once)"""
+    from Loading.ExcelToJSON.parallel import run_jobs, stale_jobs
+    run_jobs(stale_jobs(('aggregate',)), workers)
 
 
 if __name__ == "__main__":
@@ -2,12 +2,15 @@
 from typing import Literal
 
 # Project imports
+from BaseLib import instrument
 from BaseLib.CategoryList import categories
 from BaseLib.money import Money
 from BaseLib.utils import format_cell_value, json_dump
 from Loading.OpenExcel import buckets_sheet as sheet
 from Loading import buckets_data_path as data_path
 from Loading import buckets_validation_path as validation_path
+from Loading import categories_path
+from Loading.ExcelToJSON import is_sheet_stale, record_conversion
 from Validation.Buckets import Types
 
 # Logging
@@ -64,6 +67,7 @@ def make_ChangeSet(data_cols: list[tuple[str, ...]]) -> Types.ChangeSet:
     return ret
 
 
+@instrument.stage('excel buckets')
 def process():
     # Do some manipulating so it looks like the CSV version
     raw_rows = [[format_cell_value(value) for value in row] for row in sheet.values]
@@ -72,7 +76,7 @@ def process():
     c = 0
     try:
         # Categories are in the first few columns
-        c = handle_categories(raw_columns, c)
+        c, hierarchy = handle_categories(raw_columns, c)
 
         # Blank column
         c = assert_blank(raw_columns, c)
@@ -105,10 +109,16 @@ def process():
     # Save to file
     save_to_file(data, data_path)
     save_to_file(validation, validation_path)
+    save_to_file(hierarchy, categories_path)
+    for path in (data_path, validation_path, categories_path):
+        record_conversion(sheet.name, __file__, path)
 
 
-def handle_categories(raw_columns, c):
-    """Does not return the category list, because it should match CategoryList.categories"""
+def handle_categories(raw_columns, c) -> tuple[int, list[dict[str, str]]]:
+    """
+    Returns the Dir, Broad, Specific, and Key of each category (see CategoryList.Hierarchy)
+    Does not return the category list itself, because it should match CategoryList.categories
+    """
     columns = raw_columns[c:c+4]
     rows = list(zip(*columns))
     c += 4
@@ -120,14 +130,21 @@ def handle_categories(raw_columns, c):
     header = ('Dir', 'Broad', 'Specific', 'Key')
     assert rows[2] == header
 
-    # TODO handle Dir, Broad, and Specific columns, not just Key (category)
-
     # Fourth column, starting in the fourth row, is categories
     # Ensure that content AND order match
-    excel_categories = [cat for cat in columns[3][3:] if cat != '']
+    category_rows = [row for row in rows[3:] if row[3] != '']
+    excel_categories = [row[3] for row in category_rows]
     assert excel_categories == categories
 
-    return c
+    # Dir is only filled in on the first row of each group
+    hierarchy = []
+    current_dir = ''
+    for row in category_rows:
+        current_dir = row[0] or current_dir
+        assert current_dir and row[1] and row[2], f"Incomplete hierarchy for {row[3]}"
+        hierarchy.append(dict(zip(header, (current_dir, *row[1:]))))
+
+    return c, hierarchy
 
 
 def handle_initial(raw_columns: list[tuple[str, str, str]], c: int) -> tuple[int, Types.ValueCapacityCritical]:
@@ -334,26 +351,37 @@ def handle_transition(columns: list[tuple[str, ...]]) -> Types.TransitionFull:
     return ret
 
 
-def save_to_file(contents: Types.BucketsInput | Types.BucketsFull, outfile):
-    json_dump(outfile, contents.asdict(), 2)
+def save_to_file(contents: Types.BucketsInput | Types.BucketsFull | list[dict[str, str]], outfile):
+    json_dump(outfile, contents if isinstance(contents, list) else contents.asdict(), 2)
     print("Export complete")
 
 
-# Call it this instead of "main" to make imports easier
-def xls_to_json():
-    from Loading.ExcelToJSON import is_json_stale
+def is_stale() -> bool:
     # Check both to avoid confusing printouts
-    data_stale = is_json_stale(
+    data_stale = is_sheet_stale(
         tag="Buckets input",
+        sheet_name=sheet.name,
         script_path=__file__,
         json_path=data_path
     )
-    val_stale = is_json_stale(
+    val_stale = is_sheet_stale(
         tag="Buckets validation",
+        sheet_name=sheet.name,
         script_path=__file__,
         json_path=validation_path
     )
-    if data_stale or val_stale:
+    categories_stale = is_sheet_stale(
+        tag="Category hierarchy",
+        sheet_name=sheet.name,
+        script_path=__file__,
+        json_path=categories_path
+    )
+    return data_stale or val_stale or categories_stale
+
+
+# Call it this instead of "main" to make imports easier
+def xls_to_json():
+    if is_stale():
         process()
 
 if __name__ == "__main__":
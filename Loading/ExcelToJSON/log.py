@@ -1,12 +1,17 @@
 # General imports
 
 # Project imports
-from BaseLib.CategoryList import categories
+from BaseLib import instrument
+from BaseLib.CategoryList import normalize
 from BaseLib.money import Money
-from BaseLib.utils import format_cell_value, json_dump
+from BaseLib.cache import hash_bytes, hash_files
+from BaseLib.columnar import source_stamp, write_records
+from BaseLib.utils import format_cell_value, json_dump, json_load
 from Loading.OpenExcel import log_sheets as sheets
 from Loading import log_data_paths as data_paths
+from Loading import log_binary_paths as binary_paths
 from Loading import log_validation_paths as validation_paths
+from Loading.ExcelToJSON import is_sheet_stale, previous_conversion, record_conversion
 
 # Logging
 from BaseLib.logger import delegate_print as print
@@ -15,11 +20,14 @@ from BaseLib.logger import delegate_print as print
 Item = dict[str, dict[str, str | Money | None]]
 
 
+@instrument.stage('excel log')
 def process_year(year: str):
     sheet = sheets[year]
+    rows = list(sheet.values)
 
     # Do some manipulating so it looks like the CSV version
-    raw_lines = [[format_cell_value(value) for value in row] for row in sheet.values]
+    # (only the headers for now, and the data lines once it's known which ones need parsing)
+    header_lines = format_lines(rows[:2])
 
     # First line is meta-header
     meta_header = (
@@ -29,7 +37,7 @@ def process_year(year: str):
         ['Final - Values with overrides, to be used for calculation'] + ['']*5 +
         ['My Category', 'E', 'Comment']
     )
-    assert raw_lines[0] == meta_header
+    assert header_lines[0] == meta_header
     print("Meta-header as-expected")
 
     # Second line is section headers
@@ -41,22 +49,80 @@ def process_year(year: str):
         section_header_template +
         ['My Category', 'E', 'Comment']
     )
-    assert raw_lines[1] == section_headers
+    assert header_lines[1] == section_headers
     print("Section headers as-expected")
 
     # Remaining lines are data
-    data = handle_data("user input", raw_lines, section_header_template, is_validation=False)
-    validation = handle_data("validation", raw_lines, section_header_template, is_validation=True)
+    data_rows = rows[2:]
+    row_bytes = [repr(row).encode('utf8') for row in data_rows]
+    reusable = find_reusable_rows(year, row_bytes)
+    if reusable is None:
+        data_lines = format_lines(data_rows)
+        data = handle_data("user input", data_lines, section_header_template, is_validation=False)
+        validation = handle_data("validation", data_lines, section_header_template, is_validation=True)
+    else:
+        # Only format and parse the new lines, and keep the previous conversion for the rest
+        new_head, new_tail = reusable
+        head = format_lines(data_rows[:new_head])
+        tail = format_lines(data_rows[len(data_rows) - new_tail:])
+        print(f"Reusing {len(data_rows) - new_head - new_tail} previously converted lines, parsing {new_head + new_tail} new")
+        data = (
+            handle_data("new user input", head, section_header_template, is_validation=False)
+            + json_load(data_paths[year])
+            + handle_data("new user input", tail, section_header_template, is_validation=False)
+        )
+        validation = (
+            handle_data("new validation", head, section_header_template, is_validation=True)
+            + json_load(validation_paths[year])
+            + handle_data("new validation", tail, section_header_template, is_validation=True)
+        )
 
     # Save to file
     save_to_file("user input", data, data_paths[year])
     save_to_file("validation", validation, validation_paths[year])
-
-
-def handle_data(tag: str, raw_lines: list, section_header_template, is_validation: bool):
+    # Binary copy of the user input, for the pipeline (the JSON is kept for diffing)
+    write_records(binary_paths[year], data, {'source': source_stamp(data_paths[year])})
+    rows_info = {'rows': len(data_rows), 'rows_hash': hash_bytes(*row_bytes)}
+    for path in (data_paths[year], validation_paths[year]):
+        record_conversion(sheets[year].name, __file__, path, **rows_info)
+
+
+def format_lines(rows: list[tuple]) -> list[list[str]]:
+    return [[format_cell_value(value) for value in row] for row in rows]
+
+
+def find_reusable_rows(year: str, row_bytes: list[bytes]) -> tuple[int, int] | None:
+    """
+    Append-only fast path: if the previously converted rows are still there unchanged
+    (with new rows only added before and/or after them), returns how many new rows are at the (start, end)
+    Otherwise returns None, and everything needs to be converted
+    Rows are compared by the repr of their raw cell values, so nothing needs formatting to check
+    """
+    script_hash = hash_files(__file__)
+    previous = [previous_conversion(path) for path in (data_paths[year], validation_paths[year])]
+    if any(p is None or 'rows' not in p or p['script'] != script_hash for p in previous):
+        return None
+    if previous[0]['rows_hash'] != previous[1]['rows_hash']: # type: ignore
+        return None
+    count: int = previous[0]['rows'] # type: ignore
+    rows_hash: str = previous[0]['rows_hash'] # type: ignore
+    if count > len(row_bytes):
+        return None
+
+    new = len(row_bytes) - count
+    # Added at the end
+    if hash_bytes(*row_bytes[:count]) == rows_hash:
+        return 0, new
+    # Added at the start (the Log is newest-first)
+    if hash_bytes(*row_bytes[new:]) == rows_hash:
+        return new, 0
+    return None
+
+
+def handle_data(tag: str, data_lines: list, section_header_template, is_validation: bool):
     # Note: including empty Overrides/Comments
     data = []
-    for raw_line in raw_lines[2:]:
+    for raw_line in data_lines:
         item: Item = {}
         item['Imported'] = {k:v for k,v in zip(section_header_template, raw_line[0:])}
         item['Account'] = {'Account': raw_line[6]}
@@ -88,11 +154,8 @@ def handle_data(tag: str, raw_lines: list, section_header_template, is_validatio
         if is_validation:
             category = item['My Category']['My Category']
             assert isinstance(category, str)
-            for cat in categories:
-                if category.lower() == cat.lower() and category != cat:
-                    # Same category, just wrong capitalization
-                    item['My Category']['My Category'] = cat
-                    break
+            # Same category, just wrong capitalization
+            item['My Category']['My Category'] = normalize(category)
         
         data.append(item)
     print(f"{tag.capitalize()} parsing complete")
@@ -104,24 +167,28 @@ def save_to_file(tag: str, contents, outfile):
     print(f"{tag.capitalize()} export complete")
 
 
+def is_stale(year: str) -> bool:
+    # Check both to avoid confusing printouts
+    data_stale = is_sheet_stale(
+        tag=f"{year} Log input",
+        sheet_name=sheets[year].name,
+        script_path=__file__,
+        json_path=data_paths[year]
+    )
+    val_stale = is_sheet_stale(
+        tag=f"{year} Log validation",
+        sheet_name=sheets[year].name,
+        script_path=__file__,
+        json_path=validation_paths[year]
+    )
+    return data_stale or val_stale
+
+
 # Call it this instead of "main" to make imports easier
-def xls_to_json():
-    from Loading import years
-    from Loading.ExcelToJSON import is_json_stale
-    for year in years:
-        # Check both to avoid confusing printouts
-        data_stale = is_json_stale(
-            tag=f"{year} Log input",
-            script_path=__file__,
-            json_path=data_paths[year]
-        )
-        val_stale = is_json_stale(
-            tag=f"{year} Log validation",
-            script_path=__file__,
-            json_path=validation_paths[year]
-        )
-        if data_stale or val_stale:
-            process_year(year)
+def xls_to_json(workers: int | None = None):
+    """Converts every stale year, in parallel if there's more than one (see parallel.run_jobs, which also does every sheet type at once)"""
+    from Loading.ExcelToJSON.parallel import run_jobs, stale_jobs
+    run_jobs(stale_jobs(('log',)), workers)
 
 
 if __name__ == "__main__":
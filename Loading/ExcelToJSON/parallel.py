@@ -0,0 +1,95 @@
+"""
+Converts every stale sheet at once, fanning out one job per (sheet, year) to a process pool
+Each worker opens the workbook itself. Output is captured per job and logged in job order,
+so it's the same no matter which job finishes first. Instrument counters recorded in the workers are added to this process's
+"""
+
+# General imports
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import importlib
+import os
+
+# Project imports
+from BaseLib import instrument, logger
+
+# Typing
+Job = tuple[str, str | None]
+"(converter module, year), year is None for Buckets"
+
+
+def default_workers() -> int:
+    """BUDGET_WORKERS environment variable, or one per core"""
+    return int(os.environ.get('BUDGET_WORKERS', 0)) or os.cpu_count() or 1
+
+
+def _converter(module_name: str):
+    return importlib.import_module(f'Loading.ExcelToJSON.{module_name}')
+
+
+def stale_jobs(module_names: tuple[str, ...] = ('log', 'aggregate', 'buckets')) -> list[Job]:
+    """Runs the (cheap) staleness checks of the given converters, in this process"""
+    jobs: list[Job] = []
+    for module_name in module_names:
+        module = _converter(module_name)
+        if module_name == 'buckets':
+            if module.is_stale():
+                jobs.append((module_name, None))
+        else:
+            jobs.extend((module_name, year) for year in module.sheets if module.is_stale(year))
+    return jobs
+
+
+def _convert(job: Job) -> None:
+    module_name, year = job
+    module = _converter(module_name)
+    if year is None:
+        module.process()
+    else:
+        module.process_year(year)
+
+
+def run_job(job: Job, log_level: int, profile: bool) -> tuple[list[str], dict | None]:
+    """Runs one conversion in a worker, and returns everything it logged and what instrument recorded (if profiling)"""
+    logger.set_level(log_level)
+    if profile:
+        instrument.enable()
+    instrument.reset()
+    with logger.capture() as lines:
+        try:
+            _convert(job)
+        except Exception as e:
+            output = '\n'.join(lines)
+            raise RuntimeError(f"Converting {job} failed. Output:\n{output}") from e
+    return lines, instrument.report() if profile else None
+
+
+def run_jobs(jobs: list[Job], workers: int | None = None) -> None:
+    """Runs the conversions, in a pool of up to workers processes (default: BUDGET_WORKERS or one per core) if there's more than one"""
+    if len(jobs) <= 1 or (workers is not None and workers <= 1):
+        # Not worth starting processes
+        for job in jobs:
+            _convert(job)
+        return
+
+    workers = min(workers or default_workers(), len(jobs))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_job, job, logger.level, instrument.enabled) for job in jobs]
+        for future in futures:
+            lines, recorded = future.result()
+            logger.forward(lines)
+            if recorded is not None:
+                instrument.merge(recorded)
+
+
+# Call it this instead of "main" to make imports easier
+def xls_to_json(workers: int | None = None):
+    """Converts every stale sheet of every type, all in one pool"""
+    run_jobs(stale_jobs(), workers)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert all stale Excel sheets to JSON in parallel")
+    parser.add_argument('--workers', type=int, default=None, help="Number of worker processes (default: BUDGET_WORKERS or one per core)")
+    args = parser.parse_args()
+    xls_to_json(args.workers)
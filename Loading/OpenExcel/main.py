@@ -1,24 +1,135 @@
 # General imports
-import openpyxl
-from openpyxl.worksheet._read_only import ReadOnlyWorksheet
+import os
+import re
+import xml.etree.ElementTree as ET
+import zipfile
+from typing import TYPE_CHECKING, Iterator
+
+if TYPE_CHECKING:
+    from openpyxl.workbook.workbook import Workbook
+    from openpyxl.worksheet._read_only import ReadOnlyWorksheet
 
 # Project imports
+from .xlsx import XlsxReader, sheet_names
 
 """
 Opens all the necessary Excel files with openpyxl
 Makes the path(s) available for stale-checks
 
 So mostly this file exists to track file paths and sheet names
+The years come from the sheet names ("Log 2024", "Aggregate 2024"), which are read straight from the zip.
+Nothing else is opened until a sheet is actually read, so importing this (e.g. just for excel_path) is cheap
+Sheets are streamed straight from the zip (see xlsx.XlsxReader), falling back to openpyxl if that can't read the file.
+Set BUDGET_XLSX_READER=openpyxl to always use openpyxl
 """
 
+use_openpyxl = os.environ.get('BUDGET_XLSX_READER', '').lower() == 'openpyxl'
+
+
+class LazyWorkbook:
+    """Opens the workbook on first use, and re-opens it if the file has changed since"""
+    path: str
+    _workbook: 'Workbook | None'
+    _mtime: float | None
+    "Modification time of the file when it was opened"
+    _reader: XlsxReader | None
+    _reader_mtime: float | None
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._workbook = None
+        self._mtime = None
+        self._reader = None
+        self._reader_mtime = None
+
+    def workbook(self) -> 'Workbook':
+        mtime = os.path.getmtime(self.path)
+        if self._workbook is None or mtime != self._mtime:
+            import openpyxl
+            from BaseLib import instrument
+            self.close()
+            with instrument.timed('openpyxl load'):
+                self._workbook = openpyxl.load_workbook(filename=self.path, read_only=True, data_only=True)
+            self._mtime = mtime
+        return self._workbook
+
+    def reader(self) -> XlsxReader:
+        mtime = os.path.getmtime(self.path)
+        if self._reader is None or mtime != self._reader_mtime:
+            from BaseLib import instrument
+            with instrument.timed('xlsx reader load'):
+                self._reader = XlsxReader(self.path)
+            self._reader_mtime = mtime
+        return self._reader
+
+    def sheet(self, name: str) -> 'ReadOnlyWorksheet':
+        from openpyxl.worksheet._read_only import ReadOnlyWorksheet
+        sheet = self.workbook()[name]
+        # Type checking, just to be sure
+        assert isinstance(sheet, ReadOnlyWorksheet), type(sheet)
+        return sheet
+
+    @property
+    def sheetnames(self) -> list[str]:
+        return self.workbook().sheetnames
+
+    def close(self) -> None:
+        if self._workbook is not None:
+            self._workbook.close()
+            self._workbook = None
+        self._reader = None
+
+
+class LazySheet:
+    """Stands in for a worksheet, which is only resolved when its rows are read"""
+    workbook: LazyWorkbook
+    name: str
+
+    def __init__(self, workbook: LazyWorkbook, name: str) -> None:
+        self.workbook = workbook
+        self.name = name
+
+    def iter_rows(self) -> Iterator[tuple]:
+        """Streams the cell values, one tuple per row"""
+        if not use_openpyxl:
+            try:
+                rows = self.workbook.reader().values(self.name)
+                # Problems opening the file or finding the sheet show up before the first row
+                first = next(rows, None)
+            except (KeyError, ValueError, zipfile.BadZipFile, ET.ParseError):
+                pass
+            else:
+                if first is not None:
+                    yield first
+                    yield from rows
+                return
+        yield from self.workbook.sheet(self.name).values
+
+    @property
+    def values(self) -> Iterator[tuple]:
+        """Same as openpyxl's Worksheet.values"""
+        return self.iter_rows()
+
+    def __repr__(self) -> str:
+        return f"<LazySheet {self.name!r} of {self.workbook.path!r}>"
+
+
+def sheet_years(names: list[str], prefix: str) -> list[str]:
+    """Sorted years of the sheets named like "<prefix> <year>" (ex. "Log 2024")"""
+    return sorted(name[len(prefix) + 1:] for name in names if re.fullmatch(rf'{re.escape(prefix)} \d{{4}}', name))
+
+
 # Loading
 excel_path = 'Budget_Buckets.xlsm'
-years = ['2023', '2024']
-wb = openpyxl.load_workbook(filename=excel_path, read_only=True, data_only=True)
-logs: dict[str, ReadOnlyWorksheet] = {year:wb[f"Log {year}"] for year in years}
-aggregates: dict[str, ReadOnlyWorksheet] = {year:wb[f"Aggregate {year}"] for year in years}
-buckets: ReadOnlyWorksheet = wb["Buckets"]
-
-# Type checking, just to be sure
-for sheet in list(logs.values()) + list(aggregates.values()) + [buckets]:
-    assert isinstance(sheet, ReadOnlyWorksheet), type(sheet)
+try:
+    _sheet_names = sheet_names(excel_path)
+except FileNotFoundError:
+    # Can still work from the JSON alone
+    _sheet_names = []
+workbook = LazyWorkbook(excel_path)
+logs: dict[str, LazySheet] = {year:LazySheet(workbook, f"Log {year}") for year in sheet_years(_sheet_names, 'Log')}
+aggregates: dict[str, LazySheet] = {year:LazySheet(workbook, f"Aggregate {year}") for year in sheet_years(_sheet_names, 'Aggregate')}
+log_years = sorted(logs)
+aggregate_years = sorted(aggregates)
+years = sorted(logs.keys() | aggregates.keys())
+buckets: LazySheet = LazySheet(workbook, "Buckets")
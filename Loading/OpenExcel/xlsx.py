@@ -0,0 +1,427 @@
+"""
+Direct access to the parts inside an .xlsx/.xlsm file (which is a zip of XML files)
+Used where openpyxl would be overkill, e.g. fingerprinting a sheet without parsing it,
+or streaming a sheet's values (XlsxReader)
+"""
+
+# General imports
+import datetime
+import hashlib
+import posixpath
+import re
+import xml.etree.ElementTree as ET
+import zipfile
+from typing import Iterator
+
+
+def _local(tag: str) -> str:
+    """Tag or attribute name without its namespace"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _resolve(base_part: str, target: str) -> str:
+    """Resolves a relationship target relative to the part that owns the relationship"""
+    if target.startswith('/'):
+        return target[1:]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base_part), target))
+
+
+def _relationships(archive: zipfile.ZipFile, part: str) -> dict[str, tuple[str, str]]:
+    """Relationship id -> (type, resolved target) for a part"""
+    rels_part = posixpath.join(posixpath.dirname(part), '_rels', posixpath.basename(part) + '.rels')
+    try:
+        root = ET.fromstring(archive.read(rels_part))
+    except KeyError:
+        return {}
+    return {
+        rel.get('Id', ''): (rel.get('Type', ''), _resolve(part, rel.get('Target', '')))
+        for rel in root if _local(rel.tag) == 'Relationship'
+    }
+
+
+def workbook_part(archive: zipfile.ZipFile) -> str:
+    for rel_type, target in _relationships(archive, '').values():
+        if rel_type.endswith('/officeDocument'):
+            return target
+    return 'xl/workbook.xml'
+
+
+def sheet_parts(archive: zipfile.ZipFile) -> dict[str, str]:
+    """Sheet name -> path of its XML part, in workbook order"""
+    book = workbook_part(archive)
+    rels = _relationships(archive, book)
+    root = ET.fromstring(archive.read(book))
+    ret = {}
+    for element in root.iter():
+        if _local(element.tag) != 'sheet': continue
+        rid = next(v for k, v in element.attrib.items() if _local(k) == 'id')
+        ret[element.get('name', '')] = rels[rid][1]
+    return ret
+
+
+def shared_strings_part(archive: zipfile.ZipFile) -> str | None:
+    for rel_type, target in _relationships(archive, workbook_part(archive)).values():
+        if rel_type.endswith('/sharedStrings'):
+            return target
+    return None
+
+
+def sheet_names(path: str) -> list[str]:
+    """Sheet names in workbook order, without opening the workbook in openpyxl"""
+    with zipfile.ZipFile(path) as archive:
+        return list(sheet_parts(archive))
+
+
+# Raw (unparsed) shared string entries, and references to them from cells
+_si_pattern = re.compile(rb'<si\b[^>]*?(?:/>|>.*?</si>)', re.DOTALL)
+_shared_ref_pattern = re.compile(rb'<c\b[^>]*\bt="s"[^>]*>\s*<v>(\d+)</v>')
+
+
+def sheet_fingerprints(path: str, names: list[str] | None = None) -> dict[str, str]:
+    """
+    Content hash of each sheet (all sheets if names is None)
+    Covers the sheet's own XML plus the shared strings it references, so editing one sheet
+    doesn't change the fingerprint of any other
+    """
+    ret = {}
+    with zipfile.ZipFile(path) as archive:
+        parts = sheet_parts(archive)
+        sst_part = shared_strings_part(archive)
+        shared = _si_pattern.findall(archive.read(sst_part)) if sst_part else []
+        for name in (parts if names is None else names):
+            xml = archive.read(parts[name])
+            h = hashlib.sha256(xml)
+            for index in _shared_ref_pattern.findall(xml):
+                h.update(shared[int(index)])
+            ret[name] = h.hexdigest()
+    return ret
+
+
+"""Streaming sheet reader"""
+# Same results as openpyxl's load_workbook(read_only=True, data_only=True) and Worksheet.values,
+# without building a cell object per cell. Only the requested sheet's XML is parsed, incrementally
+
+_main_ns = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_value_tag = _main_ns + 'v'
+_inline_tag = _main_ns + 'is'
+_text_tag = _main_ns + 't'
+_run_tag = _main_ns + 'r'
+
+_windows_epoch = datetime.datetime(1899, 12, 30)
+_mac_epoch = datetime.datetime(1904, 1, 1)
+_seconds_per_day = 86400
+
+_builtin_date_formats = {
+    14: 'mm-dd-yy', 15: 'd-mmm-yy', 16: 'd-mmm', 17: 'mmm-yy', 18: 'h:mm AM/PM', 19: 'h:mm:ss AM/PM',
+    20: 'h:mm', 21: 'h:mm:ss', 22: 'm/d/yy h:mm', 45: 'mm:ss', 46: '[h]:mm:ss', 47: 'mmss.0',
+}
+"The only built-in number formats that are dates (the rest never are, so aren't needed)"
+# Same rules as openpyxl.styles.numbers
+_format_strip = re.compile(r'".*?"|\[(?!hh?\]|mm?\]|ss?\])[^\]]*\]')
+_date_code = re.compile(r'(?<![_\\])[dmhysDMHYS]')
+_timedelta_code = re.compile(r'\[hh?\](:mm(:ss(\.0*)?)?)?|\[mm?\](:ss(\.0*)?)?|\[ss?\](\.0*)?', re.I)
+
+
+def is_date_format(fmt: str | None) -> bool:
+    if fmt is None:
+        return False
+    return _date_code.search(_format_strip.sub('', fmt.split(';')[0])) is not None
+
+def is_timedelta_format(fmt: str | None) -> bool:
+    if fmt is None:
+        return False
+    return _timedelta_code.search(fmt.split(';')[0]) is not None
+
+
+def from_excel(value: int | float, epoch: datetime.datetime, timedelta: bool = False):
+    """Excel serial number to a datetime (or time/timedelta), same as openpyxl.utils.datetime.from_excel"""
+    if timedelta:
+        td = datetime.timedelta(days=value)
+        if td.microseconds:
+            # Round to millisecond precision
+            td = datetime.timedelta(seconds=td.total_seconds() // 1, microseconds=round(td.microseconds, -3))
+        return td
+
+    day, fraction = divmod(value, 1)
+    diff = datetime.timedelta(milliseconds=round(fraction * _seconds_per_day * 1000))
+    if 0 <= value < 1 and diff.days == 0:
+        minutes, seconds = divmod(diff.seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+        return datetime.time(hours, minutes, seconds, diff.microseconds)
+    if 0 < value < 60 and epoch == _windows_epoch:
+        # Excel thinks 1900 was a leap year
+        day += 1
+    return epoch + datetime.timedelta(days=day) + diff
+
+
+def _from_iso(text: str):
+    if 'T' in text:
+        return datetime.datetime.fromisoformat(text)
+    if ':' in text:
+        return datetime.time.fromisoformat(text)
+    return datetime.date.fromisoformat(text)
+
+
+def _text(element: ET.Element) -> str:
+    """Plain text of a string item: its <t> plus the <t> of each rich text run (phonetic runs are skipped)"""
+    parts = []
+    for child in element:
+        if child.tag == _text_tag:
+            parts.append(child.text or '')
+        elif child.tag == _run_tag:
+            t = child.find(_text_tag)
+            if t is not None:
+                parts.append(t.text or '')
+    return ''.join(parts)
+
+
+_column_numbers: dict[str, int] = {}
+def _column(reference: str) -> int:
+    """1-based column number of a cell reference like "AB12\""""
+    letters = reference.rstrip('0123456789')
+    number = _column_numbers.get(letters)
+    if number is None:
+        number = 0
+        for char in letters:
+            number = number * 26 + ord(char) - 64
+        _column_numbers[letters] = number
+    return number
+
+
+def _dimension_bounds(ref: str) -> tuple[int, int, int, int]:
+    """(min column, min row, max column, max row) of a range like "A1:AB100" (or a single cell)"""
+    first, _, last = ref.partition(':')
+    last = last or first
+    def row(reference: str) -> int:
+        return int(reference[len(reference.rstrip('0123456789')):])
+    return _column(first), row(first), _column(last), row(last)
+
+
+_sheet_data_start = re.compile(rb'<sheetData\b[^>]*?(/?)>')
+_namespace_declaration = re.compile(rb'\bxmlns(?::[\w.-]+)?="[^"]*"')
+_dimension_ref = re.compile(rb'<dimension\b[^>]*?\bref="([^"]*)"')
+_chunk_size = 1 << 16
+
+
+def _sheet_data(f) -> tuple[tuple[int, int, int, int] | None, Iterator[ET.Element]]:
+    """
+    The sheet's dimensions (from <dimension>, which comes before the data) and its <row> elements
+
+    Rather than handling an event per element in Python (which is where iterparse spends its time),
+    complete rows are cut out of the raw XML a chunk at a time and each batch is parsed in one go.
+    Raises ValueError for XML that isn't laid out the usual way (ex. namespace prefixes on the tags)
+    """
+    header = b''
+    while (match := _sheet_data_start.search(header)) is None:
+        chunk = f.read(_chunk_size)
+        if not chunk:
+            raise ValueError("No <sheetData> in the sheet")
+        header += chunk
+    ref = _dimension_ref.search(header, 0, match.start())
+    bounds = _dimension_bounds(ref.group(1).decode()) if ref else None
+    if match.group(1):
+        # <sheetData/>
+        return bounds, iter(())
+    # Same namespaces as the <worksheet> the rows came from
+    wrapper = b'<sheetData ' + b' '.join(_namespace_declaration.findall(header, 0, match.start())) + b'>'
+    return bounds, _row_elements(f, wrapper, header[match.end():])
+
+
+def _row_elements(f, wrapper: bytes, buffer: bytes) -> Iterator[ET.Element]:
+    done = False
+    while not done:
+        chunk = f.read(_chunk_size)
+        buffer += chunk
+        if chunk:
+            cut = buffer.rfind(b'</row>') + len(b'</row>')
+            if cut < len(b'</row>'):
+                continue
+        else:
+            cut = buffer.find(b'</sheetData>')
+            if cut == -1:
+                raise ValueError("Unterminated <sheetData>")
+            done = True
+        batch, buffer = buffer[:cut], buffer[cut:]
+        yield from ET.fromstring(wrapper + batch + b'</sheetData>')
+
+
+class XlsxReader:
+    """
+    Opens the archive and reads the workbook-wide parts (sheet list, shared strings, styles, date system) once,
+    then streams any sheet's rows
+    """
+    path: str
+    parts: dict[str, str]
+    "Sheet name -> XML part"
+    shared_strings: list[str]
+    date_styles: set[int]
+    "Cell style ids whose number format is a date"
+    timedelta_styles: set[int]
+    epoch: datetime.datetime
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with zipfile.ZipFile(path) as archive:
+            self.parts = sheet_parts(archive)
+            book = workbook_part(archive)
+            self.epoch = self._read_epoch(archive, book)
+            self.shared_strings = self._read_shared_strings(archive)
+            self.date_styles, self.timedelta_styles = self._read_styles(archive, book)
+
+    @staticmethod
+    def _read_epoch(archive: zipfile.ZipFile, book: str) -> datetime.datetime:
+        for element in ET.fromstring(archive.read(book)).iter():
+            if _local(element.tag) == 'workbookPr':
+                return _mac_epoch if element.get('date1904', '').lower() in ('1', 'true') else _windows_epoch
+        return _windows_epoch
+
+    @staticmethod
+    def _read_shared_strings(archive: zipfile.ZipFile) -> list[str]:
+        part = shared_strings_part(archive)
+        if part is None:
+            return []
+        ret = []
+        with archive.open(part) as f:
+            for _, element in ET.iterparse(f):
+                if element.tag == _main_ns + 'si':
+                    ret.append(_text(element).replace('x005F_', ''))
+                    element.clear()
+        return ret
+
+    @staticmethod
+    def _read_styles(archive: zipfile.ZipFile, book: str) -> tuple[set[int], set[int]]:
+        part = next((target for rel_type, target in _relationships(archive, book).values() if rel_type.endswith('/styles')), None)
+        if part is None:
+            return set(), set()
+        root = ET.fromstring(archive.read(part))
+        custom = {
+            int(element.get('numFmtId', '0')): element.get('formatCode', '')
+            for element in root.iter(_main_ns + 'numFmt')
+        }
+        date_styles, timedelta_styles = set(), set()
+        cell_xfs = root.find(_main_ns + 'cellXfs')
+        for i, xf in enumerate(cell_xfs if cell_xfs is not None else []):
+            format_id = int(xf.get('numFmtId', '0'))
+            fmt = custom[format_id] if format_id in custom else _builtin_date_formats.get(format_id)
+            if is_date_format(fmt):
+                date_styles.add(i)
+            if is_timedelta_format(fmt):
+                timedelta_styles.add(i)
+        return date_styles, timedelta_styles
+
+    @property
+    def sheet_names(self) -> list[str]:
+        return list(self.parts)
+
+    def _value(self, cell: ET.Element):
+        """Value of one cell, for any cell type"""
+        kind = cell.get('t', 'n')
+        if kind == 'inlineStr':
+            inline = cell.find(_inline_tag)
+            return None if inline is None else _text(inline)
+        text = cell.findtext(_value_tag) or None
+        if text is None:
+            return None
+        if kind == 'n':
+            return self._number(text, int(cell.get('s') or 0))
+        if kind == 's':
+            return self.shared_strings[int(text)]
+        if kind == 'b':
+            return bool(int(text))
+        if kind == 'd':
+            return _from_iso(text)
+        # 'str' (formula result) and 'e' (error) are the text itself
+        return text
+
+    def _number(self, text: str, style: int):
+        value = float(text) if ('.' in text or 'E' in text or 'e' in text) else int(text)
+        if style in self.date_styles:
+            try:
+                return from_excel(value, self.epoch, timedelta=style in self.timedelta_styles)
+            except (OverflowError, ValueError):
+                return '#VALUE!'
+        return value
+
+    def _rows(self, rows: Iterator[ET.Element]) -> Iterator[tuple[int, dict[int, object], int]]:
+        """(row number, column -> value, last cell's column) for each <row>"""
+        # The common cells (shared strings, plain numbers, dates) are handled inline; this loop is the whole cost
+        shared_strings = self.shared_strings
+        date_styles = self.date_styles
+        dates: dict[tuple[str, int], object] = {}
+        "Converted dates, since a sheet repeats the same few thousand days"
+        column_numbers = _column_numbers
+        value_tag, inline_tag, text_tag = _value_tag, _inline_tag, _text_tag
+        row_number = 0
+        for element in rows:
+            r = element.get('r')
+            row_number = int(float(r)) if r else row_number + 1
+            values = {}
+            column = 0
+            for cell in element:
+                reference = cell.get('r')
+                if reference:
+                    column = column_numbers.get(reference.rstrip('0123456789')) or _column(reference)
+                else:
+                    column += 1
+                kind = cell.get('t')
+                if kind == 's':
+                    text = cell.findtext(value_tag)
+                    values[column] = shared_strings[int(text)] if text else None
+                elif kind is None or kind == 'n':
+                    text = cell.findtext(value_tag)
+                    if not text:
+                        values[column] = None
+                        continue
+                    style = cell.get('s')
+                    if style and int(style) in date_styles:
+                        key = (text, int(style))
+                        value = dates.get(key)
+                        if value is None:
+                            value = dates[key] = self._number(text, int(style))
+                        values[column] = value
+                    else:
+                        values[column] = float(text) if ('.' in text or 'E' in text or 'e' in text) else int(text)
+                elif kind == 'inlineStr':
+                    inline = cell.find(inline_tag)
+                    if inline is not None and len(inline) == 1 and inline[0].tag == text_tag:
+                        # Plain (not rich) text
+                        values[column] = inline[0].text or ''
+                    else:
+                        values[column] = self._value(cell)
+                else:
+                    values[column] = self._value(cell)
+            yield row_number, values, column
+
+    def values(self, name: str) -> Iterator[tuple]:
+        """Same as openpyxl's read-only Worksheet.values: rows padded out to the sheet's dimensions with None"""
+        with zipfile.ZipFile(self.path) as archive, archive.open(self.parts[name]) as f:
+            bounds, rows = _sheet_data(f)
+            max_col = max_row = None
+            if bounds is not None:
+                _, _, max_col, max_row = bounds
+            empty_row = (None,) * max_col if max_col is not None else ()
+
+            counter = 1
+            idx = 1
+            for idx, values, last_column in self._rows(rows):
+                if max_row is not None and idx > max_row:
+                    break
+                # Missing rows
+                for _ in range(counter, idx):
+                    counter += 1
+                    yield empty_row
+                if counter <= idx:
+                    counter += 1
+                    if not values and not max_col:
+                        yield ()
+                        continue
+                    width = max_col or last_column
+                    row = [None] * width
+                    for column, value in values.items():
+                        if 1 <= column <= width:
+                            row[column - 1] = value
+                    yield tuple(row)
+
+            if max_row is not None and max_row < idx:
+                for _ in range(counter, max_row + 1):
+                    yield empty_row
@@ -1,17 +1,36 @@
 # General imports
 import os as _os
+import re as _re
 
 # Project imports
+from .OpenExcel.main import log_years as _workbook_log_years, aggregate_years as _workbook_aggregate_years
 
 
-years = ['2023', '2024']
-
 _basedir = _os.path.join(_os.path.dirname(__file__), "JSON")
 
-log_data_paths = {year:_os.path.join(_basedir, f"log_{year}.json") for year in years}
-log_validation_paths = {year:_os.path.join(_basedir, f"log_{year}_validation.json") for year in years}
+def json_years(kind: str, directory: str = _basedir) -> list[str]:
+    """Sorted years that already have a converted JSON of the kind, 'log' or 'aggregate' (ex. log_2024.json, aggregate_2024_validation.json)"""
+    try:
+        names = _os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    pattern = _re.compile(rf'{_re.escape(kind)}_(\d{{4}})(?:_validation)?\.json')
+    return sorted({match.group(1) for match in map(pattern.fullmatch, names) if match})
+
+log_years = sorted(set(_workbook_log_years) | set(json_years('log')))
+"Every year with a Log sheet in the workbook or a JSON from one, oldest first"
+aggregate_years = sorted(set(_workbook_aggregate_years) | set(json_years('aggregate')))
+"Every year with an Aggregate sheet in the workbook or a JSON from one, oldest first"
+years = sorted(set(log_years) | set(aggregate_years))
+
+log_data_paths = {year:_os.path.join(_basedir, f"log_{year}.json") for year in log_years}
+log_binary_paths = {year:_os.path.join(_basedir, f"log_{year}.bin") for year in log_years}
+"Binary columnar copies of log_data_paths (see BaseLib.columnar), which are what the pipeline actually reads"
+log_validation_paths = {year:_os.path.join(_basedir, f"log_{year}_validation.json") for year in log_years}
 
-aggregate_validation_paths = {year:_os.path.join(_basedir, f"aggregate_{year}_validation.json") for year in years}
+aggregate_validation_paths = {year:_os.path.join(_basedir, f"aggregate_{year}_validation.json") for year in aggregate_years}
 
 buckets_data_path = _os.path.join(_basedir, "buckets.json")
+categories_path = _os.path.join(_basedir, "categories.json")
+"Dir / Broad / Specific hierarchy of the categories, from the Buckets sheet (see BaseLib.CategoryList.Hierarchy)"
 buckets_validation_path = _os.path.join(_basedir, "buckets_validation.json")
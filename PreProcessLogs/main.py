@@ -2,18 +2,15 @@
 Handle original/override/final Log logic
 """
 
-# General imports
-from copy import deepcopy
+# Project imports
+from BaseLib import instrument
+from BaseLib.transaction import Item, Transaction
 
-# Typing
-Item = dict[str, dict[str, str]]
 
+@instrument.stage('pre_process')
+def pre_process(data: list[Transaction]) -> list[Transaction]:
+    """Handle override logic: Combines Imported and Override fields to create the Final fields
 
-def pre_process(data: list[Item]):
-    """Handle override logic: Combines Imported and Override fields to create the Final fields"""
-    ret: list[Item] = deepcopy(data)
-    for item in ret:
-        final = item['Final'] = {}
-        for key, override in item['Override'].items():
-            final[key] = override if override else item['Imported'][key]
-    return ret
+    Transactions are immutable, so each returned one shares the input's sections,
+    and if nothing is overridden the Final section is the Imported section itself"""
+    return [item.replace(final=item.imported.overridden_by(item.override)) for item in data]
@@ -3,37 +3,149 @@ Process the input data
 """
 
 # General imports
-from copy import deepcopy
-from decimal import Decimal
+from bisect import bisect_right
+from heapq import heappop, heappush
+import datetime
 
 
 # Project imports
-from BaseLib import utils
+from BaseLib import instrument, utils
 from BaseLib.money import Money
 from BaseLib.CategoryList import categories
+from BaseLib.transaction import Transaction, category_names, uncategorized
 
 
-def handle(log_data, date_ranges):
-    # Prep the aggregate with date ranges and 0 totals
-    data: list[dict] = deepcopy(date_ranges)
-    for item in data:
-        item['data'] = {cat: Money(0, 0) for cat in categories}
+_category_index = {cat: i for i, cat in enumerate(categories)}
 
+
+class PeriodIndex:
+    """
+    The dates split at every range's start and end, so each date finds its range with a binary search
+    Where ranges overlap, a date goes to the first of them in list order (the same as checking each range in turn)
+    """
+    starts: list[int]
+    "Start ordinal of each piece, sorted. Each piece runs until the next one starts"
+    owners: list[int]
+    "Index (in the original list) of the range each piece belongs to, or -1 for a gap"
+
+    def __init__(self, date_ranges: list[dict[str, datetime.date]]) -> None:
+        ranges = [(item['start'].toordinal(), item['end'].toordinal()) for item in date_ranges]
+        opening = sorted((start, i) for i, (start, _) in enumerate(ranges))
+        closing = sorted((end + 1, i) for i, (_, end) in enumerate(ranges))
+        bounds = sorted({start for start, _ in opening} | {after for after, _ in closing})
+        self.starts = []
+        self.owners = []
+        # Sweep the bounds in order, with the ranges covering the current one in a heap by list index
+        active: list[int] = []
+        ended: set[int] = set()
+        o = c = 0
+        for bound in bounds:
+            while o < len(opening) and opening[o][0] <= bound:
+                heappush(active, opening[o][1])
+                o += 1
+            while c < len(closing) and closing[c][0] <= bound:
+                ended.add(closing[c][1])
+                c += 1
+            # Ranges that have ended are only dropped once they reach the top
+            while active and active[0] in ended:
+                heappop(active)
+            owner = active[0] if active else -1
+            if not self.owners or owner != self.owners[-1]:
+                self.starts.append(bound)
+                self.owners.append(owner)
+
+    def lookup(self, ordinal: int) -> int:
+        """Index (in the original list) of the range containing the date, or -1 if none does"""
+        i = bisect_right(self.starts, ordinal) - 1
+        return self.owners[i] if i >= 0 else -1
+
+
+def aggregate_columns(ordinals: list[int], cents: list[int], category_codes: list[int], date_ranges: list[dict[str, datetime.date]]) -> tuple[list[list[int]], list[int]]:
+    """
+    Core of the aggregation, on plain columns (one entry per transaction)
+    Returns the range x category matrix of total cents,
+    and the positions of any transactions outside every range
+    """
+    periods = PeriodIndex(date_ranges)
+    width = len(categories)
+    totals = [0] * (len(date_ranges) * width)
+    unmatched = []
+    lookup = periods.lookup
+    for i, (ordinal, amount, code) in enumerate(zip(ordinals, cents, category_codes)):
+        period = lookup(ordinal)
+        if period < 0:
+            unmatched.append(i)
+            continue
+        totals[period * width + code] += amount
+    return [totals[r * width:(r + 1) * width] for r in range(len(date_ranges))], unmatched
+
+
+def handle(log_data: list[Transaction], date_ranges):
+    return records(totals(log_data, date_ranges), date_ranges)
+
+
+def totals(log_data: list[Transaction], date_ranges) -> list[list[int]]:
+    """Range x category matrix of total cents. Totals from different parts of the Log can be added with merge_totals"""
+    # Pull out just the columns needed, skipping uncategorized items
+    kept = [item for item in log_data if item.my_category != uncategorized]
+    # Dates kept as text (not in the standard format) still need an ordinal to find their range
+    ordinals = [date if type(date) is int else utils.parse_ordinal(date) for date in (item.final.date for item in kept)] # type: ignore
+    cents = [item.final.amount for item in kept] # type: ignore
+    category_codes = [item.my_category for item in kept]
+    for code in category_codes:
+        if code >= len(categories): # type: ignore
+            raise KeyError(category_names[code]) # type: ignore
+    return totals_codes(ordinals, cents, category_codes, date_ranges) # type: ignore
+
+
+def totals_columns(dates: list[int | str], cents: list[int], item_categories: list[str], date_ranges) -> list[list[int]]:
+    """
+    Same as totals, but on the Final Date, Final Amount, and My Category columns of the Log (see Validation.Log.load_log_data)
+    Dates are ordinals, or text in a Date column that couldn't be stored as ordinals
+    """
+    # Skip uncategorized items
+    keep = [i for i, category in enumerate(item_categories) if category != '']
+    ordinals = [date if type(date) is int else utils.parse_ordinal(date) if date else 0 for date in (dates[i] for i in keep)] # type: ignore
+    kept_cents = [cents[i] for i in keep]
+    category_codes = []
+    for i in keep:
+        code = _category_index.get(item_categories[i])
+        if code is None:
+            raise KeyError(item_categories[i])
+        category_codes.append(code)
+    return totals_codes(ordinals, kept_cents, category_codes, date_ranges)
+
+
+@instrument.stage('aggregate')
+def totals_codes(ordinals: list[int], cents: list[int], category_codes: list[int], date_ranges) -> list[list[int]]:
+    """Same as totals, on categorized items only, with dates as ordinals and categories as indexes into categories"""
     # Aggregate the log data
-    for item in log_data:
-        category = item['My Category']['My Category']
-        if category == '': continue
-        date = utils.parse_date(item['Final']['Date'])
-        for data_item in data:
-            if data_item['start'] <= date <= data_item['end']:
-                data_item['data'][category] += item['Final']['Amount']
-                break
-        else:
-            raise RuntimeError(f"Couldn't find a date range to aggregate with: {item}")
-
-    # Convert dates and amounts back to strings to match validation data
-    for item in data:
+    instrument.count('transactions aggregated', len(ordinals))
+    ret, unmatched = aggregate_columns(ordinals, cents, category_codes, date_ranges)
+    if unmatched:
+        # Report all of them at once rather than one per run
+        listing = '\n'.join(
+            f"{utils.unparse_ordinal(ordinals[i]) if ordinals[i] else '(no date)'} {Money.from_cents(cents[i])} {categories[category_codes[i]]}"
+            for i in unmatched
+        )
+        raise RuntimeError(f"Couldn't find a date range to aggregate with for {len(unmatched)} item(s):\n{listing}")
+    return ret
+
+
+def merge_totals(*parts: list[list[int]]) -> list[list[int]]:
+    """Adds up totals computed over the same date ranges"""
+    return [[sum(values) for values in zip(*rows)] for rows in zip(*parts)]
+
+
+def records(totals: list[list[int]], date_ranges, columns: list[str] = categories) -> list[dict]:
+    """Converts dates and amounts back to strings to match validation data
+    columns names the totals' columns, if they aren't the categories (ex. hierarchy groups)"""
+    data: list[dict] = []
+    for date_range, row in zip(date_ranges, totals):
+        item = dict(date_range)
         for key in ['start', 'end']:
-            item[key] = utils.unparse_date(item[key])
-    
-    return data
\ No newline at end of file
+            item[key] = utils.unparse_date(date_range[key])
+        item['data'] = {cat: Money.from_cents(value) for cat, value in zip(columns, row)}
+        data.append(item)
+
+    return data
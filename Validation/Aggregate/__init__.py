@@ -3,39 +3,64 @@ import datetime as _datetime
 
 
 # Project imports
+from BaseLib.CategoryList import Hierarchy, Level
 from BaseLib.utils import json_load, parse_date
-from Loading import aggregate_validation_paths
-from Validation.Log import load_log_data
+from Loading import aggregate_validation_paths, categories_path
+from Validation.stages import pipeline, aggregate_stages
 
 
-# Need validation (for now) to get the date ranges, so do loading in a weird way
-_data = []
-_validation = []
-def load_aggregate():
-    from .Handling import handle
+def read_aggregate_validation():
     validation = []
     for validation_path in aggregate_validation_paths.values():
         validation.extend(json_load(validation_path))
+    return validation
 
-    # Get the date ranges from validation
+def date_ranges(validation) -> list[dict[str, _datetime.date]]:
+    # Need validation (for now) to get the date ranges
     # FIXME will these just always be months?
-    date_ranges: list[dict[str, _datetime.date]] = [
+    return [
         {k:parse_date(item[k]) for k in ('start', 'end')}
         for item in validation
     ]
-    
-    log_data = load_log_data()
-    data = handle(log_data, date_ranges)
-    
-    _data.extend(data)
-    _validation.extend(validation)
+
+_columns = ['Final.Date', 'Final.Amount', 'My Category.My Category']
+"All that aggregating needs from the Log"
+
+def aggregate_totals(year: str, validation):
+    """Computes an 'aggregate_<year>' stage: totals for one year of the Log, over every date range
+    Only reads the columns it needs from the processed Log"""
+    from Validation.Log import load_log_data
+    from .Handling import totals_columns
+    columns = load_log_data(_columns, [year])
+    return totals_columns(*(columns[name] for name in _columns), date_ranges(validation))
+
+def merge_aggregate(validation, *year_totals):
+    """Computes the 'aggregate' stage from the per-year totals"""
+    from .Handling import merge_totals, records
+    return records(merge_totals(*year_totals), date_ranges(validation))
 
 def load_aggregate_data():
-    if not _data:
-        load_aggregate()
-    return _data
+    return pipeline.output('aggregate')
+
+def load_aggregate_totals() -> list[list[int]]:
+    """The date range x category matrix of cents behind load_aggregate_data, merged from the per-year stages"""
+    from .Handling import merge_totals
+    return merge_totals(*(pipeline.output(stage) for stage in aggregate_stages.values()))
 
 def load_aggregate_validation():
-    if not _validation:
-        load_aggregate()
-    return _validation
+    return pipeline.output('aggregate_validation')
+
+_hierarchy: Hierarchy | None = None
+def load_hierarchy() -> Hierarchy:
+    global _hierarchy
+    if _hierarchy is None:
+        _hierarchy = Hierarchy.load(categories_path)
+    return _hierarchy
+
+def load_aggregate_rollup(level: Level):
+    """Aggregate data totalled by Dir, Broad, or Specific group instead of by category. Groups are keyed like 'Expenses > Car'"""
+    from .Handling import records
+    hierarchy = load_hierarchy()
+    totals = hierarchy.rollup_rows(level, load_aggregate_totals())
+    names = [' > '.join(group) for group in hierarchy.groups[level]]
+    return records(totals, date_ranges(load_aggregate_validation()), names)
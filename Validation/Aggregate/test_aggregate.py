@@ -6,42 +6,27 @@ Validates the "Aggregate" tabs in the Excel sheet
 
 
 # Project imports
+from Loading import aggregate_validation_paths as validation_paths
+from Validation import diff, Aggregate
 from Validation.Aggregate import load_aggregate_data as load_data, load_aggregate_validation as load_validation
 
 
 # Logging
-from BaseLib.logger import delegate_print as print
+from BaseLib.logger import delegate_print as print, silence
 
 
 def print_diff(data: list[dict], validation: list[dict]):
-    if len(data) != len(validation):
-        print("Length mismatch")
-        return
-    
-    def printer(indent: int, k, d, v):
-        print(f"{'>>' * indent} {k} mismatched")
-        print(f"{'>>' * indent}       Data: {repr(d[k])}")
-        print(f"{'>>' * indent} Validation: {repr(v[k])}")
-    
-    for i, (d, v) in enumerate(zip(data, validation)):
-        if d != v:
-            print(f"Element {i} mismatched")
-            print(f"      Data: {d}")
-            print(f"Validation: {v}")
-
-            k = 'start'
-            if d[k] != v[k]: printer(1, k, d, v)
-            k = 'end'
-            if d[k] != v[k]: printer(1, k, d, v)
-            dd = d['data'] ; vv = v['data']
-            for k in dd.keys():
-                if dd[k] != vv[k]:
-                    printer(2, k, dd, vv)
-            
-            break
+    """Print every difference"""
+    diff.print_diff(data, validation, *validation_paths.values(), Aggregate.__file__)
 
 
 def test_aggregate_duplication():
+    # Log has its own test, so keep its output out of this one
+    with silence():
+        from Loading.ExcelToJSON.log import xls_to_json as log_to_json
+        log_to_json()
+        from Validation.Log import load_log_data
+        load_log_data()
     from Loading.ExcelToJSON.aggregate import xls_to_json as aggregate_to_json
     aggregate_to_json()
 
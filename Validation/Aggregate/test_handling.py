@@ -0,0 +1,106 @@
+"""
+Checks the date range lookup and the column-wise totals behind Aggregate.Handling
+"""
+
+# General imports
+import datetime
+import random
+
+import pytest
+
+# Project imports
+from BaseLib.CategoryList import categories, ids
+from Validation.Aggregate import date_ranges, load_aggregate_validation
+from Validation.Aggregate.Handling import PeriodIndex, aggregate_columns, totals, totals_codes, totals_columns
+from Validation.Log import load_log_data
+from Validation.stages import log_stages, pipeline
+
+
+def _range(start: tuple, end: tuple) -> dict[str, datetime.date]:
+    return {'start': datetime.date(*start), 'end': datetime.date(*end)}
+
+def _ordinal(*date) -> int:
+    return datetime.date(*date).toordinal()
+
+
+def test_lookup():
+    ranges = [_range((2024, 2, 1), (2024, 2, 29)), _range((2024, 1, 1), (2024, 1, 31)), _range((2024, 4, 1), (2024, 4, 30))]
+    index = PeriodIndex(ranges)
+    assert index.lookup(_ordinal(2024, 1, 1)) == 1
+    assert index.lookup(_ordinal(2024, 1, 31)) == 1
+    assert index.lookup(_ordinal(2024, 2, 1)) == 0
+    assert index.lookup(_ordinal(2024, 2, 29)) == 0
+    # Before, between, and after the ranges
+    assert index.lookup(_ordinal(2023, 12, 31)) == -1
+    assert index.lookup(_ordinal(2024, 3, 15)) == -1
+    assert index.lookup(_ordinal(2024, 5, 1)) == -1
+    assert index.lookup(0) == -1
+
+
+def test_lookup_overlapping():
+    # The first range in the list wins, whichever way round they are
+    ranges = [_range((2024, 1, 10), (2024, 2, 10)), _range((2024, 1, 1), (2024, 1, 31)), _range((2024, 1, 15), (2024, 1, 20))]
+    index = PeriodIndex(ranges)
+    assert index.lookup(_ordinal(2024, 1, 9)) == 1
+    assert index.lookup(_ordinal(2024, 1, 10)) == 0
+    assert index.lookup(_ordinal(2024, 1, 17)) == 0
+    assert index.lookup(_ordinal(2024, 2, 10)) == 0
+    assert index.lookup(_ordinal(2024, 2, 11)) == -1
+    for ordinal in range(_ordinal(2023, 12, 1), _ordinal(2024, 3, 1)):
+        expected = next((i for i, r in enumerate(ranges) if r['start'].toordinal() <= ordinal <= r['end'].toordinal()), -1)
+        assert index.lookup(ordinal) == expected
+
+
+def test_lookup_random():
+    rng = random.Random(0)
+    base = _ordinal(2024, 1, 1)
+    for _ in range(50):
+        ranges = []
+        for _ in range(rng.randint(1, 12)):
+            start = base + rng.randint(0, 60)
+            ranges.append({'start': datetime.date.fromordinal(start), 'end': datetime.date.fromordinal(start + rng.randint(-1, 20))})
+        index = PeriodIndex(ranges)
+        for ordinal in range(base - 2, base + 85):
+            expected = next((i for i, r in enumerate(ranges) if r['start'].toordinal() <= ordinal <= r['end'].toordinal()), -1)
+            assert index.lookup(ordinal) == expected
+
+
+def test_aggregate_columns():
+    ranges = [_range((2024, 1, 1), (2024, 1, 31)), _range((2024, 2, 1), (2024, 2, 29))]
+    food, rent = ids['Groceries'], ids['Rent']
+    ordinals = [_ordinal(2024, 1, 5), _ordinal(2024, 2, 5), _ordinal(2024, 1, 20), _ordinal(2024, 3, 1)]
+    cents = [-1000, -250, -75, -5]
+    totals, unmatched = aggregate_columns(ordinals, cents, [food, food, rent, food], ranges)
+    assert len(totals) == 2 and all(len(row) == len(categories) for row in totals)
+    assert totals[0][food] == -1000 and totals[0][rent] == -75
+    assert totals[1][food] == -250 and totals[1][rent] == 0
+    assert sum(map(sum, totals)) == -1325
+    assert unmatched == [3]
+
+
+def test_unmatched_report():
+    ranges = [_range((2024, 1, 1), (2024, 1, 31))]
+    with pytest.raises(RuntimeError) as error:
+        totals_codes([_ordinal(2024, 3, 1), 0], [-500, -120], [ids['Groceries'], ids['Rent']], ranges)
+    message = str(error.value)
+    assert "2 item(s)" in message
+    assert "3/1/2024 -$5.00 Groceries" in message
+    assert "(no date) -$1.20 Rent" in message
+
+
+def test_totals_columns():
+    ranges = [_range((2024, 1, 1), (2024, 1, 31))]
+    food = ids['Groceries']
+    # Text dates (from a Date column that couldn't be stored as ordinals) and uncategorized items
+    result = totals_columns([_ordinal(2024, 1, 5), '1/20/2024', '2/1/2024'], [-100, -200, -300], ['Groceries', 'Groceries', ''], ranges)
+    assert result[0][food] == -300
+    with pytest.raises(KeyError):
+        totals_columns([_ordinal(2024, 1, 5)], [-100], ['Not a category'], ranges)
+
+
+def test_totals_columns_match_transactions():
+    ranges = date_ranges(load_aggregate_validation())
+    columns = ['Final.Date', 'Final.Amount', 'My Category.My Category']
+    for year, stage in log_stages.items():
+        data = load_log_data(columns, [year])
+        assert totals_columns(*(data[name] for name in columns), ranges) == totals(pipeline.output(stage), ranges), year
@@ -0,0 +1,147 @@
+"""
+Monte Carlo forecast of bucket balances
+
+Future months are bootstrapped from history: each trial draws whole historical months (all categories together,
+so related spending stays related) and runs the month refill logic forward from the current state,
+using the same kernel as Handling and Scenarios.
+Trials run in fixed-size chunks that each get their own seed, so results don't depend on how many workers are used.
+Each chunk is simulated as one batch, with a member per trial.
+"""
+
+# General imports
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import random
+
+
+# Project imports
+from BaseLib.CategoryList import categories
+from BaseLib.money import Money
+from Validation.Buckets import Kernel, Types
+from Validation.Buckets.Kernel import category_vector, month_checks
+from Validation.Buckets.Types import CategoryVector, CritVector
+
+
+# Logging
+from BaseLib.logger import delegate_print as print
+
+_chunk_size = 2_000
+"Trials per chunk. Fixed (not per worker) so the random streams are the same for any number of workers"
+default_percentiles = (5, 25, 50, 75, 95)
+
+
+class ForecastResults:
+    percentiles: tuple[float, ...]
+    bands: list[list[CategoryVector]]
+    "Percentile -> month -> end-of-month bucket values"
+    error_probability: dict[str, list[float]]
+    "Check name -> month -> fraction of trials where the check failed in that month"
+    ever_probability: dict[str, float]
+    "Check name -> fraction of trials where the check failed in any month"
+
+    def __init__(self, percentiles, bands, error_probability, ever_probability) -> None:
+        self.percentiles = percentiles
+        self.bands = bands
+        self.error_probability = error_probability
+        self.ever_probability = ever_probability
+
+    def band(self, category: Types.category, month: int = -1) -> dict[float, Money]:
+        """Percentile -> value of one bucket at the end of a forecast month (default: the last)"""
+        return {p: band[month][category] for p, band in zip(self.percentiles, self.bands)}
+
+
+def _chunk_seed(seed: int, chunk: int) -> str:
+    """Independent, reproducible stream for each chunk (string seeds are hashed, so neighbors aren't correlated)"""
+    return f"{seed}/{chunk}"
+
+
+def _simulate_chunk(args: tuple) -> tuple[list[Kernel.Columns], dict[str, list[list[bool]]]]:
+    """
+    Runs one chunk of trials, all at once as a Kernel batch with one member per trial
+    Returns end-of-month values (month -> category -> trial) and failures (check -> month -> trial)
+    """
+    history, value, capacity, crit, months, trials, seed = args
+    rng = random.Random(seed)
+    # Each trial's months, drawn the same way as picking from history directly
+    draws = [rng.choices(range(len(history[0])), k=months) for _ in range(trials)]
+    value = Kernel.repeated(value, trials)
+    capacity = Kernel.repeated(capacity, trials)
+    crit = Kernel.repeated(crit, trials)
+    finals = []
+    failures: dict[str, list[list[bool]]] = {name: [] for name in month_checks}
+    for m in range(months):
+        drawn = [draw[m] for draw in draws]
+        transactions = [list(map(column.__getitem__, drawn)) for column in history]
+        month = Kernel.month(value, transactions, crit, capacity)
+        value = month.final
+        finals.append(value)
+        for name, failed in month.failures.items():
+            failures[name].append(failed)
+    return finals, failures
+
+
+def _percentile(values: list[int], percentile: float) -> int:
+    """The value at or just below the percentile (no interpolation, so it's always one of the values)"""
+    return values[int(percentile / 100 * (len(values) - 1))]
+
+
+def forecast(history: list[dict[Types.category, Money]], start: Types.ValueCapacityCritical, months: int,
+             trials: int = 10_000, seed: int = 0, workers: int = 1, percentiles=default_percentiles) -> ForecastResults:
+    """
+    history: per-category totals of past months (ex. the 'data' of each Aggregate item)
+    start: bucket settings to start from (ex. start_next of the last transition)
+    Capacities and critical flags stay as they are in start for the whole forecast
+    """
+    history_columns = Kernel.batch([category_vector(month) for month in history])
+    value = category_vector(start.value)
+    capacity = category_vector(start.capacity)
+    crit = CritVector(start.is_critical[cat] for cat in categories)
+
+    sizes = [min(_chunk_size, trials - i) for i in range(0, trials, _chunk_size)]
+    jobs = [(history_columns, value, capacity, crit, months, size, _chunk_seed(seed, c)) for c, size in enumerate(sizes)]
+    if workers <= 1 or len(jobs) == 1:
+        chunks = [_simulate_chunk(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            chunks = list(pool.map(_simulate_chunk, jobs))
+
+    bands: list[list[CategoryVector]] = [[] for _ in percentiles]
+    for m in range(months):
+        by_category = [sorted(v for chunk in chunks for v in chunk[0][m][c]) for c in range(len(categories))]
+        for band, p in zip(bands, percentiles):
+            band.append(CategoryVector(_percentile(column, p) for column in by_category))
+    # Check -> month -> trial, across all the chunks
+    failures = {name: [[f for chunk in chunks for f in chunk[1][name][m]] for m in range(months)] for name in month_checks}
+    error_probability = {name: [sum(month) / trials for month in by_month] for name, by_month in failures.items()}
+    ever_probability = {name: sum(map(any, zip(*by_month))) / trials for name, by_month in failures.items()}
+    return ForecastResults(tuple(percentiles), bands, error_probability, ever_probability)
+
+
+def forecast_current(months: int, trials: int = 10_000, seed: int = 0, workers: int = 1) -> ForecastResults:
+    """Forecast from the end of the real Buckets data, bootstrapping from every aggregated month so far"""
+    from BaseLib.utils import json_load
+    from Loading import buckets_data_path
+    from Validation.Aggregate import load_aggregate_data
+    from Validation.Buckets.Handling import handle
+    aggregate_data = load_aggregate_data()
+    buckets = handle(aggregate_data, json_load(buckets_data_path))
+    start = list(buckets.transitions.values())[-1].start_next
+    history = [item['data'] for item in aggregate_data]
+    return forecast(history, start, months, trials, seed, workers)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo forecast of bucket balances")
+    parser.add_argument('--months', type=int, default=12)
+    parser.add_argument('--trials', type=int, default=10_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+
+    results = forecast_current(args.months, args.trials, args.seed, args.workers)
+    print(f"Bucket values after {args.months} month(s), percentiles {', '.join(map(str, results.percentiles))}:")
+    for cat in categories:
+        print(f"\t{cat:<25}" + ''.join(f"{str(v):>14}" for v in results.band(cat).values()))
+    print("Chance of each error check firing at least once:")
+    for name, probability in results.ever_probability.items():
+        print(f"\t{month_checks[name]:<45}{probability:>8.1%}")
@@ -3,21 +3,22 @@ Process the input data
 """
 
 # General imports
-from copy import deepcopy
 from typing import Any
+import json
 
 
 # Project imports
-from BaseLib.money import Money
-from Validation.Buckets import Types
+from BaseLib import cache, instrument
+from BaseLib.money import Money, MoneyEncoder
+from Validation.Buckets import Kernel, Types
 
 
 # Logging
-from BaseLib.logger import delegate_print as print
+from BaseLib.logger import delegate_print as print, delegate_error as error
 
-_column = Types.category_to_value[Money]
 _column_t = Types.category_with_total_to_value[Money]
 _crit_colum = Types.category_to_value[Types.is_critical]
+_vector = Types.CategoryVector
 def _generate_month(start: _column_t, transactions: _column_t, prev_crit: _crit_colum, capacity: _column_t) -> Types.MonthFull:
     """
     start: Initial bucket value
@@ -26,151 +27,86 @@ def _generate_month(start: _column_t, transactions: _column_t, prev_crit: _crit_
     is_crit: Which buckets are critical (fill first)
     capacity: Bucket capacity
     """
-    # Remove Total row to make data flow consistent
-    def remove_total(column: _column_t) -> _column:
-        """Return the column without the Total"""
-        return {k:v for k,v in column.items() if k.lower() != "total"}
-    start = remove_total(start)
-    transactions = remove_total(transactions)
-    capacity = remove_total(capacity)
-    
-    def add_columns(a: _column, b: _column) -> _column:
-        assert a.keys() == b.keys()
-        return {key: a[key] + b[key] for key in a.keys()}
-    
-    def subtract_columns(a: _column, b: _column) -> _column:
-        assert a.keys() == b.keys()
-        return {key: a[key] - b[key] for key in a.keys()}
-
-    def scale_column(column: _column, scale: float) -> _column:
-        return {key: Money.from_dollars(column[key].to_dollars() * scale) for key in column.keys()}
-    
-    def sum_column(a: _column) -> Money:
-        return sum(a.values(), Money(0, 0))
-    
-    def this_or_that(condition: _crit_colum, true_val, false_val) -> _column:
-        """true_val and false_val can be columns or scalars"""
-        # Reformat scalars into a column of scalars
-        if not hasattr(true_val, 'keys'):
-            true_val = {key:true_val for key in condition.keys()}
-        if not hasattr(false_val, 'keys'):
-            false_val = {key:false_val for key in condition.keys()}
-
-        return {key:(true_val[key] if val else false_val[key]) for key, val in condition.items()}
-
-
-    # def compute_slush(after_t: _column_t, capacity: _column_t, cap_diff: _column) -> _column:
-    #     assert capacity.keys() == after_t.keys() == cap_diff.keys()
-    #     vals = {}
-    #     for i in capacity.keys():
-    #         if after_t[i] < 0:
-    #             # Negative bucket, immediately replenish from slush fund
-    #             vals[i] = after_t[i]
-    #         elif after_t[i] > capacity[i]:
-    #             # Bucket is over capacity, move excess to slush fund
-    #             vals[i] = -cap_diff[i]
-    #         else:
-    #             # Do nothing
-    #             vals[i] = 0
-    #     return vals
-    def compute_slush(cap_diff: _column) -> _column:
-        return {k:max(-v, Types.Money(0, 0)) for k,v in cap_diff.items()}
-    
-    def compute_crit(prev_crit: _crit_colum, after_t: _column) -> _crit_colum:
-        assert prev_crit.keys() == after_t.keys()
-        return {k:(prev_crit[k] or after_t[k] < 0) for k in prev_crit.keys()}
-    
-    # Use {start} from arguments
-    # Use {transactions} from arguments
-    # Bucket value after transactions
-    after_t: _column = add_columns(start, transactions)
-    # Use {capacity} from arguments
-    # Difference between bucket value and capacity
-    cap_diff: _column = subtract_columns(capacity, after_t)
-    # Movement from buckets to slush fund
-    slush: _column = compute_slush(cap_diff=cap_diff)
-    # Bucket values after removing slush funds
-    before_fill: _column = subtract_columns(after_t, slush)
-    # Difference between bucket value and capacity after removing slush funds
-    s_cap_diff: _column = subtract_columns(capacity, before_fill)
-    # Use {is_crit} from arguments (see NOTE in compute_slush)
-    # Which buckets are critical (fill first)
-    is_crit: _crit_colum = compute_crit(prev_crit, after_t)
-    # Amount needed to fill critical buckets to full
-    crit_to_fill: _column = this_or_that(is_crit, s_cap_diff, Money(0, 0))
-    # Bucket values after refilling critical buckets
-    crit_filled: _column = add_columns(before_fill, crit_to_fill)
-    # Amount needed to fill non-critical buckets to full
-    nc_to_fill: _column = this_or_that(is_crit, Money(0, 0), s_cap_diff)
-
-    # Intermediate value: remaining slush fund after filling critical buckets
-    slush_after_crit = sum_column(slush) - sum_column(crit_to_fill)
-
-    # NC To Fill, but limited by slush fund
-    scale_ratio: float = slush_after_crit / sum_column(nc_to_fill)
-    pre_scale: _column = scale_column(nc_to_fill, scale_ratio)
-
-    # Because of rounding, there's sometimes a slight disagreement. Balance with Unexpected Fund
-    scaled = deepcopy(pre_scale)
-    if (diff := (sum_column(pre_scale) - slush_after_crit)) != 0:
-        assert abs(diff.to_dollars()) < 0.05, f"Large difference encountered: {diff}"
-        scaled['Unexpected Fund'] -= diff
-
-    # Bucket values after refilling non-critical buckets
-    nc_filled: _column = add_columns(crit_filled, scaled)
-    # Final bucket values
-    final: _column = nc_filled
-    # Difference between bucket value and capacity at the end of the month
-    unfilled: _column = subtract_columns(capacity, final)
-
-    def add_total(column: _column):
-        """Adds the Total row"""
-        column = deepcopy(column)
-        column['total'] = sum_column(column)
-        return column
-    
+    # Convert to vectors, which also removes the Total row to make data flow consistent
+    start_v = _vector.from_column(start)
+    transactions_v = _vector.from_column(transactions)
+    capacity_v = _vector.from_column(capacity)
+    prev_crit_v = Types.CritVector.from_column(prev_crit)
+
+    # The math is shared with Scenarios and Forecast, here on a batch of just this month
+    month = Kernel.month(*(Kernel.batch([v]) for v in (start_v, transactions_v, prev_crit_v, capacity_v)))
+    def vector(columns: Kernel.Columns) -> Types.CategoryVector:
+        return _vector(Kernel.member(columns, 0))
+
+    # Because of rounding, there's sometimes a slight disagreement. Kernel balances it with Unexpected Fund
+    diff = Money.from_cents(month.rounding[0])
+    assert abs(diff.to_dollars()) < 0.05, f"Large difference encountered: {diff}"
+
+    after_t = vector(month.after_t)
+    final = vector(month.final)
     columns = {
-        'Start': add_total(start),
-        'Transactions': add_total(transactions),
-        'After T': add_total(after_t),
-        'Capacity': add_total(capacity),
-        'Cap Diff': add_total(cap_diff),
-        'Slush': add_total(slush),
-        'Before Fill': before_fill,
-        'S Cap Diff': s_cap_diff,
-        'Is Crit': is_crit,
-        'Crit To Fill': add_total(crit_to_fill),
-        'Crit Filled': crit_filled,
-        'NC To Fill': add_total(nc_to_fill),
-        'Pre Scale': add_total(pre_scale),
-        'Scaled': add_total(scaled),
-        'NC Filled': nc_filled,
-        'Final': add_total(final),
-        'Unfilled': add_total(unfilled),
+        'Start': start_v.add_total(),
+        'Transactions': transactions_v.add_total(),
+        'After T': after_t.add_total(),
+        'Capacity': capacity_v.add_total(),
+        # Difference between bucket value and capacity
+        'Cap Diff': (capacity_v - after_t).add_total(),
+        'Slush': vector(month.slush).add_total(),
+        'Before Fill': vector(month.before_fill),
+        'S Cap Diff': vector(month.s_cap_diff),
+        'Is Crit': Types.CritVector(Kernel.member(month.is_crit, 0)),
+        'Crit To Fill': vector(month.crit_to_fill).add_total(),
+        'Crit Filled': vector(month.crit_filled),
+        'NC To Fill': vector(month.nc_to_fill).add_total(),
+        'Pre Scale': vector(month.pre_scale).add_total(),
+        'Scaled': vector(month.scaled).add_total(),
+        # Bucket values after refilling non-critical buckets
+        'NC Filled': final,
+        'Final': final.add_total(),
+        # Difference between bucket value and capacity at the end of the month
+        'Unfilled': (capacity_v - final).add_total(),
     }
     intermediate: dict[Any, Money] = {
-        'Slush After Crit': slush_after_crit
+        'Slush After Crit': Money.from_cents(month.slush_after_crit[0])
     }
     error_checks = {
-        "Available": "ERROR: Underwater" if sum_column(start) < 0 else "good",
-        "Internal": "ERROR: Unbalanced internal transfers" if (
-            transactions['CC Payments'] != 0
-            or
-            transactions['Internal Transfers'] != 0
-        ) else "good",
-        "Slush": "ERROR: No slush fund" if sum_column(slush) < 0 else "good",
-        "Crit To Fill": "ERROR: Can't refill critical buckets" if (
-            sum_column(crit_to_fill) > sum_column(slush)
-        ) else "good",
-        "Slush After Crit": "ERROR: Can't refill non-critical buckets" if slush_after_crit < 0 else "good",
-        "NC To Fill": "ERROR: Unused slush funds" if sum_column(nc_to_fill) < slush_after_crit else "good",
-        "Scaled to Fill": "ERROR: Scaled doesn't match slush fund" if sum_column(scaled) != slush_after_crit else "good",
-        "Final": "ERROR: Refilling changed the total" if sum_column(final) != sum_column(after_t) else "good"
+        name: Kernel.month_checks[name] if month.failures[name][0] else "good"
+        for name in Kernel.month_checks if name != "Rounding"
     }
     assert not (failures := [v for v in error_checks.values() if v != "good"]), failures
     return Types.MonthFull(columns=columns, intermediate=intermediate, error_checks=error_checks)
 
-def handle(aggregate_data: list[dict], data: dict[str, Any]) -> Types.BucketsFull:
+def _checkpoint_name(initial: dict) -> str:
+    """One checkpoint file per initial setup, so running other inputs (ex. a scenario) doesn't replace the real data's chain"""
+    return f"buckets_checkpoints/{_chain_key('', initial)}.pickle"
+# Anything that changes how a month/transition is computed
+_code_paths = cache.module_files(['Validation.Buckets.Handling'])
+
+def _chain_key(previous_key: str, *parts) -> str:
+    """Hash of everything upstream of (and including) parts"""
+    return cache.hash_bytes(
+        previous_key.encode(),
+        *(json.dumps(part, cls=MoneyEncoder, sort_keys=True).encode() for part in parts),
+    )
+
+@instrument.stage('buckets')
+def handle(aggregate_data: list[dict], data: dict[str, Any], use_checkpoints: bool = True) -> Types.BucketsFull:
+    """
+    Simulates every month and transition
+    With use_checkpoints, the result of each month + transition is cached, keyed by a hash of all of its inputs
+    (the initial settings plus every aggregate total and change set up to that month),
+    so a rerun only recomputes new or changed months
+    """
+    # Checkpoints from the last run (thrown out if the code changed)
+    code_key = cache.hash_files(*_code_paths)
+    checkpoint_name = _checkpoint_name(data['initial'])
+    checkpoints: dict[str, tuple[Types.MonthFull, Types.TransitionFull]] = {}
+    if use_checkpoints:
+        checkpoints = cache.load_pickle(checkpoint_name, code_key) or {}
+    new_checkpoints: dict[str, tuple[Types.MonthFull, Types.TransitionFull]] = {}
+    reused = 0
+    key = _chain_key(code_key, data['initial'])
+
     # Reformat aggregate for easier reference
     transaction_lookup: dict[Types.month, Types.category_to_value[Money]]
     transaction_lookup = {item['start']:item['data'] for item in aggregate_data}
@@ -185,6 +121,13 @@ def handle(aggregate_data: list[dict], data: dict[str, Any]) -> Types.BucketsFul
     # Start with the initial settings (will be overwritten by each month)
     previous = initial
     for month, transition in data['transitions'].items():
+        key = _chain_key(key, month, transaction_lookup.get(month), transition)
+        if key in checkpoints:
+            # Nothing upstream changed, so resume from the checkpoint
+            months[month], transitions[month] = new_checkpoints[key] = checkpoints[key]
+            previous = transitions[month].start_next
+            reused += 1
+            continue
         try:
             # Unpack
             start = previous.value
@@ -252,10 +195,18 @@ def handle(aggregate_data: list[dict], data: dict[str, Any]) -> Types.BucketsFul
 
             # Update the tracker for the next loop
             previous = transition_obj.start_next
+            new_checkpoints[key] = (month_obj, transition_obj)
         except Exception:
-            print(f"Failed for {month}")
+            error(f"Failed for {month}")
             raise
 
+    instrument.count('bucket months computed', len(months) - reused)
+    if use_checkpoints:
+        print(f"Months reused from checkpoints: {reused}, recomputed: {len(months) - reused}")
+        if reused < len(months):
+            # Only keep the current chain, so old runs don't pile up
+            cache.dump_pickle(checkpoint_name, code_key, new_checkpoints)
+
     bucketsFull = Types.BucketsFull(
         initial=initial,
         months=months,
@@ -265,8 +216,8 @@ def handle(aggregate_data: list[dict], data: dict[str, Any]) -> Types.BucketsFul
     return bucketsFull
 
 def handle_validation(data: dict[str, Any]) -> Types.BucketsFull:
-    """Converts a raw dict into a BucketsFull"""
-    data = deepcopy(data)
+    """Converts a raw dict into a BucketsFull
+    The result shares the raw dict's nested parts rather than copying them, so don't modify either afterwards"""
 
     # Initial
     initial_dict: dict = data['initial']
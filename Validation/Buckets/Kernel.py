@@ -0,0 +1,295 @@
+"""
+The month and transition math of the Buckets sheet, on a batch of bucket states at once
+
+Handling runs it on a batch of one (the real data), Scenarios on one member per scenario, and Forecast on one per trial.
+Each column is a list per category (in CategoryList order) holding that category's cents for every member of the batch,
+so each step is one map over the batch per category instead of a Python loop per member.
+Error checks don't stop anything here: each one is a flag per member, and it's up to the caller what to do about it.
+"""
+
+# General imports
+from dataclasses import dataclass
+from itertools import repeat
+from operator import add, gt, mul, ne, or_, sub
+
+
+# Project imports
+from BaseLib.CategoryList import categories, ids
+from BaseLib.money import Money
+from Validation.Buckets import Types
+from Validation.Buckets.Types import CategoryVector, CritVector
+
+# Typing
+Columns = list[list[int]]
+"Category (by id) -> value for each member of the batch. Cents, or 0/1 for is_critical"
+
+
+_unexpected_fund = ids['Unexpected Fund']
+_internal = [ids['CC Payments'], ids['Internal Transfers']]
+change_fields = ['value_delta', 'value_set', 'capacity_delta', 'capacity_set', 'crit_set']
+
+month_checks = {
+    "Available": "ERROR: Underwater",
+    "Internal": "ERROR: Unbalanced internal transfers",
+    "Slush": "ERROR: No slush fund",
+    "Crit To Fill": "ERROR: Can't refill critical buckets",
+    "Slush After Crit": "ERROR: Can't refill non-critical buckets",
+    "NC To Fill": "ERROR: Unused slush funds",
+    "Scaled to Fill": "ERROR: Scaled doesn't match slush fund",
+    "Final": "ERROR: Refilling changed the total",
+    "Rounding": "ERROR: Large rounding difference",
+}
+"The month error checks from the sheet, plus the rounding difference Handling asserts is small"
+transition_checks = {
+    "Total": "ERROR: Totals changed",
+    "Changes": "ERROR: Both delta and setter used",
+}
+"The transition error check from the sheet, plus using both a delta and a setter, which Handling raises for"
+
+
+"""Conversions"""
+def cents(value: Money | bool | None) -> int:
+    """None counts as zero/False, same as an empty cell"""
+    if value is None:
+        return 0
+    if isinstance(value, Money):
+        return value.value
+    return int(value)
+
+def is_given(value: Money | bool | None) -> bool:
+    """Like the sheet, any Money (even $0.00) counts as set but None and False don't"""
+    return value is not None and value is not False
+
+def category_vector(column: dict[Types.category_with_total, Money | bool | None]) -> CategoryVector:
+    """Cents (or 0/1) per category, ignoring any total. Missing and None entries are 0"""
+    return CategoryVector(cents(column.get(cat)) for cat in categories)
+
+def given_vector(column: dict[Types.category, Money | bool | None]) -> CritVector:
+    """Which entries of a change set column are set"""
+    return CritVector(is_given(column.get(cat)) for cat in categories)
+
+def batch(vectors: list[CategoryVector] | list[CritVector]) -> Columns:
+    """Columns with one member per vector"""
+    return [list(values) for values in zip(*(v.cents if isinstance(v, CategoryVector) else v.flags for v in vectors))]
+
+def repeated(vector: CategoryVector | CritVector, size: int) -> Columns:
+    """Columns with size members, all the same as vector"""
+    values = vector.cents if isinstance(vector, CategoryVector) else vector.flags
+    return [[value] * size for value in values]
+
+def member(columns: Columns, i: int) -> list[int]:
+    """One member's value for each category"""
+    return [column[i] for column in columns]
+
+def gather(columns: Columns, members: list[int]) -> Columns:
+    """Columns with just the given members, in that order"""
+    return [list(map(column.__getitem__, members)) for column in columns]
+
+def scatter(columns: Columns, members: list[int], subset: Columns) -> None:
+    """Replaces the given members with those of subset (as made by gather), in place"""
+    for column, values in zip(columns, subset):
+        for i, v in zip(members, values):
+            column[i] = v
+
+def totals(columns: Columns) -> list[int]:
+    """Sum over the categories, for each member"""
+    return list(map(sum, zip(*columns)))
+
+
+"""Months"""
+@dataclass
+class Month:
+    """Every column of the month section of the sheet (see Handling for which is which), for each member of the batch"""
+    after_t: Columns
+    slush: Columns
+    before_fill: Columns
+    s_cap_diff: Columns
+    is_crit: Columns
+    crit_to_fill: Columns
+    crit_filled: Columns
+    nc_to_fill: Columns
+    pre_scale: Columns
+    scaled: Columns
+    final: Columns
+    slush_after_crit: list[int]
+    rounding: list[int]
+    "How far rounding left Pre Scale from the slush fund (balanced in Unexpected Fund to get Scaled)"
+    failures: dict[str, list[bool]]
+    "Name (see month_checks) -> whether the check failed, for each member"
+
+
+def month(start: Columns, transactions: Columns, prev_crit: Columns, capacity: Columns) -> Month:
+    """
+    start: Initial bucket value
+        either from Initial setup or previous Transition
+    transactions: Transaction totals for this month
+    prev_crit: Which buckets are critical (fill first)
+    capacity: Bucket capacity
+    """
+    size = len(start[0])
+    zeros = [0] * size
+    "Shared by every column that's 0 for the whole batch, so later steps can skip it"
+    def total(columns: Columns) -> list[int]:
+        nonzero = [column for column in columns if column is not zeros]
+        return totals(nonzero) if nonzero else zeros
+
+    after_t = []
+    slush = []
+    before_fill = []
+    s_cap_diff = []
+    is_crit = []
+    crit_to_fill = []
+    crit_filled = []
+    nc_to_fill = []
+    # Most buckets are entirely under capacity, or entirely critical/non-critical, across the batch.
+    # Those take the shortcuts, which give the same values without the math
+    for s, t, p, c in zip(start, transactions, prev_crit, capacity):
+        # Bucket value after transactions
+        a = list(map(add, s, t))
+        after_t.append(a)
+        # Movement from buckets to slush fund
+        #   Negative buckets are immediately replenished from the slush fund,
+        #   excess over capacity is moved to the slush fund
+        cap_diff = list(map(sub, c, a))
+        sl = [-d if d < 0 else 0 for d in cap_diff]
+        if any(sl):
+            slush.append(sl)
+            # Bucket values after removing slush funds
+            b = list(map(sub, a, sl))
+            # Difference between bucket value and capacity after removing slush funds
+            d = list(map(sub, c, b))
+        else:
+            slush.append(zeros)
+            b = a
+            d = cap_diff
+        before_fill.append(b)
+        s_cap_diff.append(d)
+        # Which buckets are critical (fill first)
+        crit = list(map(or_, p, [v < 0 for v in a]))
+        is_crit.append(crit)
+        if not any(crit):
+            crit_to_fill.append(zeros)
+            crit_filled.append(b)
+            nc_to_fill.append(d)
+        elif all(crit):
+            crit_to_fill.append(d)
+            crit_filled.append(list(map(add, b, d)))
+            nc_to_fill.append(zeros)
+        else:
+            # Amount needed to fill critical buckets to full
+            f = list(map(mul, crit, d))
+            crit_to_fill.append(f)
+            # Bucket values after refilling critical buckets
+            crit_filled.append(list(map(add, b, f)))
+            # Amount needed to fill non-critical buckets to full
+            nc_to_fill.append(list(map(sub, d, f)))
+
+    slush_total = total(slush)
+    crit_total = total(crit_to_fill)
+    nc_total = total(nc_to_fill)
+    # Intermediate value: remaining slush fund after filling critical buckets
+    slush_after_crit = list(map(sub, slush_total, crit_total))
+
+    # NC To Fill, but limited by slush fund
+    # Nothing to fill means nothing to scale (the sheet would divide by zero)
+    scale_ratio = [s / n if n else 0.0 for s, n in zip(slush_after_crit, nc_total)]
+    # Same rounding as CategoryVector.scale, to match Excel. Its inner round(v / 100, 2) is always v / 100 for whole cents
+    # (critical and full buckets have nothing to fill, so skip the slow float math for those)
+    pre_scale = [
+        zeros if n is zeros else [round(v / 100 * r * 100) if v else 0 for v, r in zip(n, scale_ratio)]
+        for n in nc_to_fill
+    ]
+
+    # Because of rounding, there's sometimes a slight disagreement. Balance with Unexpected Fund
+    rounding = list(map(sub, total(pre_scale), slush_after_crit))
+    scaled = list(pre_scale)
+    scaled[_unexpected_fund] = list(map(sub, pre_scale[_unexpected_fund], rounding))
+
+    # Final bucket values (NC Filled)
+    final = [f if s is zeros else list(map(add, f, s)) for f, s in zip(crit_filled, scaled)]
+
+    start_total = totals(start)
+    after_total = totals(after_t)
+    failures = {
+        "Available": [total < 0 for total in start_total],
+        "Internal": [any(values) for values in zip(*(transactions[i] for i in _internal))],
+        "Slush": [total < 0 for total in slush_total],
+        "Crit To Fill": list(map(gt, crit_total, slush_total)),
+        "Slush After Crit": [total < 0 for total in slush_after_crit],
+        "NC To Fill": list(map(gt, slush_after_crit, nc_total)),
+        "Scaled to Fill": list(map(ne, total(scaled), slush_after_crit)),
+        "Final": list(map(ne, totals(final), after_total)),
+        "Rounding": [abs(r) >= 5 for r in rounding],
+    }
+    return Month(
+        after_t=after_t, slush=slush, before_fill=before_fill, s_cap_diff=s_cap_diff, is_crit=is_crit,
+        crit_to_fill=crit_to_fill, crit_filled=crit_filled, nc_to_fill=nc_to_fill, pre_scale=pre_scale,
+        scaled=scaled, final=final, slush_after_crit=slush_after_crit, rounding=rounding, failures=failures,
+    )
+
+
+"""Transitions"""
+@dataclass
+class ChangeVectors:
+    """One month's change set as vectors, with what transition needs to know about it worked out once"""
+    value_delta: CategoryVector
+    "Unset entries are 0, so adding it everywhere is the same as adding only the set entries"
+    value_set: CategoryVector
+    value_set_given: CritVector
+    capacity_delta: CategoryVector
+    capacity_set: CategoryVector
+    capacity_set_given: CritVector
+    crit_set_given: CritVector
+    value_conflict: bool
+    "Whether any entry has both a value delta and a value setter"
+    capacity_conflict: bool
+
+    @classmethod
+    def from_change_set(cls, changes: dict[str, dict[Types.category, Money | bool | None]]) -> 'ChangeVectors':
+        """changes: ChangeSet field -> column, ex. the 'changes' of a Buckets input transition"""
+        given = {name: given_vector(changes[name]) for name in change_fields}
+        return cls(
+            value_delta=category_vector(changes['value_delta']),
+            value_set=category_vector(changes['value_set']),
+            value_set_given=given['value_set'],
+            capacity_delta=category_vector(changes['capacity_delta']),
+            capacity_set=category_vector(changes['capacity_set']),
+            capacity_set_given=given['capacity_set'],
+            crit_set_given=given['crit_set'],
+            value_conflict=any(map(min, given['value_delta'].flags, given['value_set'].flags)),
+            capacity_conflict=any(map(min, given['capacity_delta'].flags, given['capacity_set'].flags)),
+        )
+
+
+def _changed(columns: Columns, delta: CategoryVector, setter: CategoryVector, given: CritVector) -> Columns:
+    """
+    Each column replaced by its setter if given, else shifted by its delta
+    Untouched columns are shared rather than copied, and if nothing changes the same Columns are returned
+    """
+    if not (any(given.flags) or any(delta.cents)):
+        return columns
+    size = len(columns[0])
+    ret = []
+    for column, d, s, g in zip(columns, delta.cents, setter.cents, given.flags):
+        if g:
+            column = [s] * size
+        elif d:
+            column = list(map(add, column, repeat(d)))
+        ret.append(column)
+    return ret
+
+
+def transition(final: Columns, capacity: Columns, prev_crit: Columns, changes: ChangeVectors) -> tuple[Columns, Columns, Columns, dict[str, list[bool]]]:
+    """
+    The values, capacities, and is_critical to start the next month with, after applying the change set to every member
+    Also returns the failures of transition_checks, for each member
+    """
+    size = len(final[0])
+    value = _changed(final, changes.value_delta, changes.value_set, changes.value_set_given)
+    new_capacity = _changed(capacity, changes.capacity_delta, changes.capacity_set, changes.capacity_set_given)
+    crit = [[1] * size if g else column for column, g in zip(prev_crit, changes.crit_set_given.flags)]
+    failures = {
+        "Total": [False] * size if value is final else list(map(ne, totals(value), totals(final))),
+        "Changes": [changes.value_conflict or changes.capacity_conflict] * size,
+    }
+    return value, new_capacity, crit, failures
@@ -0,0 +1,165 @@
+"""
+What-if scenarios on top of Handling.handle
+
+A scenario overrides parts of the Buckets input: initial settings and/or entries of each month's change set.
+All the scenarios are simulated together, one member of a Kernel batch each, so every month is one pass of the
+same month and transition math Handling uses, over all the scenarios at once. Only the full month and transition
+records are left out. Each month's change set is converted once, and only the scenarios that override it get their
+transition redone on their own.
+Instead of stopping at the first failed error check, each scenario records which checks failed in which month.
+"""
+
+# General imports
+from copy import deepcopy
+from dataclasses import dataclass, field
+from typing import Any
+
+
+# Project imports
+from BaseLib.CategoryList import categories, ids
+from BaseLib.money import Money
+from Validation.Buckets import Kernel, Types
+from Validation.Buckets.Kernel import ChangeVectors, category_vector, month_checks, transition_checks
+from Validation.Buckets.Types import CategoryVector, CritVector
+
+
+@dataclass
+class Scenario:
+    """Overrides to apply on top of the base input. Anything not mentioned is left as-is"""
+    initial: dict[str, dict[Types.category, Money | bool]] = field(default_factory=dict)
+    "'value', 'capacity', or 'is_critical' -> category -> replacement initial setting"
+    changes: dict[Types.month, dict[str, dict[Types.category, Money | bool | None]]] = field(default_factory=dict)
+    "Month -> ChangeSet field (ex. 'capacity_set') -> category -> replacement for that entry of the month's change set"
+
+
+def apply_scenario(data: dict[str, Any], scenario: Scenario) -> dict[str, Any]:
+    """The base input with the scenario applied, for running a single scenario through Handling.handle"""
+    data = deepcopy(data)
+    for key, overrides in scenario.initial.items():
+        data['initial'][key].update(overrides)
+    for key in ['value', 'capacity']:
+        column = data['initial'][key]
+        column['total'] = sum((v for k, v in column.items() if k != 'total'), Money(0, 0))
+    for month, changes in scenario.changes.items():
+        for field_name, overrides in changes.items():
+            data['transitions'][month]['changes'][field_name].update(overrides)
+    return data
+
+
+class ScenarioResults:
+    months: list[Types.month]
+    final_value: list[CategoryVector]
+    "Per scenario, bucket values after the last transition"
+    final_capacity: list[CategoryVector]
+    "Per scenario, capacities after the last transition"
+    final_critical: list[CritVector]
+    "Per scenario, is_critical after the last transition"
+    failures: dict[str, list[list[bool]]]
+    "Check name -> scenario -> month -> whether the check failed"
+
+    def __init__(self, months, final_value, final_capacity, final_critical, failures) -> None:
+        self.months = months
+        self.final_value = final_value
+        self.final_capacity = final_capacity
+        self.final_critical = final_critical
+        self.failures = failures
+
+    def __len__(self) -> int:
+        return len(self.final_value)
+
+    def failed(self) -> list[bool]:
+        """Per scenario, whether any check failed in any month"""
+        return [any(any(failed[s]) for failed in self.failures.values()) for s in range(len(self))]
+
+    def balances(self, scenario: int) -> dict[Types.category, Money]:
+        return dict(self.final_value[scenario])
+
+    def failures_for(self, scenario: int) -> list[tuple[Types.month, str]]:
+        """(month, error message) for every failed check, in month order"""
+        messages = {**month_checks, **transition_checks}
+        ret = []
+        for m, month in enumerate(self.months):
+            for name, failed in self.failures.items():
+                if failed[scenario][m]:
+                    ret.append((month, messages[name]))
+        return ret
+
+
+def run_scenarios(aggregate_data: list[dict], data: dict[str, Any], scenarios: list[Scenario]) -> ScenarioResults:
+    """
+    Simulates every scenario over all months of the input
+    aggregate_data and data are the same as for Handling.handle
+    """
+    transaction_lookup = {item['start']: item['data'] for item in aggregate_data}
+    months: list[Types.month] = list(data['transitions'].keys())
+    month_index = {month: m for m, month in enumerate(months)}
+    size = len(scenarios)
+
+    # Everything that's the same for all scenarios is converted once
+    initial = data['initial']
+    transactions = [Kernel.repeated(category_vector(transaction_lookup[month]), size) for month in months]
+    base_changes = [ChangeVectors.from_change_set(data['transitions'][month]['changes']) for month in months]
+    value = Kernel.repeated(category_vector(initial['value']), size)
+    capacity = Kernel.repeated(category_vector(initial['capacity']), size)
+    crit = Kernel.repeated(CritVector(bool(initial['is_critical'][cat]) for cat in categories), size)
+
+    # Then each scenario's overrides
+    # Scenarios that override a month's change set the same way share one transition, so each distinct change set
+    # is converted and applied once
+    columns = {'value': value, 'capacity': capacity, 'is_critical': crit}
+    overridden: list[dict[tuple, list[int]]] = [{} for _ in months]
+    "Month -> distinct change set overrides -> the scenarios using them"
+    for s, scenario in enumerate(scenarios):
+        for key, overrides in scenario.initial.items():
+            for cat, setting in _checked(overrides).items():
+                columns[key][ids[cat]][s] = Kernel.cents(setting) if key != 'is_critical' else bool(setting)
+        for month, changes in scenario.changes.items():
+            # The type is part of the key because Money(0, 0) == False, but only the Money counts as set
+            key = tuple((name, tuple((cat, type(v), v) for cat, v in _checked(column).items())) for name, column in changes.items())
+            overridden[month_index[month]].setdefault(key, []).append(s)
+
+    names = [*month_checks, *transition_checks]
+    by_month: dict[str, list[list[bool]]] = {name: [] for name in names}
+    "Check name -> month -> scenario -> whether the check failed"
+    for m, month in enumerate(months):
+        result = Kernel.month(value, transactions[m], crit, capacity)
+        final = result.final
+        # The overriding scenarios, from where they are before the transition
+        subsets = []
+        for key, members in overridden[m].items():
+            base = data['transitions'][month]['changes']
+            changes = ChangeVectors.from_change_set({**base, **{name: {**base[name], **dict(
+                (cat, v) for cat, _, v in column)} for name, column in key}})
+            subsets.append((members, Kernel.transition(
+                Kernel.gather(final, members), Kernel.gather(capacity, members), Kernel.gather(crit, members), changes)))
+        value, capacity, crit, transition_failures = Kernel.transition(final, capacity, crit, base_changes[m])
+        failures = {**result.failures, **transition_failures}
+        if subsets:
+            # Copied first, since columns the transition didn't touch are shared with the previous state
+            value, capacity, crit = ([list(column) for column in state] for state in (value, capacity, crit))
+            failures = {name: list(flags) for name, flags in failures.items()}
+            for members, (subset_value, subset_capacity, subset_crit, subset_failures) in subsets:
+                Kernel.scatter(value, members, subset_value)
+                Kernel.scatter(capacity, members, subset_capacity)
+                Kernel.scatter(crit, members, subset_crit)
+                for name, flags in subset_failures.items():
+                    for s, failed in zip(members, flags):
+                        failures[name][s] = failed
+        for name in names:
+            by_month[name].append(failures[name])
+
+    return ScenarioResults(
+        months,
+        [CategoryVector(values) for values in zip(*value)],
+        [CategoryVector(values) for values in zip(*capacity)],
+        [CritVector(flags) for flags in zip(*crit)],
+        {name: [list(flags) for flags in zip(*per_month)] if per_month else [[] for _ in scenarios] for name, per_month in by_month.items()},
+    )
+
+
+def _checked(column: dict[Types.category, Money | bool | None]) -> dict[Types.category, Money | bool | None]:
+    """The column, after checking every key is a category (so a typo doesn't silently do nothing)"""
+    for cat in column:
+        if cat not in ids:
+            raise KeyError(cat)
+    return column
@@ -1,9 +1,13 @@
 # General imports
+from array import array
+from collections.abc import Iterable, Iterator, Mapping
 from typing import Literal, TypeVar
 from dataclasses import dataclass, asdict as dataclass_to_dict
+import operator
 
 
 # Project imports
+from BaseLib.CategoryList import categories, ids
 from BaseLib.money import Money
 
 
@@ -60,6 +64,113 @@ class ChangeSet:
         )
 
 
+"""Column types"""
+class CategoryVector(Mapping[category_with_total, Money]):
+    """One Money per category, stored as an array of cents in CategoryList order
+    Acts as a read-only dict (with a 'total' entry if with_total) for JSON output and comparisons"""
+    __slots__ = ('cents', 'with_total')
+    cents: array
+    "int64 cents, indexed the same as CategoryList.categories"
+    with_total: bool
+    "Whether the dict view includes 'total'"
+
+    def __init__(self, cents: Iterable[int], with_total: bool = False) -> None:
+        self.cents = cents if isinstance(cents, array) else array('q', cents)
+        self.with_total = with_total
+        assert len(self.cents) == len(categories)
+
+    @classmethod
+    def from_column(cls, column: Mapping[category_with_total, Money]) -> 'CategoryVector':
+        """Converts a column (ignoring any total) to a vector"""
+        if isinstance(column, CategoryVector):
+            return column if not column.with_total else cls(column.cents)
+        return cls(column[cat].value for cat in categories)
+
+    @classmethod
+    def where(cls, condition: 'CritVector', true_val: 'CategoryVector | Money', false_val: 'CategoryVector | Money') -> 'CategoryVector':
+        """true_val where condition is set, else false_val. Either can be a vector or a scalar"""
+        t = true_val.cents if isinstance(true_val, CategoryVector) else [true_val.value] * len(categories)
+        f = false_val.cents if isinstance(false_val, CategoryVector) else [false_val.value] * len(categories)
+        return cls(a if c else b for c, a, b in zip(condition.flags, t, f))
+
+    # Dict view
+    def __getitem__(self, key: category_with_total) -> Money:
+        if key == 'total' and self.with_total:
+            return self.total()
+        return Money.from_cents(self.cents[ids[key]])
+    def __iter__(self) -> Iterator[category_with_total]:
+        yield from categories
+        if self.with_total:
+            yield 'total'
+    def __len__(self) -> int:
+        return len(categories) + self.with_total
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, CategoryVector):
+            return self.with_total == other.with_total and self.cents == other.cents
+        return super().__eq__(other)
+    def __repr__(self) -> str:
+        return f"<CategoryVector {dict(self)}>"
+
+    # Vector math
+    def __add__(self, other: 'CategoryVector') -> 'CategoryVector':
+        return CategoryVector(map(operator.add, self.cents, other.cents))
+    def __sub__(self, other: 'CategoryVector') -> 'CategoryVector':
+        return CategoryVector(map(operator.sub, self.cents, other.cents))
+    def __neg__(self) -> 'CategoryVector':
+        return CategoryVector(map(operator.neg, self.cents))
+    def clip_min(self, minimum: Money) -> 'CategoryVector':
+        floor = minimum.value
+        return CategoryVector(v if v > floor else floor for v in self.cents)
+    def is_negative(self) -> 'CritVector':
+        return CritVector(v < 0 for v in self.cents)
+    def scale(self, ratio: float) -> 'CategoryVector':
+        """Same rounding as Money.from_dollars(value.to_dollars() * ratio), to match Excel"""
+        return CategoryVector(int(round(round(v / 100, 2) * ratio * 100, 0)) for v in self.cents)
+    def adjust(self, key: category, delta: Money) -> 'CategoryVector':
+        """Copy with delta added to one category"""
+        ret = CategoryVector(array('q', self.cents), self.with_total)
+        ret.cents[ids[key]] += delta.value
+        return ret
+    def total(self) -> Money:
+        return Money.from_cents(sum(self.cents))
+    def add_total(self) -> 'CategoryVector':
+        """View of the same data that includes 'total' in the dict view"""
+        return CategoryVector(self.cents, with_total=True)
+
+
+class CritVector(Mapping[category, is_critical]):
+    """One is_critical per category, in CategoryList order. Acts as a read-only dict"""
+    __slots__ = ('flags',)
+    flags: array
+    "0/1 per category, indexed the same as CategoryList.categories"
+
+    def __init__(self, flags: Iterable[bool]) -> None:
+        self.flags = flags if isinstance(flags, array) else array('b', flags)
+        assert len(self.flags) == len(categories)
+
+    @classmethod
+    def from_column(cls, column: Mapping[category, is_critical]) -> 'CritVector':
+        if isinstance(column, CritVector):
+            return column
+        return cls(column[cat] for cat in categories)
+
+    def __getitem__(self, key: category) -> is_critical:
+        return bool(self.flags[ids[key]])
+    def __iter__(self) -> Iterator[category]:
+        return iter(categories)
+    def __len__(self) -> int:
+        return len(categories)
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, CritVector):
+            return self.flags == other.flags
+        return super().__eq__(other)
+    def __repr__(self) -> str:
+        return f"<CritVector {dict(self)}>"
+
+    def __or__(self, other: 'CritVector') -> 'CritVector':
+        return CritVector(map(operator.or_, self.flags, other.flags))
+
+
 """DATA INPUT"""
 @dataclass(init=False)
 class BucketsInput:
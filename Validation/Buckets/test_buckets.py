@@ -6,51 +6,28 @@ Validates the "Buckets" tabs in the Excel sheet
 
 
 # Project imports
-from Validation.Buckets import load_buckets_data as load_data, load_buckets_validation as load_validation, Types
+from Loading import buckets_validation_path as validation_path
+from Validation import diff
+from Validation.Buckets import load_buckets_data as load_data, load_buckets_validation as load_validation, Handling, Types
 
 
 # Logging
-from BaseLib.logger import delegate_print as print
+from BaseLib.logger import delegate_print as print, silence
 
 
-def print_VCC_diff(indent, data: Types.ValueCapacityCritical, validation: Types.ValueCapacityCritical):
-    if data.value != validation.value:
-        print(f"{indent}value MISMATCH")
-    if data.capacity != validation.capacity:
-        print(f"{indent}capacity MISMATCH")
-    if data.is_critical != validation.is_critical:
-        print(f"{indent}is_critical MISMATCH")
-
 def print_diff(data: Types.BucketsFull, validation: Types.BucketsFull):
-    if data.initial != validation.initial:
-        print("initial MISMATCHED")
-    
-    assert data.months.keys() == data.transitions.keys()
-    assert validation.months.keys() == validation.transitions.keys()
-
-    for k in data.months.keys():
-        if (d := data.months[k]) != (v := validation.months[k]):
-            print(f"Month {k} MISMATCH")
-            break
-        if (d := data.transitions[k]) != (v := validation.transitions[k]):
-            print(f"Transition after {k} MISMATCH")
-            if d.end_previous != v.end_previous:
-                print("\tend_previous MISMATCH")
-                print_VCC_diff('\t'*2, d.end_previous, v.end_previous)
-            if d.changes != v.changes:
-                print("\tchanges MISMATCH")
-            if d.start_next != v.start_next:
-                print("\tstart_next MISMATCH")
-                print_VCC_diff('\t'*2, d.start_next, v.start_next)
-            if d.error_checks != v.error_checks:
-                print("\terror_checks MISMATCH")
-            break
+    """Print every difference"""
+    diff.print_diff(data, validation, validation_path, Handling.__file__, Types.__file__)
 
 def test_buckets_duplication():
-    from Loading.ExcelToJSON.log import xls_to_json as log_to_json
-    log_to_json()
-    from Loading.ExcelToJSON.aggregate import xls_to_json as aggregate_to_json
-    aggregate_to_json()
+    # Earlier steps have their own tests, so keep their output out of this one
+    with silence():
+        from Loading.ExcelToJSON.log import xls_to_json as log_to_json
+        log_to_json()
+        from Loading.ExcelToJSON.aggregate import xls_to_json as aggregate_to_json
+        aggregate_to_json()
+        from Validation.Aggregate import load_aggregate_data
+        load_aggregate_data()
     from Loading.ExcelToJSON.buckets import xls_to_json as buckets_to_json
     buckets_to_json()
 
@@ -0,0 +1,97 @@
+"""
+Checks that Handling.handle's checkpoints reuse every month before an edit, and only those
+"""
+
+# General imports
+import copy
+
+import pytest
+
+# Project imports
+from BaseLib import cache
+from BaseLib.logger import capture
+from BaseLib.money import Money
+from BaseLib.transaction import from_items
+from Benchmarks.synthetic import make_dataset, spending_categories
+from Categorize import categorize
+from Categorize.main import RuleIndex
+from Categorize.patterns import PatternMatcher
+from PreProcessLogs import pre_process
+from Validation.Aggregate.Handling import handle as aggregate
+from Validation.Buckets import Handling
+
+
+@pytest.fixture
+def buckets(tmp_path, monkeypatch):
+    """Runs handle on a year of synthetic data with the checkpoints in tmp_path.
+    Returns the synthetic Buckets input, and a function taking a Buckets input that runs handle and
+    returns which months were computed rather than reused (with what handle logged in its logged attribute)"""
+    monkeypatch.setattr(cache, 'cache_dir', str(tmp_path))
+    dataset = make_dataset(600, seed=3)
+    with capture():
+        categorized = categorize(pre_process(from_items(dataset.log)), RuleIndex(dataset.rules), PatternMatcher([]))
+        aggregate_data = aggregate(categorized, dataset.date_ranges)
+    month_of = {id(item['data']): item['start'] for item in aggregate_data}
+
+    computed = []
+    generate_month = Handling._generate_month
+    def recording_generate_month(start, transactions, *args):
+        computed.append(month_of[id(transactions)])
+        return generate_month(start, transactions, *args)
+    monkeypatch.setattr(Handling, '_generate_month', recording_generate_month)
+
+    def run(data: dict) -> list:
+        computed.clear()
+        with capture() as run.logged:
+            Handling.handle(aggregate_data, data)
+        return list(computed)
+    return dataset.buckets_input, run
+
+
+def test_unchanged(buckets):
+    data, run = buckets
+    months = list(data['transitions'])
+    assert run(data) == months
+    assert run(data) == []
+
+
+def test_edited_month(buckets):
+    data, run = buckets
+    months = list(data['transitions'])
+    run(data)
+
+    edited = copy.deepcopy(data)
+    n = 5
+    # Move a dollar between buckets, which keeps the totals the same
+    value_delta = edited['transitions'][months[n]]['changes']['value_delta']
+    first, second = spending_categories[:2]
+    value_delta[first] = (value_delta.get(first) or Money(0, 0)) + Money(1, 0)
+    value_delta[second] = (value_delta.get(second) or Money(0, 0)) - Money(1, 0)
+    assert run(edited) == months[n:]
+    # The checkpoints now follow the edit
+    assert run(edited) == []
+    assert run(data) == months[n:]
+
+
+def test_other_input_keeps_checkpoints(buckets):
+    data, run = buckets
+    months = list(data['transitions'])
+    run(data)
+
+    # A different initial setup, ex. a scenario
+    other = copy.deepcopy(data)
+    first, second = spending_categories[:2]
+    other['initial']['value'][first] += Money(1, 0)
+    other['initial']['value'][second] -= Money(1, 0)
+    assert run(other) == months
+    # Neither replaced the other's checkpoints
+    assert run(data) == []
+    assert run(other) == []
+
+
+def test_reuse_reported(buckets):
+    data, run = buckets
+    run(data)
+    assert any("Months reused from checkpoints: 0, recomputed: 12" in line for line in run.logged)
+    run(data)
+    assert any("Months reused from checkpoints: 12, recomputed: 0" in line for line in run.logged)
@@ -0,0 +1,63 @@
+"""
+Checks the Monte Carlo forecast: reproducible, ordered percentiles, and the same month logic as Handling.handle
+"""
+
+# General imports
+
+
+# Project imports
+from BaseLib.CategoryList import categories
+from BaseLib.logger import silence
+from BaseLib.utils import json_load
+from Loading import buckets_data_path
+from Validation.Aggregate import load_aggregate_data
+from Validation.Buckets.Forecast import forecast
+from Validation.Buckets.Handling import handle
+from Validation.Buckets.Types import ValueCapacityCritical
+
+
+def _load():
+    with silence():
+        # Every sheet type at once
+        from Loading.ExcelToJSON.parallel import xls_to_json
+        xls_to_json()
+        aggregate_data = load_aggregate_data()
+    return aggregate_data, json_load(buckets_data_path)
+
+
+def test_reproducible_and_ordered():
+    aggregate_data, data = _load()
+    with silence():
+        buckets = handle(aggregate_data, data, use_checkpoints=False)
+    start = list(buckets.transitions.values())[-1].start_next
+    history = [item['data'] for item in aggregate_data]
+
+    # More than one chunk, so the per-chunk seeds and the process pool both get used
+    results = forecast(history, start, months=3, trials=2_500, seed=7)
+    again = forecast(history, start, months=3, trials=2_500, seed=7, workers=2)
+    assert results.bands == again.bands
+    assert results.error_probability == again.error_probability
+    assert results.ever_probability == again.ever_probability
+
+    for m in range(3):
+        for cat in categories:
+            band = list(results.band(cat, m).values())
+            assert band == sorted(band), (cat, m, band)
+    for name, probability in results.ever_probability.items():
+        assert 0 <= probability <= 1
+        assert all(p <= probability for p in results.error_probability[name]), name
+
+
+def test_trial_matches_handle():
+    aggregate_data, data = _load()
+    with silence():
+        buckets = handle(aggregate_data, data, use_checkpoints=False)
+    first = list(data['transitions'])[0]
+    initial = ValueCapacityCritical(**data['initial'])
+
+    # One possible month to draw, so every trial is the real first month
+    transactions = next(item['data'] for item in aggregate_data if item['start'] == first)
+    results = forecast([transactions], initial, months=1, trials=3)
+    expected = {cat: buckets.months[first].columns['Final'][cat] for cat in categories}
+    for cat in categories:
+        assert set(results.band(cat, 0).values()) == {expected[cat]}, cat
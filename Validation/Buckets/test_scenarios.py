@@ -0,0 +1,38 @@
+"""
+Checks Scenarios.run_scenarios against Handling.handle
+"""
+
+# General imports
+
+
+# Project imports
+from BaseLib.logger import silence
+from BaseLib.money import Money
+from BaseLib.utils import json_load
+from Loading import buckets_data_path
+from Validation.Aggregate import load_aggregate_data
+from Validation.Buckets.Handling import handle
+from Validation.Buckets.Scenarios import Scenario, apply_scenario, run_scenarios
+
+
+def test_scenarios_match_handle():
+    with silence():
+        # Every sheet type at once
+        from Loading.ExcelToJSON.parallel import xls_to_json
+        xls_to_json()
+        aggregate_data = load_aggregate_data()
+    data = json_load(buckets_data_path)
+    first, last = list(data['transitions'])[0], list(data['transitions'])[-1]
+    scenarios = [
+        Scenario(),
+        Scenario(initial={'capacity': {'Groceries': Money.from_dollars(900)}}),
+        Scenario(changes={first: {'crit_set': {'Groceries': True}, 'capacity_delta': {'Dates': Money.from_dollars(50)}}}),
+    ]
+    results = run_scenarios(aggregate_data, data, scenarios)
+
+    for i, scenario in enumerate(scenarios):
+        full = handle(aggregate_data, apply_scenario(data, scenario), use_checkpoints=False)
+        start_next = full.transitions[last].start_next
+        assert results.balances(i) == {k: v for k, v in start_next.value.items() if k != 'total'}
+        assert dict(results.final_critical[i]) == dict(start_next.is_critical)
+        assert not results.failed()[i], results.failures_for(i)
@@ -1,22 +1,95 @@
-# General imports
-
 # Project imports
+from BaseLib import cache
+from BaseLib.columnar import ColumnReader, source_stamp, write_records
+from BaseLib.transaction import Transaction, from_columns, from_items, to_items
 from BaseLib.utils import json_load
-from Loading import log_data_paths as data_paths, log_validation_paths as validation_paths
+from Loading import log_data_paths as data_paths, log_binary_paths as binary_paths, log_validation_paths as validation_paths
 from PreProcessLogs import Item as LogItem, pre_process
 from Categorize import categorize
+from Validation.stages import pipeline, log_stages
+
+
+def _load_input(year: str) -> list[Transaction]:
+    """Reads the user input column by column from its binary copy, first (re)writing it if it's missing or doesn't match the JSON"""
+    json_path = data_paths[year]
+    binary_path = binary_paths[year]
+    source = source_stamp(json_path)
+    try:
+        with ColumnReader(binary_path) as reader:
+            if reader.meta.get('source') == source:
+                return from_columns(reader)
+    except (FileNotFoundError, ValueError):
+        pass
+    raw = json_load(json_path)
+    write_records(binary_path, raw, {'source': source})
+    return from_items(raw)
+
 
+def load_log_data(columns: list[str] | None = None, years: list[str] | None = None):
+    """
+    Without columns: every Log item, after pre-processing and categorization (as dicts, see load_transactions)
+    With columns (e.g. ["Final.Date", "Final.Amount", "My Category.My Category"]): just those columns for the given years
+        (default: all of them, oldest first), read from a binary copy of each processed year without materializing the rest.
+        Dates are ordinals (or text, see BaseLib.columnar) and amounts are cents (see BaseLib.columnar.ColumnReader.raw)
+    """
+    if columns is not None:
+        ret: dict[str, list] = {name: [] for name in columns}
+        for year in (log_stages if years is None else years):
+            for name, values in _load_processed_columns(year, columns).items():
+                ret[name].extend(values)
+        return ret
+    return to_items(load_transactions())
 
-def load_log_data():
-    raw = []
-    for data_path in data_paths.values():
-        raw.extend(json_load(data_path))
-    data = pre_process(raw)
+
+def load_transactions() -> list[Transaction]:
+    """Every Log item, after pre-processing and categorization, oldest year first"""
+    pipeline.prefetch(list(log_stages.values()))
+    return [item for stage in log_stages.values() for item in pipeline.output(stage)]
+
+
+def process_log_data(year: str) -> list[Transaction]:
+    """Computes a 'log_<year>' stage (use load_transactions, which caches them)"""
+    data = _load_input(year)
+    data = pre_process(data)
     data = categorize(data)
     return data
 
+
+def _processed_key(year: str) -> str:
+    """Everything the year's processed Log comes from: the same input files and code as its stage"""
+    stage = log_stages[year]
+    return cache.hash_files(*pipeline.stages[stage].files, *pipeline.code_files(stage))
+
+
+def _read_processed(path: str, key: str, columns: list[str]) -> dict[str, list] | None:
+    try:
+        with ColumnReader(path) as reader:
+            if reader.meta.get('key') == key:
+                # A year with no items has no columns at all
+                return {name: reader.raw(name) if reader.rows else [] for name in columns}
+    except (FileNotFoundError, ValueError):
+        pass
+    return None
+
+
+def _load_processed_columns(year: str, columns: list[str]) -> dict[str, list]:
+    """Reads from the cached binary of the year's processed Log, rebuilding it from the year's stage if its inputs or code changed"""
+    key = _processed_key(year)
+    path = cache.cache_path(f'log_processed_{year}.bin')
+    ret = _read_processed(path, key, columns)
+    if ret is None:
+        write_records(path, to_items(pipeline.output(log_stages[year])), {'key': key})
+        ret = _read_processed(path, key, columns)
+        assert ret is not None
+    return ret
+
+
 def load_log_validation():
+    return pipeline.output('log_validation')
+
+
+def read_log_validation():
     validation: list[LogItem] = []
     for validation_path in validation_paths.values():
         validation.extend(json_load(validation_path))
-    return validation
\ No newline at end of file
+    return validation
@@ -6,6 +6,8 @@ Validates the "Log" tabs in the Excel sheet
 
 
 # Project imports
+from Loading import log_validation_paths as validation_paths
+from Validation import diff, Log
 from Validation.Log import load_log_data as load_data, load_log_validation as load_validation
 
 
@@ -14,26 +16,8 @@ from BaseLib.logger import delegate_print as print
 
 
 def print_diff(data, validation):
-    """Print differences in a useful way"""
-    found = False
-    for d, v in zip(data, validation):
-        # Full-item match
-        if d == v: continue
-
-        # Make sure keys match
-        if d.keys() != v.keys():
-            found = True
-            print(f"\n{d.keys()=}\n!=\n{v.keys()=}")
-        else:
-            # Find mismatched values
-            for k in v.keys():
-                if d[k] != v[k]:
-                    print(f"\nd[{k}]={d[k]}\n!=\nv[{k}]={v[k]}")
-                    found = True
-                    break
-        
-        # Avoid console spam, just show the first problem
-        if found: break
+    """Print every difference"""
+    diff.print_diff(data, validation, *validation_paths.values(), Log.__file__)
 
 def test_log_duplication():
     from Loading.ExcelToJSON.log import xls_to_json as log_to_json
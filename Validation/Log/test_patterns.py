@@ -0,0 +1,54 @@
+"""
+Checks the pattern-based categorization rules
+"""
+
+# General imports
+
+# Project imports
+from BaseLib.money import Money
+from BaseLib.utils import parse_date
+from Categorize.patterns import AhoCorasick, PatternMatcher, PatternRule
+
+
+def make_final(description: str, amount: str = '-10', date: str = '1/15/2024'):
+    return {'Date': date, 'Original Description': description, 'Amount': Money.from_dollars(amount)}
+
+
+def test_aho_corasick():
+    automaton = AhoCorasick(['he', 'she', 'his', 'hers'])
+    assert sorted(automaton.search('ushers')) == [(0, 2), (1, 1), (3, 2)]
+
+
+def test_pattern_priority_and_filters():
+    matcher = PatternMatcher([
+        PatternRule('prefix', 'safeway', 'Groceries', min_amount=Money.from_dollars('-100')),
+        PatternRule('substring', 'safeway', 'Other - Other'),
+        PatternRule('regex', r'king soopers #\d+', 'Groceries', end=parse_date('12/31/2023')),
+        PatternRule('substring', 'soopers', 'Food - nice'),
+    ])
+    results = matcher.match_all([
+        make_final('SAFEWAY #2911 BOULDER CO'),
+        make_final('SAFEWAY #2911 BOULDER CO', amount='-500'),
+        make_final('FUEL SAFEWAY #2911'),
+        make_final('KING SOOPERS #0062 WESTMINSTER CO', date='12/1/2023'),
+        make_final('KING SOOPERS #0062 WESTMINSTER CO'),
+        make_final('TMOBILE*AUTO PAY'),
+    ])
+    categories = [None if rule is None else rule.my_category for rule in results]
+    assert categories == ['Groceries', 'Other - Other', 'Other - Other', 'Groceries', 'Food - nice', None]
+
+
+def test_length_changing_casefold():
+    # 'ẞ'.casefold() is 'ss', which shifts where every later text starts in the batch
+    matcher = PatternMatcher([PatternRule('prefix', 'amazon', 'Shopping')])
+    assert matcher.candidates_all(['GROẞE STRAẞE MARKT', 'AMAZON MKTP']) == [set(), {0}]
+    assert matcher.candidates_all(['AMAZON MKTP']) == [{0}]
+
+
+def test_regex_groups():
+    # Each regex keeps its own named groups and backreferences
+    matcher = PatternMatcher([
+        PatternRule('regex', r'(?P<store>\d+) #(?P=store)', 'Groceries'),
+        PatternRule('regex', r'(\w+) \1', 'Shopping'),
+    ])
+    assert matcher.candidates_all(['STORE 12 #12', 'TARGET TARGET', 'STORE 12 #13']) == [{0}, {1}, set()]
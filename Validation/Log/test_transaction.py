@@ -0,0 +1,50 @@
+"""
+Checks that Transaction holds everything in a Log item
+"""
+
+# General imports
+import os
+import pickle
+import pytest
+import tempfile
+
+# Project imports
+from BaseLib.columnar import ColumnReader, write_records
+from BaseLib.transaction import Transaction, from_columns, from_items, to_items
+from BaseLib.utils import json_load
+from Loading import log_data_paths, log_validation_paths
+
+
+def test_round_trip():
+    for path in [*log_data_paths.values(), *log_validation_paths.values()]:
+        items = json_load(path)
+        transactions = from_items(items)
+        assert to_items(transactions) == items, path
+        assert pickle.loads(pickle.dumps(transactions)) == transactions, path
+
+
+def test_from_columns():
+    with tempfile.TemporaryDirectory() as tmp:
+        for path in [*log_data_paths.values(), *log_validation_paths.values()]:
+            items = json_load(path)
+            binary_path = os.path.join(tmp, 'log.bin')
+            write_records(binary_path, items)
+            with ColumnReader(binary_path) as reader:
+                assert from_columns(reader) == from_items(items), path
+
+
+def test_non_standard_date():
+    item = json_load(next(iter(log_data_paths.values())))[0]
+    item['Imported']['Date'] = '01/02/2024'
+    transaction = Transaction.from_item(item)
+    assert transaction.imported.date == '01/02/2024'
+    assert transaction.to_item() == item
+    with tempfile.TemporaryDirectory() as tmp:
+        binary_path = os.path.join(tmp, 'log.bin')
+        write_records(binary_path, [item])
+        with ColumnReader(binary_path) as reader:
+            assert from_columns(reader) == [transaction]
+
+    item['Imported']['Date'] = 'not a date'
+    with pytest.raises(ValueError):
+        Transaction.from_item(item)
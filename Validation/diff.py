@@ -0,0 +1,183 @@
+"""
+Structural diff of computed data against validation data, shared by the validation tests
+
+Both sides are hashed into Merkle trees (every list item, dict entry, and dataclass field gets the hash of its subtree).
+Walking the two trees together only descends where hashes differ, so finding every mismatch costs time
+proportional to the differences rather than the data. Trees for validation data can be cached across runs,
+keyed by the contents of the files they were built from.
+"""
+
+# General imports
+from collections.abc import Mapping
+from dataclasses import dataclass, fields, is_dataclass
+from hashlib import blake2b
+import os
+
+# Project imports
+from BaseLib import cache
+from BaseLib.money import Money
+
+
+# Logging
+from BaseLib.logger import delegate_print as print
+
+_tree_dir = 'diff_trees'
+_decoder_paths = [
+    os.path.join(os.path.dirname(cache.__file__), name) for name in ('utils.py', 'schemas.py', 'money.py')
+]
+"How JSON gets decoded, which every cached tree depends on"
+
+
+class Node:
+    """One node of a hash tree. children is a dict (mappings, dataclasses), a list (sequences), or None (leaves)"""
+    __slots__ = ('digest', 'children')
+    digest: bytes
+    children: dict | list | None
+
+    def __init__(self, digest: bytes, children: dict | list | None) -> None:
+        self.digest = digest
+        self.children = children
+
+
+_leaf_types = {str, Money, bool, int, float, type(None)}
+
+
+def _items(obj):
+    """('map', mapping) / ('obj', field dict) / ('seq', list), or None for leaves"""
+    if type(obj) in _leaf_types:
+        return None
+    if isinstance(obj, Mapping):
+        return 'map', obj
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return 'obj', {f.name: getattr(obj, f.name) for f in fields(obj)}
+    if isinstance(obj, (list, tuple)):
+        return 'seq', obj
+    return None
+
+
+def _leaf_bytes(obj) -> bytes:
+    if isinstance(obj, Money):
+        return b'M%d' % obj.value
+    if isinstance(obj, str):
+        return b'S' + obj.encode('utf8')
+    return f"{type(obj).__name__}:{obj!r}".encode('utf8')
+
+
+def hash_tree(obj) -> Node:
+    """Builds the hash tree of obj"""
+    items = _items(obj)
+    if items is None:
+        return Node(blake2b(_leaf_bytes(obj), digest_size=16).digest(), None)
+    kind, content = items
+    h = blake2b(digest_size=16)
+    if kind == 'seq':
+        children = [hash_tree(v) for v in content]
+        h.update(b'L%d' % len(children))
+        for child in children:
+            h.update(child.digest)
+        return Node(h.digest(), children)
+    children = {k: hash_tree(v) for k, v in content.items()}
+    # Dict equality ignores order, so the hash does too
+    h.update(b'D' if kind == 'map' else type(obj).__name__.encode('utf8'))
+    for key_repr, child in sorted((repr(k), child) for k, child in children.items()):
+        h.update(key_repr.encode('utf8'))
+        h.update(child.digest)
+    return Node(h.digest(), children)
+
+
+def cached_tree(obj, *paths: str) -> Node:
+    """
+    Hash tree of obj, reused across runs while the files it was built from are unchanged
+    paths should include every file obj depends on: the data files and the code that loads them
+    """
+    key = cache.hash_files(*paths, __file__, *_decoder_paths)
+    name = os.path.join(_tree_dir, cache.hash_bytes(*(os.path.abspath(p).encode('utf8') for p in paths)) + '.pickle')
+    tree = cache.load_pickle(name, key)
+    if tree is None:
+        tree = hash_tree(obj)
+        cache.dump_pickle(name, key, tree)
+    return tree
+
+
+_missing = object()
+
+
+@dataclass
+class Mismatch:
+    path: tuple
+    "Keys/indexes/attribute names from the root to the mismatch"
+    data: object
+    validation: object
+
+    def path_str(self) -> str:
+        return ''.join(f".{p}" if isinstance(p, _Attr) else f"[{p!r}]" for p in self.path) or '(root)'
+
+    def __str__(self) -> str:
+        if self.data is _missing:
+            return f"{self.path_str()}: missing from data (validation: {self.validation!r})"
+        if self.validation is _missing:
+            return f"{self.path_str()}: not in validation (data: {self.data!r})"
+        return f"{self.path_str()}:\n\t      Data: {self.data!r}\n\tValidation: {self.validation!r}"
+
+
+class _Attr(str):
+    """Path entry for a dataclass field, so it prints as .name instead of ['name']"""
+
+
+def find_mismatches(data, validation, data_tree: Node | None = None, validation_tree: Node | None = None) -> list[Mismatch]:
+    """Every place where data and validation differ, in data order"""
+    if data_tree is None:
+        data_tree = hash_tree(data)
+    if validation_tree is None:
+        validation_tree = hash_tree(validation)
+    ret: list[Mismatch] = []
+    _walk(data, validation, data_tree, validation_tree, (), ret)
+    return ret
+
+
+def _walk(d, v, d_node: Node, v_node: Node, path: tuple, ret: list[Mismatch]) -> None:
+    if d_node.digest == v_node.digest:
+        return
+    d_items, v_items = _items(d), _items(v)
+    if d_items is None or v_items is None or d_items[0] != v_items[0] or (d_items[0] == 'obj' and type(d) is not type(v)):
+        # Leaves, or different shapes, so can't go any deeper
+        ret.append(Mismatch(path, d, v))
+        return
+    kind = d_items[0]
+    d_content, v_content = d_items[1], v_items[1]
+    d_children, v_children = d_node.children, v_node.children
+    assert d_children is not None and v_children is not None
+
+    if kind == 'seq':
+        for i in range(min(len(d_content), len(v_content))):
+            _walk(d_content[i], v_content[i], d_children[i], v_children[i], (*path, i), ret)
+        for i in range(len(v_content), len(d_content)):
+            ret.append(Mismatch((*path, i), d_content[i], _missing))
+        for i in range(len(d_content), len(v_content)):
+            ret.append(Mismatch((*path, i), _missing, v_content[i]))
+        return
+
+    wrap = _Attr if kind == 'obj' else (lambda k: k)
+    for k, d_child in d_content.items():
+        if k in v_content:
+            _walk(d_child, v_content[k], d_children[k], v_children[k], (*path, wrap(k)), ret) # type: ignore
+        else:
+            ret.append(Mismatch((*path, wrap(k)), d_child, _missing))
+    for k, v_child in v_content.items():
+        if k not in d_content:
+            ret.append(Mismatch((*path, wrap(k)), _missing, v_child))
+
+
+def print_diff(data, validation, *validation_paths: str, limit: int | None = 50) -> list[Mismatch]:
+    """
+    Prints every mismatch (up to limit, to avoid console spam) and a count, and returns them all
+    validation_paths are the files validation was loaded from (see cached_tree)
+    """
+    validation_tree = cached_tree(validation, *validation_paths) if validation_paths else None
+    mismatches = find_mismatches(data, validation, validation_tree=validation_tree)
+    for mismatch in mismatches[:limit]:
+        print(mismatch)
+    if limit is not None and len(mismatches) > limit:
+        print(f"... and {len(mismatches) - limit} more")
+    print(f"{len(mismatches)} mismatch(es)")
+    return mismatches
@@ -0,0 +1,108 @@
+"""
+The pipeline from the README as explicit stages (see BaseLib.pipeline), shared by every loader and test
+
+Run directly to (re)build everything and see what was cached:
+    python -m Validation.stages [--force STAGE ...] [--force-all] [--invalidate STAGE ...] [--workers N] [STAGE ...]
+"""
+
+# General imports
+from functools import partial
+import argparse
+import os as _os
+
+# Project imports
+from BaseLib.pipeline import Pipeline, Stage
+from Loading import (
+    log_years, log_data_paths, log_validation_paths, aggregate_validation_paths, buckets_data_path, buckets_validation_path,
+)
+
+
+# Logging
+from BaseLib.logger import delegate_print as print
+
+_root = _os.path.dirname(_os.path.dirname(_os.path.abspath(__file__)))
+def _files(*names: str) -> list[str]:
+    return [_os.path.join(_root, name) for name in names]
+
+
+def _log(year):
+    from Validation.Log import process_log_data
+    return process_log_data(year)
+
+def _log_validation():
+    from Validation.Log import read_log_validation
+    return read_log_validation()
+
+def _aggregate_validation():
+    from Validation.Aggregate import read_aggregate_validation
+    return read_aggregate_validation()
+
+def _aggregate_year(year, validation):
+    from Validation.Aggregate import aggregate_totals
+    return aggregate_totals(year, validation)
+
+def _aggregate(validation, *year_totals):
+    from Validation.Aggregate import merge_aggregate
+    return merge_aggregate(validation, *year_totals)
+
+def _buckets_validation():
+    from Validation.Buckets import read_buckets_validation
+    return read_buckets_validation()
+
+def _buckets(aggregate_data):
+    from BaseLib.utils import json_load
+    from Validation.Buckets.Handling import handle
+    return handle(aggregate_data=aggregate_data, data=json_load(buckets_data_path))
+
+
+# Each year of the Log is its own shard, so a routine update only reprocesses the current year
+# Only years with Log data get stages (a year can have an Aggregate sheet before its Log has anything in it)
+log_stages = {year: f'log_{year}' for year in log_years}
+aggregate_stages = {year: f'aggregate_{year}' for year in log_years}
+
+def _log_files(year: str) -> list[str]:
+    """What a year of the processed Log is made from, besides code"""
+    return [log_data_paths[year], *_files('Rules.csv', 'Pattern_Rules.csv')]
+
+# Each stage's version is its compute function plus every project module it imports (see Pipeline.code_files)
+pipeline = Pipeline([
+    *(Stage(log_stages[year], partial(_log, year), files=_log_files(year))
+      for year in log_years),
+    Stage('log_validation', _log_validation, files=list(log_validation_paths.values())),
+    Stage('aggregate_validation', _aggregate_validation, files=list(aggregate_validation_paths.values())),
+    # Every year's Log is totalled over every date range, since items can be logged in one year and dated in the next
+    # These read just the columns they need from the processed Log (see Validation.Log.load_log_data), rather than
+    # depending on the Log stages' full output, so they share those stages' input files (and their code, through imports)
+    *(Stage(aggregate_stages[year], partial(_aggregate_year, year), deps=['aggregate_validation'],
+            files=_log_files(year))
+      for year in log_years),
+    Stage('aggregate', _aggregate, deps=['aggregate_validation', *aggregate_stages.values()]),
+    Stage('buckets_validation', _buckets_validation, files=[buckets_validation_path]),
+    Stage('buckets', _buckets, deps=['aggregate'], files=[buckets_data_path]),
+], exclude_modules=('Validation.stages',))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the pipeline stages, loading unchanged ones from the cache")
+    parser.add_argument('stages', nargs='*', help="Stages to run (default: all)")
+    parser.add_argument('--force', nargs='+', default=[], metavar='STAGE', help="Recompute these stages even if cached")
+    parser.add_argument('--force-all', action='store_true', help="Recompute every stage")
+    parser.add_argument('--invalidate', nargs='+', default=None, metavar='STAGE', help="Delete these stages' cached outputs first")
+    parser.add_argument('--profile', action='store_true', help="Record stage timings, memory, and counters (same as BUDGET_PROFILE=1)")
+    parser.add_argument('--workers', type=int, default=1, help="Compute the per-year stages this many at a time, in separate processes")
+    args = parser.parse_args()
+
+    if args.profile:
+        from BaseLib import instrument
+        instrument.enable()
+
+    if args.invalidate is not None:
+        pipeline.invalidate(*args.invalidate)
+    pipeline.force = set(pipeline.stages) if args.force_all else set(args.force)
+    names = args.stages or list(pipeline.stages)
+    # Years are independent of each other, so they can go in parallel
+    pipeline.prefetch([name for name in names if name in log_stages.values()], args.workers)
+    pipeline.prefetch([name for name in names if name in aggregate_stages.values()], args.workers)
+    for name in names:
+        pipeline.output(name)
+    print(pipeline.summary())
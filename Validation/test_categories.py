@@ -0,0 +1,42 @@
+"""
+Checks the category registry and the Dir / Broad / Specific rollups
+"""
+
+# General imports
+
+# Project imports
+from BaseLib.CategoryList import categories, find, levels, normalize
+from Validation.Aggregate import load_aggregate_data, load_aggregate_rollup, load_aggregate_validation, load_hierarchy
+
+
+def test_lookup():
+    for i, cat in enumerate(categories):
+        assert find(cat) == i
+        assert find(cat.upper()) == i
+        assert normalize(cat.lower()) == cat
+    assert find('Not a category') is None
+    assert normalize('Not a category') == 'Not a category'
+
+
+def test_rollup():
+    hierarchy = load_hierarchy()
+    assert len(hierarchy.groups['Specific']) == len(categories)
+    for item in load_aggregate_validation():
+        values = [item['data'][cat].value for cat in categories]
+        for level in levels:
+            rolled = hierarchy.rollup(level, values)
+            assert sum(rolled) == sum(values)
+            for group, total in zip(hierarchy.groups[level], rolled):
+                assert total == sum(item['data'][cat].value for cat in hierarchy.members(level, group))
+
+
+def test_aggregate_rollup():
+    hierarchy = load_hierarchy()
+    data = load_aggregate_data()
+    for level in levels:
+        rolled = load_aggregate_rollup(level)
+        assert [(item['start'], item['end']) for item in rolled] == [(item['start'], item['end']) for item in data]
+        for rolled_item, item in zip(rolled, data):
+            for group in hierarchy.groups[level]:
+                total = sum(item['data'][cat].value for cat in hierarchy.members(level, group))
+                assert rolled_item['data'][' > '.join(group)].value == total
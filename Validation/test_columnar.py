@@ -0,0 +1,88 @@
+"""
+Checks the binary columnar format: records survive the round trip, and each column is stored in the most compact lossless kind
+"""
+
+# General imports
+import os
+import tempfile
+
+import pytest
+
+# Project imports
+from BaseLib import columnar
+from BaseLib.columnar import ColumnReader, columns_to_records, write_columns, write_records
+from BaseLib.money import Money
+
+
+def _records():
+    return [
+        {'Imported': {'Date': '1/2/2024', 'Description': 'Café', 'Amount': Money.from_cents(-1234)}, 'Comment': {'Comment': ''}},
+        {'Imported': {'Date': '', 'Description': 'Café', 'Amount': None}, 'Comment': {'Comment': 'repeated text is stored once'}},
+        {'Imported': {'Date': '12/31/2023', 'Description': '', 'Amount': Money.from_cents(10**15)}, 'Comment': {'Comment': '✓'}},
+    ]
+
+
+def test_round_trip():
+    records = _records()
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'records.bin')
+        write_records(path, records, {'source': 'test'})
+        with ColumnReader(path) as reader:
+            assert reader.rows == 3
+            assert reader.meta['source'] == 'test'
+            assert reader.kinds == {'Imported.Date': 'date', 'Imported.Description': 'str', 'Imported.Amount': 'money', 'Comment.Comment': 'str'}
+            assert reader.raw('Imported.Date') == [738887, 0, 738885]
+            assert reader.cents('Imported.Amount') == [-1234, None, 10**15]
+            with pytest.raises(ValueError):
+                reader.cents('Imported.Description')
+            assert reader.column('Imported.Description') == ['Café', 'Café', '']
+            assert columns_to_records(reader, reader.meta['layout']) == records
+
+
+def test_non_standard_dates_stay_text():
+    # Any date that wouldn't come back as the same text keeps the whole column as strings
+    records = _records()
+    records[0]['Imported']['Date'] = '01/02/2024'
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'records.bin')
+        write_records(path, records)
+        with ColumnReader(path) as reader:
+            assert reader.kinds['Imported.Date'] == 'str'
+            assert columns_to_records(reader, reader.meta['layout']) == records
+
+
+def test_empty_and_foreign_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'empty.bin')
+        write_columns(path, {})
+        with ColumnReader(path) as reader:
+            assert reader.rows == 0
+            assert reader.kinds == {}
+
+        other = os.path.join(tmp, 'other.bin')
+        with open(other, 'wb') as f:
+            f.write(b'not a column file at all')
+        with pytest.raises(ValueError):
+            ColumnReader(other)
+
+
+def test_bad_file_closed(monkeypatch):
+    opened = []
+    def tracking_open(*args, **kwargs):
+        f = open(*args, **kwargs)
+        opened.append(f)
+        return f
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'log.bin')
+        write_records(path, _records())
+        with open(path, 'rb') as f:
+            data = f.read()
+        # Empty (can't be memory-mapped), and cut off in the middle of the header
+        for contents in [b'', data[:20]]:
+            with open(path, 'wb') as f:
+                f.write(contents)
+            with monkeypatch.context() as m:
+                m.setattr(columnar, 'open', tracking_open, raising=False)
+                with pytest.raises(ValueError):
+                    ColumnReader(path)
+    assert len(opened) == 2 and all(f.closed for f in opened)
@@ -0,0 +1,45 @@
+"""
+Checks the date parsing fast paths against strptime
+"""
+
+# General imports
+import datetime
+
+import pytest
+
+# Project imports
+from BaseLib import utils
+
+
+def strptime(date_str):
+    return datetime.datetime.strptime(date_str, '%m/%d/%Y').date()
+
+def outcome(parse, value):
+    """Result of parse(value), or the type of error it raised"""
+    try:
+        return parse(value)
+    except Exception as e:
+        return type(e)
+
+
+def test_every_day():
+    day = datetime.date(2019, 12, 25)
+    while day.year < 2026:
+        date_str = f'{day.month}/{day.day}/{day.year}'
+        assert utils.parse_date(date_str) == strptime(date_str) == day
+        assert utils.parse_ordinal(date_str) == day.toordinal()
+        assert utils.unparse_ordinal(day.toordinal()) == date_str
+        day += datetime.timedelta(days=1)
+    assert list(utils.parse_ordinals(['1/2/2024', '1/2/2024', '12/31/2023'])) == [738887, 738887, 738885]
+
+
+@pytest.mark.parametrize('value', ['13/1/2024', '2/30/2024', '0/1/2024', ' 1/2/2024', '01/02/2024', '1/2/24', '', 20240102, None, b'1/2/2024'])
+def test_same_as_strptime(value):
+    expected = outcome(strptime, value)
+    assert outcome(utils.parse_date, value) == expected
+    # Run twice so the memoized result is checked too
+    assert outcome(utils.parse_date, value) == expected
+    if isinstance(expected, datetime.date):
+        assert utils.parse_ordinal(value) == expected.toordinal()
+    else:
+        assert outcome(utils.parse_ordinal, value) == expected
@@ -0,0 +1,29 @@
+"""
+Checks the shared validation diff engine
+"""
+
+# General imports
+
+
+# Project imports
+from BaseLib.money import Money
+from Validation import diff
+
+
+def test_finds_every_mismatch():
+    validation = [
+        {'Final': {'Amount': Money.from_cents(100), 'Date': '1/1/2024'}, 'My Category': {'My Category': 'Rent'}},
+        {'Final': {'Amount': Money.from_cents(200), 'Date': '1/2/2024'}, 'My Category': {'My Category': 'Dates'}},
+        {'Final': {'Amount': Money.from_cents(300), 'Date': '1/3/2024'}, 'My Category': {'My Category': 'Books'}},
+    ]
+    data = [
+        # Same contents, different key order
+        {'My Category': {'My Category': 'Rent'}, 'Final': {'Date': '1/1/2024', 'Amount': Money.from_cents(100)}},
+        {'Final': {'Amount': Money.from_cents(201), 'Date': '1/2/2024'}, 'My Category': {'My Category': 'Games'}},
+    ]
+
+    mismatches = diff.find_mismatches(data, validation)
+    assert [m.path for m in mismatches] == [(1, 'Final', 'Amount'), (1, 'My Category', 'My Category'), (2,)]
+    assert mismatches[0].data == Money.from_cents(201)
+    assert mismatches[2].data is diff._missing
+    assert diff.find_mismatches(validation, validation) == []
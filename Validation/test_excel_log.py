@@ -0,0 +1,198 @@
+"""
+Checks that reconverting a Log sheet only parses the new rows when rows were added at either end,
+and that the result always matches converting the whole sheet (and converting years in parallel)
+"""
+
+# General imports
+import datetime
+import os
+
+import openpyxl
+import pytest
+
+# Project imports
+from BaseLib import cache, instrument
+from BaseLib.columnar import ColumnReader, columns_to_records
+from BaseLib.logger import capture
+from BaseLib.utils import json_load
+import Loading.OpenExcel
+from Loading import ExcelToJSON
+from Loading.ExcelToJSON import log, parallel
+from Loading.OpenExcel.main import LazySheet, LazyWorkbook
+
+
+_meta_header = (
+    ['Imported - Untouched from base'] + [None]*5 +
+    ['Account'] +
+    ['Override - Changes from base'] + [None]*5 +
+    ['Final - Values with overrides, to be used for calculation'] + [None]*5 +
+    ['My Category', 'E', 'Comment']
+)
+_fields = ["Date", "Description", "Original Description", "Category", "Amount", "Status"]
+_section_headers = (
+    [x+'_i' for x in _fields] + ['Account'] + [x+'_o' for x in _fields] + _fields + ['My Category', 'E', 'Comment']
+)
+
+
+def _row(i: int, description: str = '') -> list:
+    date = datetime.datetime(2024, 1, 1) + datetime.timedelta(days=i)
+    description = description or f"Store {i}"
+    imported = [date, description, description.upper(), 'Shopping', -(i + 0.25), 'Posted']
+    return [*imported, 'Checking', *[None]*6, *imported, 'groceries', None, f"comment {i}"]
+
+
+@pytest.fixture
+def converter(tmp_path, monkeypatch):
+    """Runs log.process_year on a workbook of the given rows, with every output in tmp_path.
+    Returns how many lines handle_data parsed"""
+    excel_path = str(tmp_path / 'Budget.xlsx')
+    monkeypatch.setattr(Loading.OpenExcel, 'excel_path', excel_path)
+    monkeypatch.setattr(cache, 'cache_dir', str(tmp_path / 'cache'))
+    for name, suffix in [('data_paths', '.json'), ('validation_paths', '_validation.json'), ('binary_paths', '.bin')]:
+        monkeypatch.setattr(log, name, {'2024': str(tmp_path / f"log_2024{suffix}")})
+    parsed = []
+    handle_data = log.handle_data
+    def counting_handle_data(tag, data_lines, *args, **kwargs):
+        parsed.append(len(data_lines))
+        return handle_data(tag, data_lines, *args, **kwargs)
+    monkeypatch.setattr(log, 'handle_data', counting_handle_data)
+
+    def convert(rows: list[list]) -> int:
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.title = 'Log 2024'
+        for row in [_meta_header, _section_headers, *rows]:
+            sheet.append(row)
+        workbook.save(excel_path)
+        monkeypatch.setattr(log, 'sheets', {'2024': LazySheet(LazyWorkbook(excel_path), 'Log 2024')})
+        parsed.clear()
+        log.process_year('2024')
+        return sum(parsed)
+    return convert
+
+
+def _outputs() -> tuple:
+    return json_load(log.data_paths['2024']), json_load(log.validation_paths['2024'])
+
+
+def _full_conversion(convert, rows: list[list]) -> tuple:
+    """What converting from scratch gives"""
+    for path in (log.data_paths['2024'], log.validation_paths['2024']):
+        os.remove(ExcelToJSON._fingerprint_path(path))
+    convert(rows)
+    return _outputs()
+
+
+def test_appended(converter):
+    rows = [_row(i) for i in range(5)]
+    assert converter(rows) == 2 * 5
+    rows += [_row(5), _row(6)]
+    # Both the user input and validation parse only the 2 new rows
+    assert converter(rows) == 2 * 2
+    assert _outputs() == _full_conversion(converter, rows)
+
+
+def test_prepended(converter):
+    rows = [_row(i) for i in range(5)]
+    converter(rows)
+    rows = [_row(10), *rows]
+    assert converter(rows) == 2 * 1
+    assert _outputs() == _full_conversion(converter, rows)
+
+
+def test_edited(converter):
+    rows = [_row(i) for i in range(5)]
+    converter(rows)
+    rows[2] = _row(2, "Edited")
+    rows.append(_row(5))
+    # Anything other than adding at the ends means converting everything
+    assert converter(rows) == 2 * 6
+    assert _outputs() == _full_conversion(converter, rows)
+
+
+def test_resaved_unchanged(converter):
+    rows = [_row(i) for i in range(3)]
+    converter(rows)
+    workbook = openpyxl.load_workbook(Loading.OpenExcel.excel_path)
+    workbook.save(Loading.OpenExcel.excel_path)
+    json_mtime = os.path.getmtime(log.data_paths['2024'])
+    # Newer workbook, but the same sheet contents
+    assert not log.is_stale('2024')
+    assert ExcelToJSON.previous_conversion(log.data_paths['2024'])['checked']['excel'] == os.path.getmtime(Loading.OpenExcel.excel_path)
+    # The JSON itself is left alone
+    assert os.path.getmtime(log.data_paths['2024']) == json_mtime
+
+
+def _log_workbook(tmp_path, monkeypatch, years: list[str]) -> None:
+    """A workbook with a Log sheet for each year, a few rows apiece"""
+    excel_path = str(tmp_path / 'Budget.xlsx')
+    monkeypatch.setattr(Loading.OpenExcel, 'excel_path', excel_path)
+    workbook = openpyxl.Workbook()
+    workbook.remove(workbook.active)
+    for n, year in enumerate(years):
+        sheet = workbook.create_sheet(f"Log {year}")
+        for row in [_meta_header, _section_headers, *(_row(i) for i in range(n * 10, n * 10 + 5 + n))]:
+            sheet.append(row)
+    workbook.save(excel_path)
+    monkeypatch.setattr(log, 'sheets', {year: LazySheet(LazyWorkbook(excel_path), f"Log {year}") for year in years})
+
+
+def _log_outputs(directory, monkeypatch, years: list[str]) -> list[str]:
+    """Points every Log output into directory"""
+    outputs = []
+    for name, suffix in [('data_paths', '.json'), ('validation_paths', '_validation.json'), ('binary_paths', '.bin')]:
+        paths = {year: str(directory / f"log_{year}{suffix}") for year in years}
+        monkeypatch.setattr(log, name, paths)
+        outputs.extend(paths.values())
+    return outputs
+
+
+def test_parallel_matches_serial(tmp_path, monkeypatch):
+    years = ['2023', '2024', '2025']
+    _log_workbook(tmp_path, monkeypatch, years)
+    handle_data = log.handle_data
+    def counting_handle_data(tag, data_lines, *args, **kwargs):
+        instrument.count('rows parsed', len(data_lines))
+        return handle_data(tag, data_lines, *args, **kwargs)
+    monkeypatch.setattr(log, 'handle_data', counting_handle_data)
+
+    def convert(workers: int) -> tuple[dict, list[str], dict]:
+        """Every output file's contents, the logged messages without their timestamps, and what instrument recorded
+        (the binary copies are compared by their records, since they're stamped with their JSON's modification time)"""
+        # Starting from scratch, so nothing is reused from the other run
+        monkeypatch.setattr(cache, 'cache_dir', str(tmp_path / f"{workers}" / 'cache'))
+        outputs = _log_outputs(tmp_path / f"{workers}", monkeypatch, years)
+        monkeypatch.setattr(instrument, 'enabled', True)
+        monkeypatch.setattr(instrument, '_stages', {})
+        monkeypatch.setattr(instrument, '_counters', {})
+        with capture() as lines:
+            log.xls_to_json(workers)
+        contents = {}
+        for path in outputs:
+            if path.endswith('.bin'):
+                with ColumnReader(path) as reader:
+                    contents[os.path.basename(path)] = columns_to_records(reader, reader.meta['layout'])
+            else:
+                with open(path, 'rb') as f:
+                    contents[os.path.basename(path)] = f.read()
+        return contents, [line.split(' - ', 1)[1] for line in lines], instrument.report()
+
+    *serial, serial_recorded = convert(1)
+    *pooled, pooled_recorded = convert(len(years))
+    assert len(serial[0]) == 3 * len(years)
+    assert pooled == serial
+    # The workers' stages and counters are added to this process's
+    assert serial_recorded['stages']['excel log']['calls'] == pooled_recorded['stages']['excel log']['calls'] == len(years)
+    assert serial_recorded['counters'] == pooled_recorded['counters'] == {'rows parsed': 2 * (5 + 6 + 7)}
+
+
+def test_one_stale_job_in_process(tmp_path, monkeypatch):
+    _log_workbook(tmp_path, monkeypatch, ['2024'])
+    monkeypatch.setattr(cache, 'cache_dir', str(tmp_path / 'cache'))
+    outputs = _log_outputs(tmp_path, monkeypatch, ['2024'])
+    def no_pool(*args, **kwargs):
+        raise AssertionError("Started a process pool for one job")
+    monkeypatch.setattr(parallel, 'ProcessPoolExecutor', no_pool)
+    with capture():
+        log.xls_to_json()
+    assert all(os.path.exists(path) for path in outputs)
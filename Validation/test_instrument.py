@@ -0,0 +1,40 @@
+"""
+Checks that enabling instrumentation counts Money made anywhere, including through names imported before it was enabled
+"""
+
+# General imports
+import json
+import subprocess
+import sys
+
+# Project imports
+from BaseLib import cache
+
+
+_script = """
+import json, sys
+from BaseLib import instrument
+from BaseLib.money import Money
+from BaseLib.transaction import Fields
+instrument.enable(sys.argv[1])
+with instrument.timed('test'):
+    Fields(0, '', '', '', 1234, '').to_dict()
+    Money(1, 50) + Money(2, 0)
+instrument.count('things', 3)
+print(json.dumps(instrument.report()))
+"""
+
+
+def test_report(tmp_path):
+    path = str(tmp_path / 'profile.json')
+    result = subprocess.run(
+        [sys.executable, '-c', _script, path],
+        cwd=cache._root, capture_output=True, text=True, check=True,
+    )
+    report = json.loads(result.stdout.splitlines()[0])
+    # 1 from to_dict (transaction imported _from_cents by name), 2 from the constructor, 1 from the sum
+    assert report['counters'] == {'Money allocated': 4, 'things': 3}
+    assert report['stages']['test']['calls'] == 1
+    # Also written out at exit
+    with open(path) as f:
+        assert json.load(f)['counters'] == report['counters']
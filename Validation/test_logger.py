@@ -0,0 +1,42 @@
+"""
+Checks how log levels are read from names (as in BUDGET_LOG_LEVEL), and that buffered output isn't held back past
+the end of a stage or an uncaught exception
+"""
+
+# General imports
+from contextlib import redirect_stdout
+import io
+import subprocess
+import sys
+
+import pytest
+
+# Project imports
+from BaseLib import cache, instrument, logger
+
+
+def test_parse_level():
+    assert logger.parse_level('debug') == logger.DEBUG
+    assert logger.parse_level(' Warning ') == logger.WARNING
+    with pytest.raises(ValueError, match='DEBUG, INFO, WARNING, ERROR'):
+        logger.parse_level('verbose')
+
+
+def test_flushed_after_stage():
+    @instrument.stage('test')
+    def failing():
+        logger.delegate_print("before the error")
+        raise RuntimeError("boom")
+    out = io.StringIO()
+    with redirect_stdout(out):
+        with pytest.raises(RuntimeError):
+            failing()
+        # Already written, not waiting for the buffer to fill up
+        assert "before the error" in out.getvalue()
+
+
+def test_flushed_before_traceback():
+    script = "from BaseLib.logger import delegate_print as print\nprint('before the error')\nraise RuntimeError('boom')"
+    result = subprocess.run([sys.executable, '-c', script], cwd=cache._root, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    assert result.returncode != 0
+    assert 0 <= result.stdout.index("before the error") < result.stdout.index("Traceback")
@@ -0,0 +1,37 @@
+"""
+Checks Money's comparisons with non-Money values, and parsing it from strings
+"""
+
+# General imports
+
+# Project imports
+from BaseLib.money import Money
+
+
+def test_equality_with_numbers():
+    assert Money(0, 0) == 0
+    assert Money(0, 0) == 0.0
+    assert Money(0, 5) != 0
+    assert Money(0, 5) != 5
+    assert 5 != Money(0, 5)
+    assert Money(0, 5) != 'five cents'
+
+
+def test_mixed_keys():
+    # Money(0, 5) hashes like 5, so this compares them rather than raising
+    keys = {5, Money(0, 5), 0, Money(0, 0), 'x'}
+    assert len(keys) == 4
+    assert {Money(0, 5): 'a', 5: 'b'} == {Money(0, 5): 'a', 5: 'b'}
+
+
+def test_from_str():
+    assert Money.from_str("$1,234.56") == Money.from_cents(123456)
+    assert Money.from_str("-$1,234.56") == Money.from_cents(-123456)
+    assert Money.from_str("$-0.50") == Money.from_cents(-50)
+    assert Money.from_str("-$0.50") == Money.from_cents(-50)
+    assert Money.from_str("$.5") == Money.from_cents(50)
+    assert Money.from_str("$3") == Money.from_cents(300)
+    assert Money.from_str("$-0.00") == Money.from_cents(0)
+    # More than 2 decimal places falls back to rounding like from_dollars
+    assert Money.from_str("$-1.005") == Money.from_dollars(-1.005)
+    assert Money.from_str("$1.234") == Money.from_cents(123)
@@ -0,0 +1,56 @@
+"""
+Checks that decoding JSON with a schema gives the same result as MoneyDecoder
+"""
+
+# General imports
+import json
+
+# Project imports
+from BaseLib import schemas
+from BaseLib.money import Money, MoneyDecoder
+from BaseLib.utils import json_load
+
+
+_log = [
+    {
+        'Imported': {'Date': '1/2/2024', 'Description': 'Store', 'Amount': '$-0.50'},
+        'Override': {'Date': None, 'Description': None, 'Amount': None},
+        'Final': {'Date': '1/2/2024', 'Description': 'Store', 'Amount': '-$1,234.56'},
+        'My Category': 'Groceries',
+    },
+    {
+        'Imported': {'Date': '1/3/2024', 'Description': 'Pay', 'Amount': '$2,000.00'},
+        'Override': {'Date': None, 'Description': None, 'Amount': '$.5'},
+        'Final': {'Date': '1/3/2024', 'Description': 'Pay', 'Amount': '$0.50'},
+        'My Category': 'Income',
+    },
+]
+
+
+def test_matches_money_decoder():
+    text = json.dumps(_log)
+    decoded = schemas.log.apply(json.loads(text))
+    assert decoded == json.loads(text, cls=MoneyDecoder)
+    assert decoded[0]['Imported']['Amount'] == Money.from_cents(-50)
+    assert decoded[0]['Final']['Amount'] == Money.from_cents(-123456)
+    assert decoded[0]['Override']['Amount'] is None
+    assert decoded[1]['Override']['Amount'] == Money.from_cents(50)
+
+
+def test_wildcards():
+    schema = schemas.Schema(('*', 'data', '*'))
+    data = schema.apply([{'data': {'Groceries': '$-3.00', 'Rent': '-$4.00', 'Is Crit': True}, 'name': '$1.00'}])
+    assert data == [{'data': {'Groceries': Money.from_cents(-300), 'Rent': Money.from_cents(-400), 'Is Crit': True}, 'name': '$1.00'}]
+
+
+def test_for_path(tmp_path):
+    assert schemas.for_path('Loading/JSON/log_2024.json') is schemas.log
+    assert schemas.for_path('log_2024_validation.json') is schemas.log
+    assert schemas.for_path('aggregate_2024.json') is schemas.aggregate
+    assert schemas.for_path('buckets_validation.json') is schemas.buckets
+    assert schemas.for_path('other.json') is None
+
+    # json_load picks the schema from the name
+    path = tmp_path / 'log_2024.json'
+    path.write_text(json.dumps(_log))
+    assert json_load(str(path)) == json.loads(json.dumps(_log), cls=MoneyDecoder)
@@ -0,0 +1,91 @@
+"""
+Checks how the stages are found (years from sheet names and JSON files) and run (prefetch in worker processes)
+"""
+
+# General imports
+import os
+import tempfile
+
+# Project imports
+from BaseLib import cache
+from BaseLib.pipeline import Pipeline, Stage
+from Loading import json_years, log_data_paths, log_years
+from Loading.OpenExcel.main import sheet_years
+from Validation.stages import aggregate_stages, log_stages, pipeline
+
+
+def test_sheet_years():
+    names = ['Log 2024', 'Aggregate 2022', 'Log 2023', 'Logs 2020', 'Log 20245', 'Log 2021 (old)', 'Buckets']
+    assert sheet_years(names, 'Log') == ['2023', '2024']
+    assert sheet_years(names, 'Aggregate') == ['2022']
+
+
+def test_json_years():
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ['log_2023.json', 'log_2023_validation.json', 'aggregate_2022_validation.json', 'log_2024.bin', 'buckets.json']:
+            open(os.path.join(tmp, name), 'w').close()
+        assert json_years('log', tmp) == ['2023']
+        assert json_years('aggregate', tmp) == ['2022']
+        assert json_years('log', os.path.join(tmp, 'missing')) == []
+
+
+def test_stages_only_for_log_years():
+    assert list(log_stages) == log_years
+    assert list(aggregate_stages) == log_years
+    assert set(log_data_paths) == set(log_years)
+
+
+def test_code_files_follow_imports():
+    def relative(paths):
+        return {os.path.relpath(path, cache._root).replace(os.sep, '/') for path in paths}
+    aggregate = relative(pipeline.code_files('aggregate'))
+    # Imported inside functions, and through other modules
+    assert {'Validation/Aggregate/Handling.py', 'BaseLib/utils.py', 'BaseLib/transaction.py', 'BaseLib/money.py'} <= aggregate
+    assert 'Validation/Buckets/Handling.py' not in aggregate
+    assert 'Validation/Buckets/Kernel.py' in relative(pipeline.code_files('buckets'))
+    # Editing one stage's definition doesn't change the version of the others
+    assert all('Validation/stages.py' not in relative(pipeline.code_files(name)) for name in pipeline.stages)
+
+
+def _numbers(count):
+    return list(range(count))
+
+def _scaled(numbers, factor):
+    return [n * factor for n in numbers]
+
+def _pipeline() -> Pipeline:
+    return Pipeline([
+        Stage('test_numbers', lambda: _numbers(10)),
+        *(Stage(f'test_scaled_{factor}', _Scale(factor), deps=['test_numbers']) for factor in range(1, 5)),
+    ])
+
+class _Scale:
+    """Picklable, so it can run in a worker"""
+    def __init__(self, factor: int) -> None:
+        self.factor = factor
+    def __call__(self, numbers):
+        return _scaled(numbers, self.factor)
+
+
+def test_prefetch_matches_in_process():
+    original = cache.cache_dir
+    names = [f'test_scaled_{factor}' for factor in range(1, 5)]
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache.cache_dir = os.path.join(tmp, 'serial')
+            serial = _pipeline()
+            expected = {name: serial.output(name) for name in names}
+
+            cache.cache_dir = os.path.join(tmp, 'parallel')
+            parallel = _pipeline()
+            parallel.prefetch(names, workers=2)
+            assert {name: parallel.runs[name].status for name in names} == {name: 'miss' for name in names}
+            assert {name: parallel.output(name) for name in names} == expected
+
+            # Stored the same way as in-process results, so a later run loads them
+            again = _pipeline()
+            again.prefetch(names, workers=2)
+            assert {name: again.runs[name].status for name in names} == {name: 'hit' for name in names}
+            assert {name: again.output(name) for name in names} == expected
+    finally:
+        cache.cache_dir = original
@@ -0,0 +1,39 @@
+"""
+Checks that the synthetic benchmark data is what it claims to be: rules that survive Rules.csv,
+and a dataset that goes through every stage without tripping an error check
+"""
+
+# General imports
+import os
+import tempfile
+
+# Project imports
+from BaseLib.logger import silence
+from BaseLib.transaction import from_items, uncategorized
+from Benchmarks.synthetic import make_dataset, write_rules_csv
+from Categorize import categorize
+from Categorize.main import RuleIndex, parse_rules
+from Categorize.patterns import PatternMatcher
+from PreProcessLogs import pre_process
+from Validation.Aggregate.Handling import handle as aggregate
+from Validation.Buckets.Handling import handle as buckets
+
+
+def test_rules_csv_round_trip():
+    dataset = make_dataset(300, seed=1)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'Rules.csv')
+        write_rules_csv(path, dataset.rules)
+        assert parse_rules(path) == dataset.rules
+
+
+def test_runs_through_pipeline():
+    dataset = make_dataset(500, years=2, seed=2)
+    with silence():
+        categorized = categorize(pre_process(from_items(dataset.log)), RuleIndex(dataset.rules), PatternMatcher([]))
+        assert all(item.my_category != uncategorized for item in categorized)
+        aggregate_data = aggregate(categorized, dataset.date_ranges)
+        assert len(aggregate_data) == len(dataset.date_ranges)
+        # Raises if any month fails an error check
+        result = buckets(aggregate_data, dataset.buckets_input, use_checkpoints=False)
+    assert list(result.months) == list(dataset.buckets_input['transitions'])
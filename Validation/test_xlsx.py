@@ -0,0 +1,55 @@
+"""
+Checks that the streaming sheet reader gives exactly what openpyxl does (values and types, row for row)
+"""
+
+# General imports
+import datetime
+import os
+import tempfile
+
+import openpyxl
+from openpyxl.cell.rich_text import CellRichText, TextBlock
+from openpyxl.cell.text import InlineFont
+
+# Project imports
+from Loading.OpenExcel.main import excel_path
+from Loading.OpenExcel.xlsx import XlsxReader
+
+
+def _check(path: str) -> None:
+    reader = XlsxReader(path)
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        assert reader.sheet_names == workbook.sheetnames
+        for name in reader.sheet_names:
+            actual = list(reader.values(name))
+            expected = [tuple(row) for row in workbook[name].values]
+            assert actual == expected, name
+            for row_a, row_e in zip(actual, expected):
+                assert [type(v) for v in row_a] == [type(v) for v in row_e], name
+    finally:
+        workbook.close()
+
+
+def test_budget_workbook():
+    if os.path.exists(excel_path):
+        _check(excel_path)
+
+
+def test_cell_types():
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Types"
+    sheet.append(['text', 1, 1.5, -2e-9, True, False, None, ''])
+    sheet.append([datetime.datetime(2024, 2, 29, 13, 30), datetime.date(1900, 1, 1), datetime.time(6, 15), datetime.timedelta(hours=30)])
+    sheet['A5'] = 12345
+    sheet['A5'].number_format = 'yyyy-mm-dd;@'
+    sheet['B5'] = 3.25
+    sheet['B5'].number_format = '"d"0.00'
+    sheet['C5'] = CellRichText('plain ', TextBlock(InlineFont(b=True), 'bold'))
+    sheet['F7'] = '=1+1'
+    workbook.create_sheet("Empty")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'types.xlsx')
+        workbook.save(path)
+        _check(path)
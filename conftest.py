@@ -0,0 +1,16 @@
+"""pytest hooks shared by every test"""
+
+# General imports
+import pytest
+
+# Project imports
+from BaseLib import logger
+
+
+@pytest.hookimpl(hookwrapper=True, trylast=True)
+def pytest_runtest_call(item):
+    """Write out buffered log output before pytest collects what the test printed"""
+    try:
+        yield
+    finally:
+        logger.flush()